@@ -0,0 +1,124 @@
+"""Caché del análisis: un acierto no recalcula nada y la reproducción no lee muestras.
+
+Uso: python -m benchmarks.bench_cache [--seconds 60]
+
+Escribe una señal de voz aproximada en un WAV temporal, la analiza dos veces
+con una caché vacía contando las llamadas a ``extract_features`` (la
+segunda debe ser un acierto sin ninguna). ``TableBuilder``, como la ventana,
+calcula la tabla en otro hilo: debe volver enseguida, dar la misma tabla y, si
+se cancela, no dejar nada en la caché. Después reproduce el archivo a ritmo de la
+ventana con un reloj simulado de dos formas: leyendo y convirtiendo las
+muestras, como antes, y solo avanzando la posición con ``FileSource.skip``.
+Ambas deben dar las mismas características en cada tick. Termina con código
+1 si alguna comprobación falla.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from scipy.io import wavfile
+
+from benchmarks.signals import RATE, SIGNALS
+from engine import analysis_cache
+from engine.analysis import AudioAnalysis
+from engine.analysis_cache import AnalysisCache, CachedAnalysis, TableBuilder
+from engine.audio_sources import FileSource
+
+TICK = 0.05
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def playback(path, table, skip):
+    """Tiempos (s) de la lectura de cada tick y características vistas, reproduciendo con la caché"""
+    clock = FakeClock()
+    source = FileSource(path, clock=clock)
+    analysis = CachedAnalysis(table)
+    source.start()
+    times, seen = [], []
+    while not source.finished:
+        clock.now += TICK
+        start = time.perf_counter()
+        if skip:
+            analysis.advance(source.skip())
+        else:
+            analysis.process(source.read())
+        times.append(time.perf_counter() - start)
+        seen.append(analysis.features())
+    return np.array(times) * 1e6, seen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aciertos de la caché del análisis y coste de reproducir")
+    parser.add_argument('--seconds', type=float, default=60.0, help="Duración de la señal")
+    args = parser.parse_args(argv)
+
+    calls = []
+    extract = analysis_cache.extract_features
+
+    def counted(*a, **k):
+        calls.append(1)
+        return extract(*a, **k)
+
+    analysis_cache.extract_features = counted
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'voz.wav')
+        wavfile.write(path, RATE, SIGNALS['speech'](args.seconds).astype(np.int16))
+        rate, data = wavfile.read(path, mmap=True)
+        cache = AnalysisCache(os.path.join(tmp, 'cache'))
+        for attempt in ('fallo', 'acierto'):
+            analysis = AudioAnalysis(rate, 1024)
+            before = len(calls)
+            start = time.perf_counter()
+            table = cache.features(path, data, analysis, rate / analysis.hop)
+            elapsed = time.perf_counter() - start
+            print(f"{attempt:<8} {elapsed * 1e3:8.1f} ms  llamadas a extract_features: {len(calls) - before}")
+        if len(calls) != 1:
+            print("el acierto volvió a analizar el archivo", file=sys.stderr)
+            ok = False
+
+        # En segundo plano, sobre cachés vacías: una termina y otra se cancela a medias
+        frame_rate = rate / AudioAnalysis(rate, 1024).hop
+        start = time.perf_counter()
+        builder = TableBuilder(AnalysisCache(os.path.join(tmp, 'fondo')), path, data,
+                               AudioAnalysis(rate, 1024), frame_rate)
+        returned = time.perf_counter() - start
+        builder.thread.join()
+        print(f"segundo plano: vuelve en {returned * 1e3:.1f} ms, tabla en {(time.perf_counter() - start) * 1e3:.1f} ms")
+        if builder.table is None or not np.array_equal(builder.table.columns['level'], table.columns['level'],
+                                                       equal_nan=True):
+            print(f"la tabla en segundo plano no coincide ({builder.error})", file=sys.stderr)
+            ok = False
+        cancelled = os.path.join(tmp, 'cancelada')
+        builder = TableBuilder(AnalysisCache(cancelled), path, data, AudioAnalysis(rate, 1024), frame_rate)
+        time.sleep(0.05)
+        builder.cancel()
+        left = [name for name in os.listdir(cancelled) if name != 'hashes.json']
+        print(f"cancelada: {len(left)} entradas en la caché")
+        if builder.table is not None or left:
+            print("cancelar dejó una tabla o una entrada a medias", file=sys.stderr)
+            ok = False
+
+        results = {skip: playback(path, table, skip) for skip in (False, True)}
+        for skip, (times, _) in results.items():
+            print(f"{'skip' if skip else 'read':<8} lectura por tick {np.median(times):7.1f} µs p50 "
+                  f"{np.percentile(times, 99):7.1f} p99")
+        if results[False][1] != results[True][1]:
+            print("skip no da las mismas características que read", file=sys.stderr)
+            ok = False
+    analysis_cache.extract_features = extract
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
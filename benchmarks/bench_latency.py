@@ -0,0 +1,69 @@
+"""Latencia de clic a frame del tick en vivo, sin micrófono ni pantalla.
+
+Uso: python -m benchmarks.bench_latency [--seconds 10]
+
+Reproduce el bucle de la ventana (lectura, análisis, escena y presentación
+con el mismo planificador) sobre ``signal:silence`` con un ``LatencyProbe``,
+en tiempo real, para la configuración por defecto y la de baja latencia. El
+canvas es simulado: el repintado real de Tk y la pantalla van aparte.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.fake_canvas import FakeCanvas
+from engine.analysis import AudioAnalysis
+from engine.audio_sources import SignalSource
+from engine.forms_scene import FormsScene
+from engine.latency import LatencyProbe
+from engine.scheduler import FrameScheduler
+
+RATE = 44100
+CONFIGS = {
+    'por defecto': dict(block_size=1024, hop=512, fps=20),
+    'baja latencia': dict(block_size=256, hop=256, fps=60),
+    'baja latencia, 128': dict(block_size=128, hop=256, fps=60),
+}
+
+
+def run(block_size, hop, fps, seconds):
+    source = SignalSource('silence', RATE, block_size)
+    probe = LatencyProbe(RATE, interval=0.5)
+    source.attach_probe(probe)
+    analysis = AudioAnalysis(RATE, max(block_size, 1024), hop=hop)
+    canvas = FakeCanvas()
+    scene = FormsScene(FormsScene.create_renderer('canvas', canvas, 800, 600), seed=0)
+    scheduler = FrameScheduler(fps)
+
+    source.start()
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        scheduler.begin()
+        analysis.process(source.read())
+        features = analysis.features()
+        if features is not None:
+            rhythm = analysis.rhythm()
+            if np.any(rhythm.onsets):
+                probe.detected()
+            scene.react(features[0], features[1], rhythm, time.monotonic(), 800, 600)
+            scene.move_shapes(time.monotonic(), 800, 600)
+            scene.renderer.present()
+            probe.presented()
+        _, delay = scheduler.end()
+        time.sleep(delay / 1000)
+    return probe
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latencia de clic a frame sin pantalla")
+    parser.add_argument('--seconds', type=float, default=10.0, help="Duración de cada configuración")
+    args = parser.parse_args(argv)
+    for name, config in CONFIGS.items():
+        probe = run(seconds=args.seconds, **config)
+        print(f"{name:<20} bloque {config['block_size']:4d}  salto {config['hop']}  {config['fps']} FPS: "
+              f"{probe.status_text()}")
+
+
+if __name__ == "__main__":
+    main()
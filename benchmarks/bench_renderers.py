@@ -0,0 +1,55 @@
+"""Coste por frame del backend raster, sin pantalla.
+
+Uso: python -m benchmarks.bench_renderers
+
+El coste crece con el número de formas (área de los círculos y partículas),
+no solo con el tamaño del frame: la columna por forma lo muestra.
+"""
+import time
+
+import numpy as np
+
+from engine.particles import ParticleSystem
+from engine.renderers import RasterRenderer
+
+
+def make_shape(particles, size):
+    # Forma tipo noise_sphere: círculo, resplandores y 50 nubes de partículas
+    prims = [('oval', 0, 0, size, '#3366cc', '', 1, 1.0)]
+    for i in range(3):
+        prims.append(('oval', 0, 0, size * (1 + i * 0.3), '#3366cc', '', 1, 0.3 - i * 0.1))
+    xs, ys, sizes = particles.sphere(0, 0, size, 50, (2, 6))
+    for coords in particles.clusters(xs, ys, sizes, 20, 0.5):
+        prims.append(('points', coords, '#3366cc', 0.5))
+    return prims
+
+
+def bench(width, height, shapes, frames=30):
+    particles = ParticleSystem(seed=0)
+    rng = np.random.default_rng(0)
+    renderer = RasterRenderer(width, height)
+    for key in range(shapes):
+        renderer.add(key, rng.uniform(0, width), rng.uniform(0, height), make_shape(particles, 20))
+
+    keys = list(range(shapes))
+    xs = rng.uniform(0, width, shapes).tolist()
+    ys = rng.uniform(0, height, shapes).tolist()
+    scales = [1.0] * shapes
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        renderer.update(keys, xs, ys, scales)
+        renderer.present()
+        renderer.frame()
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    for width, height in ((400, 300), (800, 600), (1600, 1200)):
+        for shapes in (15, 60, 240):
+            ms = bench(width, height, shapes) * 1e3
+            print(f"{width}x{height} {shapes:4d} formas: {ms:7.2f} ms/frame  {ms / shapes * 1e3:6.0f} µs por forma")
+
+
+if __name__ == "__main__":
+    main()
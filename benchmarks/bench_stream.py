@@ -0,0 +1,100 @@
+"""Coste de publicar un frame con N clientes conectados, uno de ellos parado.
+
+Uso: python -m benchmarks.bench_stream [--frames 20000]
+
+Publica frames mono con bandas tan rápido como puede a clientes locales que
+leen en su propio hilo más uno que nunca lee: el coste de ``publish`` no
+debe depender de él. Como se publica sin pausa y los lectores comparten el
+GIL con el bucle, también ellos descartan algunos frames, cada uno por su cuenta.
+
+Antes mide el saludo: un cliente conecta con un servidor que no publica
+(en pausa) y lo recibe igual, y contra un puerto que acepta pero nunca
+saluda ``start`` falla al agotar su plazo en lugar de bloquear.
+"""
+import argparse
+import socket
+import threading
+import time
+
+import numpy as np
+
+from engine.onsets import Rhythm
+from engine.stream import FeatureClient, FeatureServer
+
+INFO = dict(rate=44100, hop=512, channels=None, bands=24, fps=60)
+
+
+def run(clients, frames):
+    server = FeatureServer(('127.0.0.1', 0), INFO)
+    server.start()
+    address = server.sock.getsockname()
+    # Buffer de recepción mínimo para que el parado se llene enseguida
+    stalled = socket.socket()
+    stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    stalled.connect(address)
+    readers = [FeatureClient(address) for _ in range(clients)]
+    threads = [threading.Thread(target=reader.start) for reader in readers]
+    for thread in threads:
+        thread.start()
+    # El saludo llega al conectar: sin publicar nada todavía
+    for thread in threads:
+        thread.join()
+    while len(server.clients) < clients + 1:
+        time.sleep(0.01)
+    rhythm = Rhythm(np.ones(24), 0.1, 1, 0, 120.0)
+
+    costs = np.empty(frames)
+    for i in range(frames):
+        start = time.perf_counter()
+        server.publish((1.0, 440.0), rhythm)
+        costs[i] = time.perf_counter() - start
+    time.sleep(0.2)
+    dropped = {client.address: client.dropped for client in server.clients}
+    stalled_dropped = dropped.pop(stalled.getsockname())
+    received = min(reader.received for reader in readers)
+    for reader in readers:
+        reader.stop()
+    stalled.close()
+    server.stop()
+    return costs * 1e6, stalled_dropped, max(dropped.values()), received
+
+
+def handshake(timeout=0.5):
+    """Segundos hasta el saludo con un servidor en pausa y hasta el error con uno mudo"""
+    server = FeatureServer(('127.0.0.1', 0), INFO)
+    server.start()
+    client = FeatureClient(server.sock.getsockname(), timeout=timeout)
+    start = time.perf_counter()
+    client.start()
+    paused = time.perf_counter() - start
+    client.stop()
+    server.stop()
+
+    mute = socket.create_server(('127.0.0.1', 0))  # Acepta conexiones pero nunca saluda
+    client = FeatureClient(mute.getsockname(), timeout=timeout)
+    start = time.perf_counter()
+    try:
+        client.start()
+    except TimeoutError:
+        pass
+    silent = time.perf_counter() - start
+    mute.close()
+    return paused, silent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coste de publicar frames a varios clientes")
+    parser.add_argument('--frames', type=int, default=20000, help="Frames publicados por configuración")
+    args = parser.parse_args(argv)
+    paused, silent = handshake()
+    print(f"saludo de un servidor en pausa: {paused * 1e3:.1f} ms  "
+          f"servidor mudo: error a los {silent:.2f} s (plazo 0.5 s)")
+    for clients in (1, 4, 16):
+        costs, stalled, dropped, received = run(clients, args.frames)
+        print(f"{clients:2d} clientes + 1 parado: publish {np.median(costs):6.1f} µs p50 "
+              f"{np.percentile(costs, 99):6.1f} p99  descartados: parado {stalled}, resto {dropped}  "
+              f"recibidos {received}/{args.frames}")
+
+
+if __name__ == "__main__":
+    main()
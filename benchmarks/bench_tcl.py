@@ -0,0 +1,280 @@
+"""Llamadas a Tcl por frame del renderer de canvas, con y sin ``CommandBuffer``.
+
+Uso: python -m benchmarks.bench_tcl [--seconds 20] [--signal speech]
+
+Sin pantalla no hay canvas de Tk, pero sí intérprete de Tcl: ``TclCanvas``
+envía cada llamada a Tcl como lo haría ``tkinter.Canvas``, a un comando
+que solo registra la orden y devuelve IDs al crear. Así se mide el coste
+real de cada ida y vuelta a Tcl (no el dibujo de Tk). Para comprobar que
+el lote dibuja lo mismo, ``visible_items`` reproduce cada registro sobre un
+canvas mínimo y compara los items visibles en orden de apilamiento.
+
+El tiempo del frame se separa en lo que pasa dentro de ``tk.call`` (Tcl) y
+el resto (Python), que es lo que añade el buffer a cambio de ahorrar
+llamadas. Las escenas casi nunca repiten una orden sobre el mismo item en
+un frame, así que ``interleaved`` prueba además la fusión con secuencias
+aleatorias de órdenes intercaladas sobre items y tags que se solapan.
+"""
+import argparse
+import time
+import tkinter
+
+import numpy as np
+
+from benchmarks.signals import RATE, SIGNALS
+from engine.analysis import AudioAnalysis
+from engine.scene import CommandBuffer
+from engine.scenes import load_scene
+
+WIDTH, HEIGHT = 800, 600
+TICK = 0.05
+
+# Canvas falso en Tcl: anota cada orden (ya convertida a texto) y numera los items creados
+CANVAS_PROC = """
+set log {}
+set id 0
+proc .c {op args} {
+    lappend ::log [list $op {*}$args]
+    if {$op eq "create"} { return [incr ::id] }
+    return ""
+}
+"""
+
+
+class TimedTk:
+    """Intérprete que acumula el tiempo pasado dentro de ``call``"""
+
+    def __init__(self, tk):
+        self._tk = tk
+        self.seconds = 0.0
+
+    def call(self, *args):
+        start = time.perf_counter()
+        try:
+            return self._tk.call(*args)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+    def __getattr__(self, name):
+        return getattr(self._tk, name)
+
+
+class TclCanvas:
+    """Los métodos de ``tkinter.Canvas`` que usa el renderer, contra un intérprete de Tcl"""
+
+    def __init__(self, width=WIDTH, height=HEIGHT):
+        self.tk = TimedTk(tkinter.Tcl().tk)
+        self.tk.eval(CANVAS_PROC)
+        self.width = width
+        self.height = height
+        self.round_trips = 0
+
+    def __str__(self):
+        return '.c'
+
+    def _call(self, *args):
+        self.round_trips += 1
+        return self.tk.call('.c', *args)
+
+    @staticmethod
+    def _options(options):
+        # Como ``Misc._options``: las opciones a None no se envían
+        words = ()
+        for key, value in options.items():
+            if value is not None:
+                words += ('-' + key, value)
+        return words
+
+    def _create(self, kind, coords, options):
+        return int(self._call('create', kind, *coords, *self._options(options)))
+
+    def create_oval(self, *coords, **options):
+        return self._create('oval', coords, options)
+
+    def create_polygon(self, *coords, **options):
+        return self._create('polygon', coords, options)
+
+    def create_line(self, *coords, **options):
+        return self._create('line', coords, options)
+
+    def coords(self, item, *coords):
+        if len(coords) == 1 and isinstance(coords[0], (list, tuple)):
+            coords = coords[0]
+        return self._call('coords', item, *coords)
+
+    def itemconfig(self, tag_or_id, **options):
+        self._call('itemconfigure', tag_or_id, *self._options(options))
+
+    def move(self, tag_or_id, dx, dy):
+        self._call('move', tag_or_id, dx, dy)
+
+    def scale(self, tag_or_id, x, y, sx, sy):
+        self._call('scale', tag_or_id, x, y, sx, sy)
+
+    def tag_raise(self, tag_or_id, above=None):
+        self._call('raise', tag_or_id, *(() if above is None else (above,)))
+
+    def tag_lower(self, tag_or_id, below=None):
+        self._call('lower', tag_or_id, *(() if below is None else (below,)))
+
+    def delete(self, tag_or_id):
+        self._call('delete', tag_or_id)
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def log(self):
+        """Órdenes recibidas por el canvas, normalizadas por Tcl"""
+        return self.tk.splitlist(self.tk.eval('set log'))
+
+
+def visible_items(tk, log):
+    """Items visibles (tipo, coordenadas, opciones) de abajo arriba tras aplicar ``log``"""
+    items, order = {}, []
+
+    def targets(tag_or_id):
+        if tag_or_id.isdigit():
+            return [int(tag_or_id)] if int(tag_or_id) in items else []
+        return [item for item in order if tag_or_id in items[item]['tags']]
+
+    def configure(item, words):
+        for key, value in zip(words[::2], words[1::2]):
+            if key == '-tags':
+                item['tags'] = set(tk.splitlist(value))
+            else:
+                item['options'][key] = value
+
+    next_id = 0
+    for command in log:
+        op, *words = tk.splitlist(command)
+        if op == 'create':
+            next_id += 1
+            split = next((i for i, w in enumerate(words) if w.startswith('-')), len(words))
+            items[next_id] = dict(kind=words[0], coords=np.array(words[1:split], dtype=float),
+                                  options={}, tags=set())
+            configure(items[next_id], words[split:])
+            order.append(next_id)
+            continue
+        selected = targets(words[0])
+        for item in selected:
+            entry = items[item]
+            if op == 'coords':
+                entry['coords'] = np.array(words[1:], dtype=float)
+            elif op == 'itemconfigure':
+                configure(entry, words[1:])
+            elif op == 'move':
+                offset = np.array(words[1:3], dtype=float)
+                entry['coords'] = (entry['coords'].reshape(-1, 2) + offset).ravel()
+            elif op == 'scale':
+                x, y, sx, sy = map(float, words[1:5])
+                points = entry['coords'].reshape(-1, 2)
+                entry['coords'] = ((points - (x, y)) * (sx, sy) + (x, y)).ravel()
+            elif op == 'delete':
+                del items[item]
+                order.remove(item)
+        if op in ('raise', 'lower') and selected:
+            # Los items seleccionados conservan su orden relativo
+            rest = [item for item in order if item not in selected]
+            order[:] = rest + selected if op == 'raise' else selected + rest
+    visible = []
+    for item in order:
+        options = dict(items[item]['options'])
+        if options.pop('-state', 'normal') == 'normal':
+            visible.append((items[item]['kind'], tuple(np.round(items[item]['coords'], 6)),
+                            tuple(sorted(options.items()))))
+    return visible
+
+
+def run(scene_name, batch, signal, seed=0):
+    scene_class = load_scene(scene_name)
+    canvas = TclCanvas()
+    renderer = scene_class.create_renderer('canvas', canvas, WIDTH, HEIGHT)
+    if not batch:
+        renderer = type(renderer)(canvas, stamp_budget=renderer.scene.budget,
+                                  stamp_lifetime=renderer.scene.max_age, batch=False)
+        if scene_name == 'forms':
+            renderer.preallocate(ovals=64, polygons=256, lines=128)
+    scene = scene_class(renderer, seed=seed)
+    analysis = AudioAnalysis(RATE, 1024)
+    hop = int(RATE * TICK)
+    commands = renderer.commands
+    trips, times, tcl = [], [], []
+    for i in range(len(signal) // hop):
+        analysis.process(signal[i * hop:(i + 1) * hop])
+        features = analysis.features()
+        rhythm = analysis.rhythm()
+        before = commands.round_trips if batch else canvas.round_trips
+        tcl_before = canvas.tk.seconds
+        start = time.perf_counter()
+        if features is not None:
+            scene.react(features[0], features[1], rhythm, i * TICK, WIDTH, HEIGHT)
+        scene.move_shapes(i * TICK, WIDTH, HEIGHT)
+        renderer.present()
+        times.append(time.perf_counter() - start)
+        tcl.append(canvas.tk.seconds - tcl_before)
+        trips.append((commands.round_trips if batch else canvas.round_trips) - before)
+    times, tcl = np.array(times) * 1e6, np.array(tcl) * 1e6
+    return np.array(trips), times, times - tcl, visible_items(canvas.tk, canvas.log())
+
+
+def interleaved(seed, frames=300, items=12, tags=3, per_frame=40):
+    """Órdenes aleatorias intercaladas, directas y con ``CommandBuffer``.
+
+    Devuelve (órdenes fusionadas, si el resultado visible coincide).
+    """
+    logs, merged = [], 0
+    for batch in (False, True):
+        rng = np.random.default_rng(seed)
+        canvas = TclCanvas()
+        target = CommandBuffer(canvas) if batch else canvas
+        ids = [canvas.create_oval(0, 0, 10, 10, fill='#000000', tags=(f't{k % tags}',)) for k in range(items)]
+        for _ in range(frames):
+            for _ in range(per_frame):
+                item = str(ids[rng.integers(items)]) if rng.random() < 0.7 else f't{rng.integers(tags)}'
+                kind = rng.integers(8)
+                if kind < 3:
+                    target.move(item, float(rng.integers(-3, 4)), float(rng.integers(-3, 4)))
+                elif kind == 3 and item.isdigit():
+                    target.coords(item, *rng.integers(0, 100, 4).tolist())
+                elif kind == 4:
+                    target.itemconfig(item, fill=f'#{rng.integers(1 << 24):06x}')
+                elif kind == 5 and item.isdigit():
+                    target.itemconfig(item, tags=(f't{rng.integers(tags)}',))
+                elif kind == 6:
+                    target.tag_raise(item)
+                else:
+                    target.scale(item, 50, 50, 1.1, 0.9)
+            if batch:
+                target.end_frame()
+        if batch:
+            merged = target.coalesced
+        logs.append(visible_items(canvas.tk, canvas.log()))
+    return merged, logs[0] == logs[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Llamadas a Tcl por frame con y sin lotes")
+    parser.add_argument('--seconds', type=float, default=20.0, help="Duración de la señal")
+    parser.add_argument('--signal', choices=list(SIGNALS), default='speech', help="Señal de prueba")
+    args = parser.parse_args(argv)
+    signal = SIGNALS[args.signal](args.seconds)
+    for scene_name in ('forms', 'strokes'):
+        results = {batch: run(scene_name, batch, signal) for batch in (False, True)}
+        for batch, (trips, times, python, _) in results.items():
+            print(f"{scene_name:<8} {'lotes' if batch else 'directo':<8} llamadas/frame {trips.mean():6.1f} media "
+                  f"{trips.max():4d} máx  tiempo del frame {np.median(times):7.1f} µs p50 "
+                  f"{np.percentile(times, 99):8.1f} p99  Python {np.median(python):6.1f} µs p50")
+        same = results[False][3] == results[True][3]
+        print(f"{scene_name:<8} mismo resultado visible: {'sí' if same else 'no'} "
+              f"({len(results[False][3])} items visibles)")
+    for seed in range(3):
+        merged, same = interleaved(seed)
+        print(f"intercaladas (semilla {seed}): {merged} órdenes fusionadas, "
+              f"mismo resultado visible: {'sí' if same else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Canvas de Tk simulado para medir sin pantalla (ni Xvfb).
+
+Implementa solo los métodos que usan scene.py, renderers.py e
+instrumentation.py. Las operaciones son O(1) y no calculan geometría: las
+medidas reflejan el coste del lado de Python, y ``calls`` cuenta cuántos
+comandos llegarían a Tcl. Cada lote de un ``CommandBuffer`` (``tk.call``)
+cuenta como una llamada (``batch``) y sus órdenes van a ``batched``; no se
+aplican a los items, salvo las creaciones en lote.
+"""
+from collections import Counter
+
+
+class FakeTk:
+    """Intérprete simulado: solo los procedimientos de lote de ``CommandBuffer``"""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+
+    def eval(self, script):
+        return ''
+
+    def call(self, command, path, *args):
+        calls = self.canvas.calls
+        calls['batch'] += 1
+        if command == '::audio_forms::create':
+            count, kind = args[:2]
+            calls['batched'] += count
+            return tuple(self.canvas._new_item(kind, (), {}) for _ in range(count))
+        calls['batched'] += len(args[0])
+        return ''
+
+    @staticmethod
+    def splitlist(value):
+        return value if isinstance(value, tuple) else tuple(value.split())
+
+
+class FakeCanvas:
+    def __init__(self, width=800, height=600):
+        self.width = width
+        self.height = height
+        self.items = {}  # id -> [tipo, coords, opciones]
+        self.tags = {}  # tag -> ids
+        self.calls = Counter()
+        self.tk = FakeTk(self)
+        self._next_id = 1
+
+    def __str__(self):
+        return '.fake'
+
+    def _create(self, kind, coords, options):
+        self.calls['create_' + kind] += 1
+        return self._new_item(kind, coords, options)
+
+    def _new_item(self, kind, coords, options):
+        item = self._next_id
+        self._next_id += 1
+        self.items[item] = [kind, coords, options]
+        for tag in options.get('tags', ()):
+            self.tags.setdefault(tag, set()).add(item)
+        return item
+
+    def create_oval(self, *coords, **options):
+        return self._create('oval', coords, options)
+
+    def create_polygon(self, *coords, **options):
+        return self._create('polygon', coords, options)
+
+    def create_line(self, *coords, **options):
+        return self._create('line', coords, options)
+
+    def create_rectangle(self, *coords, **options):
+        return self._create('rectangle', coords, options)
+
+    def create_text(self, *coords, **options):
+        return self._create('text', coords, options)
+
+    def create_image(self, *coords, **options):
+        return self._create('image', coords, options)
+
+    def _ids(self, tag_or_id):
+        if isinstance(tag_or_id, int):
+            return (tag_or_id,)
+        return tuple(self.tags.get(tag_or_id, ()))
+
+    def coords(self, item, *coords):
+        self.calls['coords'] += 1
+        if coords:
+            self.items[item][1] = coords
+        return self.items[item][1]
+
+    def itemconfig(self, tag_or_id, **options):
+        self.calls['itemconfig'] += 1
+        tags = options.get('tags')
+        for item in self._ids(tag_or_id):
+            entry = self.items[item]
+            if tags is not None:
+                for tag in entry[2].get('tags', ()):
+                    self.tags.get(tag, set()).discard(item)
+                for tag in tags:
+                    self.tags.setdefault(tag, set()).add(item)
+            entry[2].update(options)
+
+    def move(self, tag_or_id, dx, dy):
+        self.calls['move'] += 1
+
+    def scale(self, tag_or_id, x, y, sx, sy):
+        self.calls['scale'] += 1
+
+    def tag_raise(self, tag_or_id, above=None):
+        self.calls['tag_raise'] += 1
+
+    def tag_lower(self, tag_or_id, below=None):
+        self.calls['tag_lower'] += 1
+
+    def delete(self, tag_or_id):
+        self.calls['delete'] += 1
+        ids = list(self.items) if tag_or_id == 'all' else self._ids(tag_or_id)
+        for item in ids:
+            kind, coords, options = self.items.pop(item)
+            for tag in options.get('tags', ()):
+                self.tags.get(tag, set()).discard(item)
+
+    def find_all(self):
+        self.calls['find_all'] += 1
+        return tuple(self.items)
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def update_idletasks(self):
+        self.calls['update_idletasks'] += 1
@@ -0,0 +1,61 @@
+"""Señales sintéticas reproducibles para las pruebas de rendimiento (escala int16)"""
+import numpy as np
+
+RATE = 44100
+
+
+def tone(seconds, freq=440.0, amplitude=8000, rate=RATE):
+    t = np.arange(int(seconds * rate)) / rate
+    return amplitude * np.sin(2 * np.pi * freq * t)
+
+
+def chirp(seconds, f0=200.0, f1=4000.0, amplitude=8000, rate=RATE):
+    """Barrido exponencial de f0 a f1"""
+    t = np.arange(int(seconds * rate)) / rate
+    k = (f1 / f0) ** (1 / seconds)
+    phase = 2 * np.pi * f0 * (k ** t - 1) / np.log(k)
+    return amplitude * np.sin(phase)
+
+
+def noise(seconds, amplitude=3000, seed=0, rate=RATE):
+    return np.random.default_rng(seed).normal(0, amplitude, int(seconds * rate))
+
+
+def speech(seconds, seed=0, rate=RATE):
+    """Aproximación a la voz: vocales con tono glotal y formantes, separadas por pausas.
+
+    No sustituye a una grabación (``load_fixture``), pero tiene la envolvente
+    a ráfagas y el contenido en 300-3400 Hz que importan aquí.
+    """
+    rng = np.random.default_rng(seed)
+    out = np.zeros(int(seconds * rate))
+    formants = ((730, 1090), (270, 2290), (300, 870), (530, 1840), (660, 1720))
+    pos = 0
+    while pos < len(out):
+        length = int(rng.uniform(0.08, 0.3) * rate)
+        t = np.arange(min(length, len(out) - pos)) / rate
+        f0 = rng.uniform(100, 220)
+        f1, f2 = formants[rng.integers(len(formants))]
+        pulse = np.sign(np.sin(2 * np.pi * f0 * t))  # Tren glotal aproximado
+        voice = pulse * (0.6 * np.sin(2 * np.pi * f1 * t) + 0.4 * np.sin(2 * np.pi * f2 * t))
+        out[pos:pos + len(t)] = 6000 * voice * np.hanning(len(t))
+        pos += len(t) + int(rng.uniform(0.02, 0.15) * rate)
+    return out + rng.normal(0, 200, len(out))
+
+
+def load_fixture(path):
+    """Carga una grabación WAV mono en escala int16 como señal de prueba"""
+    from scipy.io import wavfile
+
+    from engine.audio_capture import to_int16_scale
+
+    rate, data = wavfile.read(path)
+    return rate, to_int16_scale(data)
+
+
+SIGNALS = {
+    'tone': tone,
+    'chirp': chirp,
+    'noise': noise,
+    'speech': speech,
+}
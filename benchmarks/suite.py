@@ -0,0 +1,306 @@
+"""Pruebas de rendimiento reproducibles del análisis y del render, sin micrófono ni pantalla.
+
+Uso:
+    python -m benchmarks.suite -o base.json
+    python -m benchmarks.suite --compare base.json --threshold 0.15
+    python -m benchmarks.suite --fixture voz.wav --only tick
+
+Cada caso se repite ``--iterations`` veces tras un calentamiento y se
+guardan p50, p99 y media por llamada más el rendimiento (muestras o
+llamadas por segundo). Con ``--compare`` el proceso termina con código 1 si
+algún caso empeora más que el umbral respecto al JSON de referencia, y
+también si la mediana de algún tick completo (``tick_*``) no cabe en un
+frame de la ventana (``--frame-budget``).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.fake_canvas import FakeCanvas
+from benchmarks.signals import RATE, SIGNALS, load_fixture
+from engine.analysis import AudioAnalysis
+from engine.scenes import load_scene
+
+BLOCK = 1024
+WIDTH, HEIGHT = 800, 600
+TICK = 0.05  # Ritmo de la ventana en vivo
+
+
+def blocks_of(signal, block=BLOCK):
+    n = len(signal) // block
+    return signal[:n * block].reshape(n, block)
+
+
+def measure(fn, iterations, warmup, budget=None, min_iterations=10):
+    """Tiempos (s) de hasta ``iterations`` llamadas a ``fn(i)`` tras ``warmup`` llamadas.
+
+    Con ``budget`` (segundos) se corta antes en los casos lentos, siempre tras
+    al menos ``min_iterations`` llamadas medidas.
+    """
+    for i in range(warmup):
+        fn(i)
+    times = np.empty(iterations)
+    total = 0.0
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        fn(warmup + i)
+        times[i] = (time.perf_counter_ns() - start) * 1e-9
+        total += times[i]
+        if budget is not None and total > budget and i + 1 >= min_iterations:
+            return times[:i + 1]
+    return times
+
+
+def make_scene(kind, seed=0, scene='forms'):
+    """Escena con el renderer ``kind`` que usaría la ventana; devuelve también el canvas simulado"""
+    scene_class = load_scene(scene)
+    canvas = FakeCanvas(WIDTH, HEIGHT) if kind == 'canvas' else None
+    return scene_class(scene_class.create_renderer(kind, canvas, WIDTH, HEIGHT), seed=seed), canvas
+
+
+# Casos: cada uno devuelve (función por iteración, unidades por llamada, unidad, canvas o None)
+
+def case_bandpass(signal, rate):
+    analysis = AudioAnalysis(rate, BLOCK)
+    blocks = blocks_of(signal)
+    return (lambda i: analysis.bandpass_filter(blocks[i % len(blocks)])), BLOCK, 'muestras', None
+
+
+def case_fft(signal, rate):
+    analysis = AudioAnalysis(rate, BLOCK)
+    analyzer = analysis.analyzer
+    blocks = blocks_of(analysis.filter.process(signal))
+    return (lambda i: analyzer.push(blocks[i % len(blocks)])), BLOCK, 'muestras', None
+
+
+def case_multichannel(channels):
+    """Análisis completo de un tick con ``channels`` canales en un solo lote"""
+    def build(signal, rate):
+        analysis = AudioAnalysis(rate, BLOCK, channels=channels)
+        hop = int(rate * TICK)
+        n = len(signal) // hop - 1
+        # Cada canal es la misma señal desplazada, para que no sean idénticos
+        shifts = np.arange(channels) * (hop // channels)
+        frames = np.stack([signal[s:s + n * hop] for s in shifts], axis=1)
+
+        def run(i):
+            analysis.process(frames[(i % n) * hop:(i % n + 1) * hop])
+            analysis.features()
+        return run, hop * channels, 'muestras', None
+    return build
+
+
+def case_particle_effect(signal, rate):
+    scene, _ = make_scene('canvas')
+    prims = []
+
+    def run(i):
+        prims.clear()
+        scene.create_particle_effect(prims, 0, 0, 40, '#3366cc')
+    return run, 1, 'llamadas', None
+
+
+def case_glowing_circle(signal, rate):
+    scene, _ = make_scene('canvas')
+    prims = []
+
+    def run(i):
+        prims.clear()
+        scene.create_glowing_circle(prims, 0, 0, 40, scene.primary_palette, 220)
+    return run, 1, 'llamadas', None
+
+
+def populated_scene(kind, shapes=15):
+    scene, canvas = make_scene(kind)
+    for k in range(shapes):
+        scene.spawn_shape(2000 + 100 * k, 300 + 200 * k, 0.0, WIDTH, HEIGHT)
+    return scene, canvas
+
+
+def case_move_shapes(kind):
+    def build(signal, rate):
+        scene, canvas = populated_scene(kind)
+        renderer = scene.renderer
+        # Tiempo virtual fijo para que ninguna forma caduque durante la medida
+        return (lambda i: (scene.move_shapes(0.0, WIDTH, HEIGHT), renderer.present())), 1, 'llamadas', canvas
+    return build
+
+
+def case_tick(kind, scene='forms'):
+    """Tick completo de update_visualization: análisis, creación, movimiento y presentación"""
+    def build(signal, rate):
+        analysis = AudioAnalysis(rate, BLOCK)
+        scene_obj, canvas = make_scene(kind, scene=scene)
+        renderer = scene_obj.renderer
+        hop = int(rate * TICK)
+        n = len(signal) // hop
+
+        def run(i):
+            analysis.process(signal[(i % n) * hop:(i % n + 1) * hop])
+            features = analysis.features()
+            rhythm = analysis.rhythm()
+            now = i * TICK
+            if features is not None:
+                level, dominant_freq = features
+                scene_obj.react(level, dominant_freq, rhythm, now, WIDTH, HEIGHT)
+            scene_obj.move_shapes(now, WIDTH, HEIGHT)
+            renderer.present()
+        return run, 1, 'ticks', canvas
+    return build
+
+
+AUDIO_CASES = {
+    'bandpass_filter': case_bandpass,
+    'fft': case_fft,
+    'tick_canvas': case_tick('canvas'),
+    'tick_raster': case_tick('raster'),
+    'tick_strokes_canvas': case_tick('canvas', 'strokes'),
+    'tick_strokes_raster': case_tick('raster', 'strokes'),
+    'analysis_16ch': case_multichannel(16),
+}
+RENDER_CASES = {
+    'create_particle_effect': case_particle_effect,
+    'create_glowing_circle': case_glowing_circle,
+    'move_shapes_canvas': case_move_shapes('canvas'),
+    'move_shapes_raster': case_move_shapes('raster'),
+}
+
+
+def run_case(build, signal, rate, iterations, warmup, budget=None):
+    fn, units, unit, canvas = build(signal, rate)
+    times = measure(fn, iterations, warmup, budget)
+    result = {
+        'iterations': len(times),
+        'p50_us': float(np.percentile(times, 50) * 1e6),
+        'p99_us': float(np.percentile(times, 99) * 1e6),
+        'mean_us': float(times.mean() * 1e6),
+        'throughput': float(units / times.mean()),
+        'unit': f'{unit}/s',
+    }
+    if canvas is not None:
+        # Llamadas a Tcl: un lote cuenta una vez, no por cada orden que lleva
+        calls = sum(canvas.calls.values()) - canvas.calls['batched']
+        result['tk_calls_per_call'] = calls / (len(times) + warmup)
+    return result
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import scipy
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'cpus': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def run_suite(signals, rate, iterations, warmup, only=None, budget=None):
+    results = {}
+    for name, build in AUDIO_CASES.items():
+        for signal_name, signal in signals.items():
+            key = f'{name}[{signal_name}]'
+            if only and not any(o in key for o in only):
+                continue
+            results[key] = run_case(build, signal, rate, iterations, warmup, budget)
+            print_result(key, results[key])
+    for name, build in RENDER_CASES.items():
+        if only and not any(o in name for o in only):
+            continue
+        results[name] = run_case(build, None, rate, iterations, warmup, budget)
+        print_result(name, results[name])
+    return results
+
+
+def print_result(key, r):
+    print(f"{key:<36} p50 {r['p50_us']:10.1f} us  p99 {r['p99_us']:10.1f} us  "
+          f"{r['throughput']:12.0f} {r['unit']}", file=sys.stderr)
+
+
+def compare(results, baseline, threshold, metric='p50_us'):
+    """Lista de ``(caso, referencia, actual, cambio)`` que empeoran más que ``threshold``"""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None or base[metric] <= 0:
+            continue
+        change = current[metric] / base[metric] - 1
+        flag = 'REGRESIÓN' if change > threshold else ''
+        print(f"{key:<36} {base[metric]:10.1f} -> {current[metric]:10.1f} us  {change:+7.1%} {flag}",
+              file=sys.stderr)
+        if change > threshold:
+            regressions.append((key, base[metric], current[metric], change))
+    return regressions
+
+
+def over_budget(results, budget, metric='p50_us'):
+    """Ticks completos cuyo ``metric`` supera ``budget`` segundos: ``(caso, tiempo en us)``"""
+    slow = [(key, r[metric]) for key, r in results.items()
+            if key.startswith('tick_') and r[metric] > budget * 1e6]
+    for key, value in slow:
+        print(f"{key:<36} {value:10.1f} us  no cabe en un frame ({budget * 1e3:.0f} ms)", file=sys.stderr)
+    return slow
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento del análisis y del render")
+    parser.add_argument('-o', '--output', help="Guardar los resultados en este JSON")
+    parser.add_argument('--compare', metavar='JSON', help="Resultados de referencia a comparar")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Empeoramiento relativo tolerado con --compare (0.10 = 10%%)")
+    parser.add_argument('--metric', choices=['p50_us', 'p99_us', 'mean_us'], default='p50_us')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--budget', type=float, default=3.0,
+                        help="Segundos máximos medidos por caso (los casos lentos hacen menos iteraciones)")
+    parser.add_argument('--frame-budget', type=float, default=TICK,
+                        help="Segundos por frame que debe respetar la mediana de cada tick (0 = sin límite)")
+    parser.add_argument('--seconds', type=float, default=5.0, help="Duración de las señales sintéticas")
+    parser.add_argument('--fixture', action='append', default=[],
+                        help="WAV con una grabación (p. ej. voz) a añadir a las señales")
+    parser.add_argument('--only', action='append', help="Ejecutar solo los casos que contengan este texto")
+    args = parser.parse_args(argv)
+
+    rate = RATE
+    signals = {name: make(args.seconds) for name, make in SIGNALS.items()}
+    for path in args.fixture:
+        fixture_rate, data = load_fixture(path)
+        if fixture_rate != rate:
+            parser.error(f"{path}: se esperaba {rate} Hz, tiene {fixture_rate} Hz")
+        signals[os.path.splitext(os.path.basename(path))[0]] = data
+
+    results = run_suite(signals, rate, args.iterations, args.warmup, args.only, args.budget)
+    report = {'meta': metadata(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    status = 0
+    if args.frame_budget > 0 and over_budget(results, args.frame_budget):
+        status = 1
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.metric)
+        if regressions:
+            print(f"{len(regressions)} caso(s) empeoran más de {args.threshold:.0%}", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
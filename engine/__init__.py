@@ -0,0 +1,6 @@
+"""Núcleo del visualizador: captura, análisis, escenas y renderers.
+
+Los módulos no importan nada pesado al cargarse: scipy se carga al crear el
+primer filtro, PyAudio al abrir un micrófono y Tk solo desde ``engine.app``
+o al presentar un framebuffer en pantalla.
+"""
@@ -0,0 +1,3 @@
+from engine.app import main
+
+main()
@@ -0,0 +1,111 @@
+"""Cadena de análisis de audio compartida por la interfaz y el render offline"""
+import numpy as np
+
+from engine.audio_capture import RingBuffer
+from engine.bandpass import BandpassFilter
+from engine.instrumentation import NULL_PROFILER
+from engine.onsets import OnsetDetector
+from engine.spectral import SpectralAnalyzer
+
+
+class AudioAnalysis:
+    """Filtro pasa banda continuo, FFT con solapamiento y nivel de la última ventana.
+
+    ``process`` recibe todas las muestras nuevas en orden; ``features`` devuelve
+    ``(nivel, frecuencia dominante)`` de la ventana más reciente, o None si aún
+    no hay una ventana completa. ``low_freq``/``high_freq`` se pueden cambiar en
+    caliente. Con un ``profiler`` se miden por separado las etapas ``filter`` y
+    ``fft``.
+
+    Cada análisis de la FFT pasa por un banco de filtros ``scale`` de
+    ``bands`` bandas y alimenta un ``OnsetDetector``; ``rhythm`` devuelve las
+    energías suavizadas, el flujo, los ataques y pulsos desde la llamada
+    anterior y el tempo. El banco se fija con el rango inicial.
+
+    Con ``channels`` las muestras llegan como (muestras, canales), el filtro y
+    la FFT procesan todos los canales en un solo lote y ``features`` devuelve
+    arrays con un nivel y una frecuencia por canal.
+    """
+
+    def __init__(self, rate=44100, block_size=1024, low_freq=300, high_freq=3400, order=6,
+                 frame_size=2048, hop=512, profiler=None, channels=None, scale='mel', bands=24):
+        self.rate = rate
+        self.block_size = block_size
+        self.low_freq = low_freq
+        self.high_freq = high_freq
+        self.order = order
+        self.frame_size = frame_size
+        self.hop = hop
+        self.scale = scale
+        self.bands = bands
+        self.channels = channels
+        self.profiler = profiler or NULL_PROFILER
+
+        # Filtro con coeficientes cacheados y estado continuo entre bloques
+        self.filter = BandpassFilter(low_freq, high_freq, rate, order=order)
+        self.filtered = RingBuffer(block_size * 4, dtype=np.float64, channels=channels)
+        self.window = np.empty((block_size,) + self.filtered.shape[1:])
+
+        # FFT real con solapamiento (por defecto 2048 puntos y salto de 512), bandas y ataques
+        self.analyzer = SpectralAnalyzer(rate, frame_size=frame_size, hop=hop,
+                                         fmin=low_freq, fmax=high_freq, channels=channels,
+                                         scale=scale, bands=bands)
+        self.detector = OnsetDetector(rate / hop, len(self.analyzer.band_energies), channels=channels)
+        self.analyzer.detector = self.detector
+
+    @property
+    def memory(self):
+        """Segundos de audio anterior que siguen influyendo en el análisis (detector de ritmo)"""
+        return self.detector.memory
+
+    def params(self):
+        """Configuración que determina el resultado del análisis (p. ej. clave de una caché)"""
+        return dict(rate=self.rate, block_size=self.block_size, low_freq=self.low_freq,
+                    high_freq=self.high_freq, order=self.order, frame_size=self.frame_size, hop=self.hop,
+                    scale=self.scale, bands=self.bands, channels=self.channels)
+
+    def reset(self):
+        self.filter.reset()
+        self.filtered = RingBuffer(self.block_size * 4, dtype=np.float64, channels=self.channels)
+
+    def seek(self, sample_index):
+        """Reinicia el estado para arrancar en ``sample_index`` de un flujo.
+
+        Conserva la fase de los saltos de la FFT respecto al inicio del flujo,
+        de modo que tras unos segundos de calentamiento el análisis coincide
+        con el de haber procesado el flujo desde el principio.
+        """
+        self.reset()
+        self.analyzer.reset(phase=sample_index % self.analyzer.hop)
+        self.detector.reset(position=sample_index // self.analyzer.hop)
+
+    def bandpass_filter(self, data):
+        # El diseño solo se recalcula si cambia la banda; el estado zi se conserva
+        self.filter.configure(self.low_freq, self.high_freq, self.rate, self.order)
+        return self.filter.process(data)
+
+    def process(self, samples):
+        if len(samples) == 0:
+            return
+        with self.profiler.stage('filter'):
+            filtered = self.bandpass_filter(samples)
+            self.filtered.write(filtered)
+        with self.profiler.stage('fft'):
+            self.analyzer.set_range(self.low_freq, self.high_freq)
+            self.analyzer.push(filtered)
+
+    def features(self):
+        window = self.filtered.latest(self.block_size, self.window)
+        if window is None:
+            return None
+        level = np.abs(window).mean(axis=0)
+
+        # Frecuencia dominante interpolada dentro del rango de interés
+        if self.channels is not None:
+            return level, np.clip(self.analyzer.dominant_freq, self.low_freq, self.high_freq)
+        dominant_freq = min(max(self.analyzer.dominant_freq, self.low_freq), self.high_freq)
+        return level, dominant_freq
+
+    def rhythm(self):
+        """``Rhythm(bands, flux, onsets, beats, tempo)``; cuenta los ataques y pulsos una sola vez"""
+        return self.detector.take()
@@ -0,0 +1,348 @@
+"""Caché en disco del análisis de grabaciones: se analiza una vez y se reproduce sin DSP.
+
+Cada entrada es un directorio con una columna ``.npy`` por característica
+(una fila por frame de análisis) y un ``meta.json``. Las columnas se abren
+mapeadas en memoria, así que reproducir o saltar a cualquier punto solo lee
+las filas que se usan. La clave combina el hash del contenido del archivo,
+los parámetros del análisis (``AudioAnalysis.params``), la rejilla de frames
+y ``VERSION``. Al superar ``max_bytes`` se borran las entradas usadas hace
+más tiempo.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+from engine.audio_capture import to_int16_scale
+from engine.onsets import Rhythm
+
+# Subir al cambiar el análisis o el formato: las entradas anteriores dejan de coincidir
+VERSION = 1
+
+COLUMNS = ('end', 'level', 'dominant_freq', 'bands', 'flux', 'onsets', 'beats', 'tempo')
+
+
+def default_directory():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'audio_forms', 'analysis')
+
+
+class Cancelled(Exception):
+    """Análisis interrumpido con el evento ``cancel``"""
+
+
+def extract_features(analysis, data, frame_rate, directory, mix=True, cancel=None):
+    """Analiza ``data`` entero frame a frame y escribe las columnas en ``directory``.
+
+    El frame ``i`` termina en la muestra ``round((i + 1) * rate / frame_rate)``,
+    como en ``OfflineRenderer``, y guarda lo que devuelven ``features`` (NaN
+    si aún no hay ventana) y ``rhythm`` justo después. Devuelve las filas.
+    Si se activa el evento ``cancel`` lanza ``Cancelled``.
+    """
+    rate = analysis.rate
+    rows = int(len(data) * frame_rate / rate)
+    extra = () if analysis.channels is None else (analysis.channels,)
+
+    def column(name, dtype, shape=extra):
+        return np.lib.format.open_memmap(os.path.join(directory, name + '.npy'), mode='w+',
+                                         dtype=dtype, shape=(rows,) + shape)
+
+    end = column('end', np.int64, ())
+    level = column('level', np.float64)
+    dominant_freq = column('dominant_freq', np.float64)
+    bands = column('bands', np.float32, (analysis.bands,) + extra)
+    flux = column('flux', np.float32)
+    onsets = column('onsets', np.uint16)
+    beats = column('beats', np.uint16)
+    tempo = column('tempo', np.float32)
+
+    analysis.seek(0)
+    start = 0
+    for i in range(rows):
+        if cancel is not None and cancel.is_set():
+            raise Cancelled()
+        stop = int(round((i + 1) * rate / frame_rate))
+        analysis.process(to_int16_scale(data[start:stop], mix))
+        start = end[i] = stop
+        features = analysis.features()
+        if features is None:
+            level[i] = dominant_freq[i] = np.nan
+        else:
+            level[i], dominant_freq[i] = features
+        rhythm = analysis.rhythm()
+        bands[i] = rhythm.bands
+        flux[i] = rhythm.flux
+        onsets[i] = rhythm.onsets
+        beats[i] = rhythm.beats
+        tempo[i] = rhythm.tempo
+    for array in (end, level, dominant_freq, bands, flux, onsets, beats, tempo):
+        array.flush()
+    return rows
+
+
+class FeatureTable:
+    """Columnas de una entrada de la caché, mapeadas en memoria y de solo lectura"""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.rate = self.meta['params']['rate']
+        self.channels = self.meta['params']['channels']
+        self.samples = self.meta['samples']
+        self.columns = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r')
+                        for name in COLUMNS}
+
+    def __len__(self):
+        return self.meta['rows']
+
+
+class CachedAnalysis:
+    """Reproduce una ``FeatureTable`` con la interfaz de ``AudioAnalysis``.
+
+    ``process`` (o ``advance``, sin muestras) solo avanza la posición; ``features`` y ``rhythm`` leen la
+    última fila terminada antes de ella (en vivo, con un retraso de menos de
+    un frame de la tabla) y ``seek`` es inmediato. Con ``loop`` la posición
+    vuelve al principio al pasar del final del archivo.
+    """
+
+    memory = 0.0  # Cada fila ya tiene el estado del análisis en serie: nada que calentar
+
+    def __init__(self, table, loop=False):
+        self.table = table
+        self.rate = table.rate
+        self.channels = table.channels
+        self.loop = loop
+        self.columns = table.columns
+        self._end = table.columns['end']
+        self.position = 0
+        self._taken = -1  # Última fila contada por ``rhythm``
+
+    def reset(self):
+        self.seek(0)
+
+    def params(self):
+        return self.table.meta['params']
+
+    def seek(self, sample_index):
+        self.position = sample_index
+        self._taken = self._row()
+
+    def _row(self):
+        position = self.position % self.table.samples if self.loop else self.position
+        return int(np.searchsorted(self._end, position, side='right')) - 1
+
+    def process(self, samples):
+        self.advance(len(samples))
+
+    def advance(self, n):
+        self.position += n
+
+    def features(self):
+        row = self._row()
+        if row < 0:
+            return None
+        level = self.columns['level'][row]
+        dominant_freq = self.columns['dominant_freq'][row]
+        if self.channels is None:
+            return None if np.isnan(level) else (float(level), float(dominant_freq))
+        return None if np.isnan(level).any() else (np.array(level), np.array(dominant_freq))
+
+    def rhythm(self):
+        """``Rhythm`` de la fila actual con los ataques y pulsos de las filas desde la llamada anterior"""
+        row, taken = self._row(), self._taken
+        self._taken = row
+        columns = self.columns
+        if row < 0:
+            extra = () if self.channels is None else (self.channels,)
+            bands = np.zeros((self.table.meta['params']['bands'],) + extra)
+            onsets = beats = np.zeros(extra, dtype=int)
+            flux = tempo = np.zeros(extra)
+        else:
+            if row >= taken:
+                onsets = columns['onsets'][taken + 1:row + 1].sum(axis=0)
+                beats = columns['beats'][taken + 1:row + 1].sum(axis=0)
+            else:
+                # Dio la vuelta al final del archivo
+                onsets = columns['onsets'][taken + 1:].sum(axis=0) + columns['onsets'][:row + 1].sum(axis=0)
+                beats = columns['beats'][taken + 1:].sum(axis=0) + columns['beats'][:row + 1].sum(axis=0)
+            bands = np.array(columns['bands'][row], dtype=np.float64)
+            flux, tempo = columns['flux'][row], columns['tempo'][row]
+        if self.channels is None:
+            return Rhythm(bands, float(flux), int(onsets), int(beats), float(tempo))
+        return Rhythm(bands, np.array(flux, dtype=np.float64), np.array(onsets, dtype=int),
+                      np.array(beats, dtype=int), np.array(tempo, dtype=np.float64))
+
+
+class TableBuilder:
+    """``AnalysisCache.features`` en un hilo aparte, para no bloquear la ventana.
+
+    ``analysis`` tiene que ser una instancia propia: el hilo la deja al final
+    del archivo. Al terminar (``done``) ``table`` tiene la tabla, o ``error``
+    la excepción si no se pudo calcular. ``cancel`` interrumpe un análisis a
+    medias y espera al hilo.
+    """
+
+    def __init__(self, cache, path, data, analysis, frame_rate, mix=True):
+        self.table = None
+        self.error = None
+        self._cancel = threading.Event()
+        self.thread = threading.Thread(target=self._build, args=(cache, path, data, analysis, frame_rate, mix),
+                                       name='TableBuilder', daemon=True)
+        self.thread.start()
+
+    @property
+    def done(self):
+        return not self.thread.is_alive()
+
+    def _build(self, cache, path, data, analysis, frame_rate, mix):
+        try:
+            self.table = cache.features(path, data, analysis, frame_rate, mix, cancel=self._cancel)
+        except Cancelled:
+            pass
+        except Exception as e:
+            self.error = e
+
+    def cancel(self):
+        self._cancel.set()
+        self.thread.join()
+
+
+class AnalysisCache:
+    """Directorio de entradas de análisis con expulsión LRU por tamaño total"""
+
+    def __init__(self, directory=None, max_bytes=1 << 30):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+
+    def file_hash(self, path):
+        """Hash del contenido; se recuerda por (tamaño, mtime) para no releer archivos sin cambios"""
+        stat = os.stat(path)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        memo_path = os.path.join(self.directory, 'hashes.json')
+        memo = self._read_json(memo_path)
+        name = os.path.abspath(path)
+        if memo.get(name, [])[:2] == stamp:
+            return memo[name][2]
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        memo[name] = stamp + [digest.hexdigest()]
+        self._write_json(memo_path, memo)
+        return memo[name][2]
+
+    def key(self, path, params):
+        text = json.dumps({'version': VERSION, 'content': self.file_hash(path), 'params': params},
+                          sort_keys=True)
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def load(self, key):
+        """Entrada ``key`` o None; marca su uso para el LRU"""
+        entry = os.path.join(self.directory, key)
+        try:
+            table = FeatureTable(entry)
+            os.utime(os.path.join(entry, 'meta.json'))
+        except (OSError, ValueError, KeyError):
+            return None
+        return table
+
+    def features(self, path, data, analysis, frame_rate, mix=True, cancel=None):
+        """Tabla de ``data`` (el contenido de ``path``) con la configuración de ``analysis``.
+
+        Si no está en la caché se calcula con ``analysis`` (que queda al final
+        del archivo) y se guarda antes de devolverla. Con ``cancel`` activado
+        el cálculo se interrumpe (``Cancelled``) sin dejar nada en la caché.
+        """
+        params = dict(analysis.params(), frame_rate=frame_rate, mix=mix)
+        os.makedirs(self.directory, exist_ok=True)
+        key = self.key(path, params)
+        table = self.load(key)
+        if table is not None:
+            return table
+
+        # Se escribe en un directorio temporal y se publica con un rename atómico
+        tmp = tempfile.mkdtemp(prefix=f'.{key}-', dir=self.directory)
+        try:
+            rows = extract_features(analysis, data, frame_rate, tmp, mix, cancel)
+            size = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp))
+            meta = dict(version=VERSION, params=params, source=os.path.abspath(path), samples=len(data),
+                        rows=rows, bytes=size)
+            with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+                json.dump(meta, f, indent=2)
+            try:
+                os.rename(tmp, os.path.join(self.directory, key))
+            except OSError:
+                # Otro proceso guardó la misma entrada a la vez
+                shutil.rmtree(tmp, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.evict(keep=key)
+        return self.load(key)
+
+    def entries(self):
+        """``(último uso, bytes, clave)`` de cada entrada completa"""
+        result = []
+        if not os.path.isdir(self.directory):
+            return result
+        for key in os.listdir(self.directory):
+            meta_path = os.path.join(self.directory, key, 'meta.json')
+            if key.startswith('.') or not os.path.isfile(meta_path):
+                continue
+            meta = self._read_json(meta_path)
+            result.append((os.stat(meta_path).st_mtime_ns, meta.get('bytes', 0), key))
+        return result
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """Borra las entradas usadas hace más tiempo hasta quedar en ``max_bytes``"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_json(path, data):
+        # Escritura atómica: varios procesos de render pueden compartir la caché
+        fd, tmp = tempfile.mkstemp(prefix='.', dir=os.path.dirname(path))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+
+def add_cache_arguments(parser):
+    """Opciones de línea de comandos para reutilizar el análisis de archivos"""
+    parser.add_argument('--cache', action='store_true',
+                        help="Guardar el análisis de los archivos en disco y reproducirlo sin recalcularlo")
+    parser.add_argument('--cache-dir', default=None, metavar='DIR',
+                        help=f"Directorio de la caché (por defecto {default_directory()})")
+    parser.add_argument('--cache-size', type=float, default=1024, metavar='MB',
+                        help="Tamaño máximo de la caché; se borran primero las entradas usadas hace más tiempo")
+
+
+def cache_from_args(args):
+    if not (args.cache or args.cache_dir):
+        return None
+    return AnalysisCache(args.cache_dir, int(args.cache_size * (1 << 20)))
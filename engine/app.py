@@ -0,0 +1,426 @@
+"""Ventana de Tk común a todos los estilos: fuente de audio, análisis, escena y controles.
+
+Uso:
+    python Audio_Forms.py --source file:show.wav --cache
+    python clean.py --palette '#ff6347,#1e90ff,#ffd700'
+    python -m engine --scene strokes --renderer raster
+    python Audio_Forms.py --source signal:silence --low-latency --latency-probe lat.json --hud
+    python Audio_Forms.py --serve 9100          # y en cada pantalla:
+    python clean.py --source tcp:HOST:9100 --seed 7
+"""
+import argparse
+import sys
+import time
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+import numpy as np
+
+from engine.analysis_cache import CachedAnalysis, TableBuilder, add_cache_arguments, cache_from_args
+from engine.audio_sources import FileSource, add_source_arguments, open_source, source_options, uses_device
+from engine.instrumentation import CanvasHUD, Profiler
+from engine.latency import LatencyProbe
+from engine.onsets import SPAWN_MODES
+from engine.palette import parse_palette
+from engine.scenes import SCENES, ChannelLayout, load_scene
+from engine.scheduler import FrameScheduler, QualityGovernor
+from engine.stream import FeatureClient, FeatureServer, RemoteAnalysis, parse_address
+
+# Duración del tick para la que están pensadas las velocidades de las formas
+BASE_TICK = 0.05
+
+# Muestras de la ventana del nivel: se acumulan en el buffer aunque los bloques de captura sean menores
+LEVEL_WINDOW = 1024
+
+
+class AudioVisualizer:
+    def __init__(self, master, scene='forms', seed=None, renderer='canvas', hud=False, trace_path=None,
+                 fps=20, adaptive=True, spawn='onset', palette=None, cache=None, low_latency=False,
+                 latency_probe=None, serve=None, source='device', rate=44100, channels=1, block_size=1024, loop=False,
+                 speed=1.0, mix=True):
+        self.master = master
+        self.master.title("Visualizador de Audio")
+        self.is_running = False
+
+        # Fuente de audio (micrófono, archivo, señal o socket); PyAudio solo se carga si hace falta
+        self.p = None
+        self.capture = None
+        self.device_index = None
+        self.source_spec = source
+        self.source_options = dict(loop=loop, speed=speed, mix=mix)
+        self.rate = rate
+        self.channels = channels
+        self.block_size = block_size
+        self.last_stats = None
+
+        # Dimensiones de la ventana
+        self.width = 800
+        self.height = 600
+
+        # Interfaz gráfica
+        self.create_widgets()
+
+        # Tiempos por etapa; HUD opcional y traza exportada al cerrar
+        self.profiler = Profiler()
+        self.hud = CanvasHUD(self.canvas, self.profiler) if hud else None
+        self.trace_path = trace_path
+
+        # Rango de frecuencias de interés (voz humana)
+        self.low_freq = 300
+        self.high_freq = 3400
+
+        # Filtro pasa banda continuo, FFT con solapamiento y nivel; se crea al iniciar
+        # la fuente (con su frecuencia y bloque), así que scipy no se carga hasta entonces
+        self.analysis = None
+        self.cache = cache  # AnalysisCache opcional para las fuentes de archivo
+        self.table_builder = None  # Tabla del archivo en preparación, en su propio hilo
+        # En baja latencia la FFT se analiza cada 256 muestras (ataques antes, el doble de FFT)
+        self.hop = 256 if low_latency else 512
+
+        # Sonda de latencia opcional (clics sintéticos en la entrada); '' = sin archivo de salida
+        self.probe = None
+        self.probe_path = latency_probe
+
+        # Publicación opcional de cada frame analizado a clientes de render remotos
+        self.serve = serve
+        self.server = None
+        self.seed = seed
+
+        # Estilo visual intercambiable, independiente de Tk; el backend de dibujo también
+        scene_class = load_scene(scene)
+        self.scene = scene_class(scene_class.create_renderer(renderer, self.canvas, self.width, self.height),
+                                 seed=seed, low_freq=self.low_freq, high_freq=self.high_freq,
+                                 spawn_mode=spawn, palette=palette)
+        self.level_color = self.scene.level_color
+        self.renderer = self.scene.renderer
+
+        # Ticks con plazos monótonos al FPS objetivo; la calidad baja si no caben
+        self.scheduler = FrameScheduler(fps)
+        adaptive = adaptive and QualityGovernor.applies_to(self.scene)
+        self.governor = QualityGovernor(self.scene, self.scheduler.period) if adaptive else None
+        self.tick_dt = 1.0
+        self.layout = None  # Reparto del canvas por canal si el análisis no mezcla
+
+    def create_widgets(self):
+        # Frame principal
+        self.main_frame = tk.Frame(self.master)
+        self.main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # Canvas para visualización (80% de la altura)
+        self.canvas = tk.Canvas(self.main_frame, bg='white')
+        self.canvas.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+        # Frame para controles
+        self.control_frame = tk.Frame(self.main_frame)
+        self.control_frame.pack(side=tk.BOTTOM, fill=tk.X)
+
+        self.select_button = ttk.Button(self.control_frame, text="Seleccionar Micrófono", command=self.select_device)
+        self.select_button.pack(side=tk.LEFT, padx=5, pady=5)
+
+        self.start_button = ttk.Button(self.control_frame, text="Iniciar", command=self.start_stream)
+        self.start_button.pack(side=tk.LEFT, padx=5, pady=5)
+
+        self.stop_button = ttk.Button(self.control_frame, text="Detener", command=self.stop_stream)
+        self.stop_button.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Agregar botón de pantalla completa
+        self.fullscreen_button = ttk.Button(self.control_frame, text="Pantalla Completa", command=self.toggle_fullscreen)
+        self.fullscreen_button.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Barra de nivel de audio
+        self.level_canvas = tk.Canvas(self.control_frame, width=200, height=20, bg='white')
+        self.level_canvas.pack(side=tk.RIGHT, padx=5, pady=5)
+        # La barra se crea una vez y cada tick solo cambian sus coordenadas
+        self.level_bar = self.level_canvas.create_rectangle(0, 0, 0, 20)
+        self.level_fill = None
+
+        # Estado de la captura (desbordes y muestras perdidas)
+        self.status_label = ttk.Label(self.control_frame, text="")
+        self.status_label.pack(side=tk.RIGHT, padx=5, pady=5)
+
+    def get_pyaudio(self):
+        if self.p is None:
+            import pyaudio
+            self.p = pyaudio.PyAudio()
+        return self.p
+
+    def select_device(self):
+        devices = []
+        p = self.get_pyaudio()
+        for i in range(p.get_device_count()):
+            devices.append(p.get_device_info_by_index(i)['name'])
+
+        self.device_window = tk.Toplevel(self.master)
+        self.device_window.title("Seleccionar Dispositivo")
+
+        self.device_listbox = tk.Listbox(self.device_window)
+        for device in devices:
+            self.device_listbox.insert(tk.END, device)
+        self.device_listbox.pack()
+
+        select_btn = ttk.Button(self.device_window, text="Seleccionar", command=self.set_device)
+        select_btn.pack()
+
+    def set_device(self):
+        selection = self.device_listbox.curselection()
+        if selection:
+            self.device_index = selection[0]
+            self.source_spec = 'device'
+            self.device_window.destroy()
+        else:
+            messagebox.showwarning("Advertencia", "Por favor, selecciona un dispositivo.")
+
+    def start_stream(self):
+        is_device = uses_device(self.source_spec)
+        if self.source_spec == 'device' and self.device_index is None:
+            messagebox.showwarning("Advertencia", "Por favor, selecciona un micrófono primero.")
+            return
+
+        # La fuente escribe en un buffer circular desde su propio hilo o bajo demanda
+        try:
+            self.capture = open_source(self.source_spec, self.rate, self.channels, self.block_size,
+                                       pyaudio_instance=self.get_pyaudio() if is_device else None,
+                                       device_index=self.device_index, **self.source_options)
+            if isinstance(self.capture, FeatureClient):
+                # Cliente remoto: el saludo del servidor fija canales y bandas antes del análisis
+                self.capture.start()
+                self.analysis = RemoteAnalysis(self.capture)
+            else:
+                if self.probe_path is not None:
+                    self.probe = LatencyProbe(self.capture.rate)
+                    self.capture.attach_probe(self.probe)
+                self.analysis = self.create_analysis(self.capture)
+                self.capture.start()
+            if self.serve is not None:
+                self.start_server()
+        except (OSError, ValueError) as e:
+            self.capture = None
+            messagebox.showerror("Error", f"No se pudo abrir la fuente de audio: {e}")
+            return
+
+        self.configure_layout(self.capture.analysis_channels)
+        self.is_running = True
+        self.scheduler.reset()
+
+        self.update_visualization()
+
+    def create_analysis(self, capture):
+        # El filtro y la FFT siguen la frecuencia de muestreo y el bloque de la fuente
+        from engine.analysis import AudioAnalysis
+
+        analysis = AudioAnalysis(capture.rate, max(capture.block_size, LEVEL_WINDOW), self.low_freq,
+                                 self.high_freq, hop=self.hop, profiler=self.profiler,
+                                 channels=capture.analysis_channels)
+        # Con la sonda el análisis tiene que ver los clics: nada de caché
+        if self.cache is None or self.probe is not None or not isinstance(capture, FileSource):
+            return analysis
+
+        # Archivo: el análisis entero (un frame por salto de la FFT) se busca o se calcula en otro
+        # hilo, con su propia instancia; hasta que esté listo se analiza en vivo (``use_table``)
+        worker = AudioAnalysis(capture.rate, max(capture.block_size, LEVEL_WINDOW), self.low_freq,
+                               self.high_freq, hop=self.hop, channels=capture.analysis_channels)
+        self.table_builder = TableBuilder(self.cache, capture.path, capture.data, worker,
+                                          analysis.rate / analysis.hop, capture.mix)
+        self.last_stats = None
+        return analysis
+
+    def use_table(self):
+        """Pasa del análisis en vivo a la tabla de la caché, en la posición actual del archivo"""
+        builder, self.table_builder = self.table_builder, None
+        self.last_stats = None
+        if builder.table is None:
+            # Sin tabla (p. ej. sin espacio en disco) se sigue analizando en vivo
+            print(f"No se pudo guardar el análisis del archivo: {builder.error}", file=sys.stderr)
+            return
+        self.analysis = CachedAnalysis(builder.table, loop=self.capture.loop)
+        self.analysis.seek(self.capture.position)
+
+    def start_server(self):
+        # Los clientes que se conecten después reciben la configuración del análisis actual
+        info = dict(self.analysis.params(), fps=1.0 / self.scheduler.period)
+        if self.server is None:
+            self.server = FeatureServer(parse_address(self.serve, '0.0.0.0'), info)
+            self.server.start()
+        else:
+            self.server.info = info
+
+    def configure_layout(self, channels):
+        # Con varios canales la escena se adapta y el gobernador escala desde esa base
+        self.layout = ChannelLayout(channels) if channels else None
+        if self.governor is not None:
+            self.governor.set_level(0)
+        self.scene.configure_channels(channels)
+        if self.governor is not None:
+            self.governor = QualityGovernor(self.scene, self.scheduler.period)
+
+    def stop_stream(self):
+        if self.table_builder is not None:
+            self.table_builder.cancel()
+            self.table_builder = None
+        if self.capture is not None:
+            self.is_running = False
+            self.capture.stop()
+            self.capture = None
+
+    def update_visualization(self):
+        if not self.is_running:
+            return
+        # Avance en ticks de 50 ms, acotado para que una pausa larga no teletransporte las formas
+        self.tick_dt = min(self.scheduler.begin() / BASE_TICK, 3.0)
+        if self.table_builder is not None and self.table_builder.done:
+            self.use_table()
+
+        # Analizar todo lo capturado desde el último tick, sin bloquear el hilo de Tk
+        with self.profiler.stage('read'):
+            if isinstance(self.analysis, CachedAnalysis):
+                # La tabla ya tiene nivel y características: el archivo solo avanza, sin leer muestras
+                self.analysis.advance(self.capture.skip())
+                samples = None
+            else:
+                samples = self.capture.read()
+        if samples is not None:
+            self.analysis.process(samples)
+        self.update_capture_status()
+        features = self.analysis.features()
+        if features is None:
+            # Aún no hay suficientes muestras capturadas
+            self.schedule_next()
+            return
+        level, dominant_freq = features
+        rhythm = self.analysis.rhythm()
+        if self.probe is not None and np.any(rhythm.onsets):
+            self.probe.detected()
+        if self.server is not None:
+            self.server.publish(features, rhythm)
+        if isinstance(self.analysis, RemoteAnalysis) and self.seed is not None:
+            # Clientes con la misma semilla crean las mismas formas en el mismo frame del servidor
+            self.scene.reseed(self.seed, self.analysis.index)
+
+        # Crear formas o trazos en los ataques del audio
+        with self.profiler.stage('spawn'):
+            color = self.scene.react(level, dominant_freq, rhythm, time.monotonic(),
+                                     self.canvas.winfo_width(), self.canvas.winfo_height(), self.layout)
+            if color is not None:
+                self.level_color = color
+            if self.layout is not None:
+                level = level.max()
+
+        # Animar la escena y presentar el frame
+        with self.profiler.stage('move'):
+            self.scene.move_shapes(time.monotonic(), self.canvas.winfo_width(), self.canvas.winfo_height(),
+                                   self.tick_dt)
+        with self.profiler.stage('redraw'):
+            self.renderer.present()
+            # Forzar aquí el repintado de Tk para que cuente en esta etapa
+            self.canvas.update_idletasks()
+        if self.probe is not None:
+            self.probe.presented()
+
+        # Actualizar barra de nivel
+        self.level_canvas.coords(self.level_bar, 0, 0, level / 50, 20)
+        if self.level_color != self.level_fill:
+            self.level_fill = self.level_color
+            self.level_canvas.itemconfig(self.level_bar, fill=self.level_color)
+
+        if self.hud is not None:
+            extra = [f"Tempo {np.max(rhythm.tempo):5.1f} BPM  Flujo {np.max(rhythm.flux):.3f}"]
+            if self.governor is not None:
+                extra.append(self.governor.status_text())
+            if self.probe is not None:
+                extra.append(self.probe.status_text())
+            if self.server is not None:
+                extra.append(self.server.status_text())
+            if getattr(self.renderer, 'commands', None) is not None:
+                extra.append(self.renderer.commands.status_text())
+            self.hud.update(self.capture.overruns, self.capture.dropped, extra)
+        self.profiler.frame()
+
+        self.schedule_next()
+
+    def schedule_next(self):
+        # Descontar el trabajo del tick de la espera y ajustar la calidad según su coste
+        work, delay = self.scheduler.end()
+        if self.governor is not None:
+            self.governor.observe(work)
+        self.master.after(delay, self.update_visualization)
+
+    def update_capture_status(self):
+        stats = (self.capture.overruns, self.capture.dropped)
+        if stats != self.last_stats:
+            self.last_stats = stats
+            text = self.capture.stats_text()
+            if self.table_builder is not None:
+                text += "  (analizando el archivo para la caché...)"
+            self.status_label.config(text=text)
+
+    def on_closing(self):
+        if self.probe is not None:
+            self.report_latency()
+        self.stop_stream()
+        if self.server is not None:
+            self.server.stop()
+        if self.p is not None:
+            self.p.terminate()
+        if self.trace_path:
+            self.profiler.export_chrome_trace(self.trace_path)
+        self.master.destroy()
+
+    def report_latency(self):
+        print(self.probe.status_text(), file=sys.stderr)
+        if self.probe_path:
+            self.probe.export(self.probe_path, block_size=self.capture.block_size if self.capture else None,
+                              rate=self.probe.rate, hop=self.hop, fps=1.0 / self.scheduler.period,
+                              renderer=type(self.renderer).__name__,
+                              input_latency=self.capture.input_latency if self.capture else None)
+
+    def toggle_fullscreen(self):
+        is_fullscreen = self.master.attributes('-fullscreen')
+        self.master.attributes('-fullscreen', not is_fullscreen)
+
+        # Opcional: Permitir salir de pantalla completa con la tecla Escape
+        if not is_fullscreen:
+            self.master.bind('<Escape>', lambda e: self.master.attributes('-fullscreen', False))
+
+
+def main(argv=None, default_scene='forms'):
+    parser = argparse.ArgumentParser(description="Visualizador de Audio")
+    parser.add_argument('--scene', choices=list(SCENES), default=default_scene,
+                        help="Estilo visual: formas animadas o trazos acumulados")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Semilla del generador aleatorio (ejecuciones reproducibles)")
+    parser.add_argument('--renderer', choices=['canvas', 'raster'], default='canvas',
+                        help="Backend de dibujo: items del canvas o framebuffer con mezcla alfa")
+    parser.add_argument('--hud', action='store_true',
+                        help="Mostrar FPS, latencias por etapa, items del canvas y desbordes")
+    parser.add_argument('--trace', metavar='ARCHIVO',
+                        help="Exportar al cerrar una traza JSON (chrome://tracing, Perfetto)")
+    parser.add_argument('--fps', type=float, default=None, help="Frames por segundo objetivo (20; 60 con --low-latency)")
+    parser.add_argument('--fixed-quality', action='store_true',
+                        help="No reducir partículas, resplandores ni formas bajo carga")
+    parser.add_argument('--spawn', choices=SPAWN_MODES, default='onset',
+                        help="Crear formas o trazos en cada ataque detectado o en cada tick")
+    parser.add_argument('--palette', type=parse_palette, default=None, metavar='COLORES',
+                        help="Colores separados por comas, p. ej. '#ff6347,#1e90ff,#ffd700'")
+    parser.add_argument('--low-latency', action='store_true',
+                        help="Bloques de captura de 256 muestras, FFT cada 256 y 60 FPS (salvo --block-size/--fps)")
+    parser.add_argument('--latency-probe', nargs='?', const='', default=None, metavar='ARCHIVO',
+                        help="Sumar un clic por segundo a la entrada y medir cuánto tarda en verse (HUD y "
+                             "al cerrar; con ARCHIVO, JSON con las marcas de tiempo)")
+    parser.add_argument('--serve', default=None, metavar='[HOST:]PUERTO',
+                        help="Publicar por TCP cada frame analizado para clientes con --source tcp:HOST:PUERTO")
+    add_source_arguments(parser)
+    add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.low_latency and args.block_size is None:
+        args.block_size = 256
+    if args.fps is None:
+        args.fps = 60 if args.low_latency else 20
+
+    root = tk.Tk()
+    app = AudioVisualizer(root, scene=args.scene, seed=args.seed, renderer=args.renderer, hud=args.hud,
+                          trace_path=args.trace, fps=args.fps, adaptive=not args.fixed_quality,
+                          spawn=args.spawn, palette=args.palette, cache=cache_from_args(args),
+                          low_latency=args.low_latency, latency_probe=args.latency_probe, serve=args.serve,
+                          **source_options(args))
+    root.protocol("WM_DELETE_WINDOW", app.on_closing)
+    root.mainloop()
@@ -0,0 +1,234 @@
+"""Captura de audio fuera del hilo de Tk mediante callback y buffer circular"""
+import time
+
+import numpy as np
+
+
+def to_int16_scale(block, mix=True):
+    """Lleva un bloque (mono, o con un canal por columna) a la escala de int16.
+
+    Con ``mix`` los canales se mezclan a mono; si no, el resultado siempre
+    tiene forma (muestras, canales).
+    """
+    dtype = block.dtype
+    block = block.astype(np.float64)
+    if block.ndim > 1 and mix:
+        block = block.mean(axis=1)
+    elif block.ndim == 1 and not mix:
+        block = block[:, None]
+    if dtype == np.uint8:
+        block -= 128
+        block *= 256
+    elif dtype == np.int32:
+        block /= 65536
+    elif np.issubdtype(dtype, np.floating):
+        block *= 32768
+    return block
+
+
+class RingBuffer:
+    """Buffer circular preasignado para un productor y un consumidor.
+
+    El productor solo avanza ``written`` después de copiar las muestras, de modo
+    que el consumidor nunca necesita bloquear: lee hasta la última posición
+    publicada. Con ``channels`` cada posición guarda una trama de varios
+    canales (arrays de forma (muestras, canales)).
+    """
+
+    def __init__(self, capacity, dtype=np.int16, channels=None):
+        self.capacity = int(capacity)
+        self.shape = (self.capacity,) if channels is None else (self.capacity, channels)
+        self.data = np.zeros(self.shape, dtype=dtype)
+        self.written = 0  # Total de muestras escritas (monótono)
+        self.read_pos = 0  # Total de muestras consumidas por el lector
+        self.dropped = 0  # Muestras sobrescritas antes de ser leídas
+        self._scratch = np.empty(self.shape, dtype=dtype)
+
+    def write(self, samples):
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            self.written += n - self.capacity
+            n = self.capacity
+
+        start = self.written % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            self.data[start:end] = samples
+        else:
+            split = self.capacity - start
+            self.data[start:] = samples[:split]
+            self.data[:end - self.capacity] = samples[split:]
+
+        # Publicar las muestras solo cuando ya están copiadas
+        self.written += n
+
+    def available(self):
+        return min(self.written - self.read_pos, self.capacity)
+
+    def read(self):
+        """Devuelve todas las muestras no leídas (vista sobre un buffer interno)"""
+        written = self.written
+        lag = written - self.read_pos
+        if lag > self.capacity:
+            self.dropped += lag - self.capacity
+            lag = self.capacity
+        self.read_pos = written
+        if lag == 0:
+            return self._scratch[:0]
+        return self._copy_tail(written, lag, self._scratch[:lag])
+
+    def latest(self, n, out=None):
+        """Copia las n muestras más recientes, o None si aún no hay suficientes"""
+        written = self.written
+        if written < n or n > self.capacity:
+            return None
+        if out is None:
+            out = np.empty((n,) + self.shape[1:], dtype=self.data.dtype)
+        return self._copy_tail(written, n, out)
+
+    def _copy_tail(self, written, n, out):
+        end = written % self.capacity
+        start = end - n
+        if start >= 0:
+            out[:] = self.data[start:end]
+        else:
+            out[:-start] = self.data[start:]
+            out[-start:] = self.data[:end]
+        return out
+
+
+class AudioSource:
+    """Interfaz común de las fuentes de audio.
+
+    Cada fuente publica ``rate``, ``channels`` y ``block_size`` y entrega las
+    muestras en escala de int16 a través de un RingBuffer: ``read`` devuelve
+    lo nuevo desde la última lectura sin bloquear nunca. Con ``mix`` (por
+    defecto) los canales se mezclan a mono; si no, cada lectura tiene forma
+    (muestras, canales) para analizar los canales por separado.
+
+    Un ``LatencyProbe`` (``attach_probe``) recibe cada bloque capturado con la
+    hora de su primera muestra antes de que llegue al buffer.
+    """
+
+    def __init__(self, rate=44100, channels=1, block_size=1024, buffer_blocks=32, dtype=np.int16, mix=True):
+        self.rate = rate
+        self.channels = channels
+        self.block_size = block_size
+        self.mix = mix
+        # Al menos medio segundo de margen aunque los bloques sean pequeños (baja latencia)
+        capacity = max(block_size * buffer_blocks, rate // 2)
+        self.ring = RingBuffer(capacity, dtype=dtype, channels=None if mix else channels)
+        self.probe = None
+
+        # Estadísticas de captura
+        self.overruns = 0  # Desbordes reportados por la fuente
+        self.blocks = 0  # Bloques recibidos
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    @property
+    def analysis_channels(self):
+        """Canales que ve el análisis: None si la fuente entrega mono"""
+        return None if self.mix else self.channels
+
+    def attach_probe(self, probe):
+        self.probe = probe
+
+    @property
+    def input_latency(self):
+        """Latencia de entrada que informa el driver (s); 0 si la fuente no pasa por uno"""
+        return 0.0
+
+    def write_interleaved(self, samples, first_time=None):
+        """Publica muestras intercaladas por canal (mezcladas a mono si ``mix``).
+
+        ``first_time`` es la hora (reloj monótono) de la primera trama; sin ella
+        se supone que la última acaba de llegar.
+        """
+        frames = samples[:len(samples) // self.channels * self.channels].reshape(-1, self.channels)
+        if self.probe is not None:
+            if first_time is None:
+                first_time = self.probe.clock() - len(frames) / self.rate
+            frames = self.probe.inject(frames, first_time)
+        if not self.mix:
+            self.ring.write(frames)
+        elif self.channels > 1:
+            self.ring.write(frames.mean(axis=1))
+        else:
+            self.ring.write(frames[:, 0])
+        self.blocks += 1
+
+    def read(self):
+        """Muestras nuevas desde la última lectura, sin bloquear"""
+        return self.ring.read()
+
+    def latest(self, n, out=None):
+        return self.ring.latest(n, out)
+
+    @property
+    def dropped(self):
+        return self.ring.dropped
+
+    def stats_text(self):
+        return f"Desbordes: {self.overruns}  Perdidas: {self.dropped}"
+
+
+class AudioCapture(AudioSource):
+    """Stream de PyAudio en modo callback que escribe en un RingBuffer.
+
+    PortAudio llama a ``_callback`` desde su propio hilo, así que la lectura del
+    dispositivo no depende del ritmo de refresco de la interfaz.
+    """
+
+    def __init__(self, p, device_index, rate=44100, block_size=1024, buffer_blocks=32, channels=1, mix=True):
+        super().__init__(rate, channels, block_size, buffer_blocks, mix=mix)
+        self.p = p
+        self.device_index = device_index
+        self.stream = None
+
+    def start(self):
+        # PyAudio solo hace falta con captura en vivo (el render offline no lo importa)
+        import pyaudio
+
+        self._input_overflow = pyaudio.paInputOverflow
+        self._continue = pyaudio.paContinue
+        self.stream = self.p.open(format=pyaudio.paInt16,
+                                  channels=self.channels,
+                                  rate=self.rate,
+                                  input=True,
+                                  input_device_index=self.device_index,
+                                  frames_per_buffer=self.block_size,
+                                  stream_callback=self._callback)
+        self.stream.start_stream()
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+
+    @property
+    def input_latency(self):
+        return self.stream.get_input_latency() if self.stream is not None else 0.0
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        if status & self._input_overflow:
+            self.overruns += 1
+        first_time = None if self.probe is None else self._adc_time(frame_count, time_info)
+        self.write_interleaved(np.frombuffer(in_data, dtype=np.int16), first_time)
+        return (None, self._continue)
+
+    def _adc_time(self, frame_count, time_info):
+        # Hora de la primera trama en el reloj monótono; PortAudio informa en su propio reloj
+        now = time.monotonic()
+        adc = time_info.get('input_buffer_adc_time', 0) if time_info else 0
+        current = time_info.get('current_time', 0) if time_info else 0
+        if adc > 0 and 0 <= current - adc < 1:
+            return now - (current - adc)
+        # Sin hora del ADC (algunos drivers): la última trama acaba de llegar
+        return now - frame_count / self.rate
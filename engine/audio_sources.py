@@ -0,0 +1,410 @@
+"""Fuentes de audio alternativas al micrófono: archivos, señales sintéticas y sockets.
+
+Todas implementan la interfaz de ``AudioSource`` (``audio_capture.py``), así
+que la interfaz y el análisis no distinguen de dónde vienen las muestras.
+``open_source`` crea la fuente a partir de una especificación de texto:
+
+    device[:N]              micrófono de PyAudio (índice N o el elegido en la interfaz)
+    file:show.wav           WAV leído a ritmo de reproducción
+    file:show.raw           PCM int16 intercalado (usa --rate y --channels)
+    signal:chirp            señal determinista: tone, chirp, noise, bursts o silence
+    udp:127.0.0.1:9000      datagramas PCM int16 intercalados
+    unix:/tmp/audio.sock    ídem sobre un socket Unix de datagramas
+    tcp:127.0.0.1:9100      frames ya analizados de un servidor de ``engine/stream.py``
+
+Varias especificaciones se combinan con ``MultiSource`` en una sola fuente
+multicanal (por ejemplo, varios dispositivos a la vez).
+"""
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+from engine.audio_capture import AudioCapture, AudioSource, to_int16_scale
+
+
+class ClockedSource(AudioSource):
+    """Fuente que genera bajo demanda las muestras que corresponden al reloj.
+
+    En cada ``read`` se producen las muestras transcurridas desde la anterior
+    lectura (multiplicadas por ``speed``), sin hilos: el ritmo es el de una
+    captura real, y con ``speed`` > 1 sirve como prueba de carga. Como en una
+    captura, las muestras llegan en bloques enteros de ``block_size``, así que
+    el tamaño de bloque también pesa en la latencia medida con estas fuentes.
+    """
+
+    def __init__(self, rate=44100, channels=1, block_size=1024, buffer_blocks=32, speed=1.0,
+                 clock=time.monotonic, mix=True):
+        super().__init__(rate, channels, block_size, buffer_blocks, dtype=np.float64, mix=mix)
+        self.speed = speed
+        self.clock = clock
+        self.position = 0  # Muestras producidas desde el inicio
+        self.finished = False
+        self._t0 = None
+
+    def start(self):
+        self._t0 = self.clock()
+        self.position = 0
+        self.finished = False
+
+    def _target(self):
+        # Muestras que deberían haberse producido según el reloj, en bloques enteros
+        target = int((self.clock() - self._t0) * self.rate * self.speed)
+        return target - target % self.block_size
+
+    def read(self):
+        if self._t0 is not None and not self.finished:
+            target = self._target()
+            n = target - self.position
+            capacity = self.ring.capacity
+            if n > capacity:
+                # Lector demasiado lento: saltar lo que ya no cabe, como haría una captura
+                self.ring.dropped += n - capacity
+                self.position = target - capacity
+                n = capacity
+            if n > 0:
+                block = self.generate(self.position, n)
+                if self.probe is not None and len(block):
+                    block = self.probe.inject(block, self._t0 + self.position / (self.rate * self.speed))
+                self.position += n
+                if len(block):
+                    self.ring.write(block)
+                    self.blocks += 1
+        return self.ring.read()
+
+    def skip(self):
+        """Como ``read``, pero solo avanza el reloj: devuelve cuántas muestras han pasado sin generarlas.
+
+        Para cuando el análisis no necesita las muestras (``CachedAnalysis``).
+        """
+        if self._t0 is None or self.finished:
+            return 0
+        n = max(self._target() - self.position, 0)
+        self.position += n
+        return n
+
+    def generate(self, position, n):
+        """Muestras en escala int16 de ``[position, position + n)`` (mono, o (n, canales) sin ``mix``)"""
+        raise NotImplementedError
+
+
+class FileSource(ClockedSource):
+    """WAV o PCM crudo leído por bloques (mapeado en memoria) a ritmo de reproducción"""
+
+    def __init__(self, path, rate=44100, channels=1, block_size=1024, loop=False, **options):
+        if path.lower().endswith('.wav'):
+            from scipy.io import wavfile
+
+            rate, data = wavfile.read(path, mmap=True)
+            channels = 1 if data.ndim == 1 else data.shape[1]
+        else:
+            data = np.memmap(path, dtype='<i2', mode='r')
+            data = data[:len(data) // channels * channels].reshape(-1, channels)
+        super().__init__(rate, channels, block_size, **options)
+        self.path = path
+        self.data = data
+        self.loop = loop
+
+    def generate(self, position, n):
+        total = len(self.data)
+        if self.loop:
+            idx = (position + np.arange(n)) % total
+            return to_int16_scale(self.data[idx], self.mix)
+        if position + n >= total:
+            self.finished = True
+        return to_int16_scale(self.data[position:min(position + n, total)], self.mix)
+
+    def skip(self):
+        start = self.position
+        n = super().skip()
+        if not self.loop and start + n >= len(self.data):
+            self.finished = True
+            return max(len(self.data) - start, 0)
+        return n
+
+
+class SignalSource(ClockedSource):
+    """Señal sintética determinista: la muestra i solo depende de i y de la semilla.
+
+    Con varios canales, cada canal es la misma señal desfasada en el tiempo
+    (``period / channels``), así que en cada instante tienen frecuencias y
+    energías distintas.
+    """
+
+    KINDS = ('tone', 'chirp', 'noise', 'bursts', 'silence')
+    NOISE_CHUNK = 4096
+
+    def __init__(self, kind='chirp', rate=44100, block_size=1024, freq=440.0, sweep=(200.0, 4000.0),
+                 period=4.0, amplitude=8000, seed=0, channels=1, **options):
+        if kind not in self.KINDS:
+            raise ValueError(f"Señal desconocida: {kind} (opciones: {', '.join(self.KINDS)})")
+        super().__init__(rate, channels, block_size, **options)
+        self.kind = kind
+        self.freq = freq
+        self.sweep = sweep
+        self.period = period
+        self.amplitude = amplitude
+        self.seed = seed
+
+    def generate(self, position, n):
+        if self.channels == 1:
+            block = self._channel(position, n, 0)
+            return block if self.mix else block[:, None]
+        frames = np.column_stack([self._channel(position, n, c) for c in range(self.channels)])
+        return frames.mean(axis=1) if self.mix else frames
+
+    def _channel(self, position, n, channel):
+        index = position + np.arange(n)
+        t = index / self.rate + channel * self.period / self.channels
+        if self.kind == 'tone':
+            return self.amplitude * np.sin(2 * np.pi * self.freq * t)
+        if self.kind == 'chirp':
+            # Barrido exponencial que se repite cada ``period`` segundos
+            f0, f1 = self.sweep
+            k = (f1 / f0) ** (1 / self.period)
+            tau = np.mod(t, self.period)
+            return self.amplitude * np.sin(2 * np.pi * f0 * (k ** tau - 1) / np.log(k))
+        if self.kind == 'noise':
+            return self._noise(position, n, channel)
+        if self.kind == 'silence':
+            # Entrada limpia para medir la latencia con clics (--latency-probe)
+            return np.zeros(n)
+        # bursts: ráfagas de 0.25 s con tono distinto cada una, separadas por silencio
+        burst = (t // 0.5).astype(np.int64)
+        freq = 300 + (burst * 7919 % 13) * 230
+        gate = np.mod(t, 0.5) < 0.25
+        return self.amplitude * gate * np.sin(2 * np.pi * freq * t)
+
+    def _noise(self, position, n, channel=0):
+        # Ruido por trozos fijos con semilla (semilla, canal, trozo): independiente del tamaño de lectura
+        first = position // self.NOISE_CHUNK
+        last = (position + n - 1) // self.NOISE_CHUNK
+        chunks = [np.random.default_rng([self.seed, channel, c]).normal(0, self.amplitude / 3, self.NOISE_CHUNK)
+                  for c in range(first, last + 1)]
+        offset = position - first * self.NOISE_CHUNK
+        return np.concatenate(chunks)[offset:offset + n]
+
+
+class SocketSource(AudioSource):
+    """PCM int16 intercalado recibido por datagramas UDP o de socket Unix.
+
+    Un hilo receptor escribe en el RingBuffer, igual que el callback de
+    PortAudio; cada datagrama es un bloque, sin cabecera.
+    """
+
+    def __init__(self, address, family=socket.AF_INET, rate=44100, channels=1, block_size=1024,
+                 buffer_blocks=32, mix=True):
+        super().__init__(rate, channels, block_size, buffer_blocks, mix=mix)
+        self.address = address
+        self.family = family
+        self.sock = None
+        self.thread = None
+        self.running = False
+        self.bad_datagrams = 0  # Datagramas con longitud que no es múltiplo de una trama
+
+    def start(self):
+        self.sock = socket.socket(self.family, socket.SOCK_DGRAM)
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.remove(self.address)
+        self.sock.bind(self.address)
+        self.sock.settimeout(0.2)
+        self.running = True
+        self.thread = threading.Thread(target=self._receive, name='SocketSource', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            if self.family == socket.AF_UNIX and os.path.exists(self.address):
+                os.remove(self.address)
+
+    def _receive(self):
+        frame = 2 * self.channels
+        while self.running:
+            try:
+                data = self.sock.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if len(data) % frame:
+                self.bad_datagrams += 1
+                data = data[:len(data) - len(data) % frame]
+            if data:
+                self.write_interleaved(np.frombuffer(data, dtype='<i2'))
+
+
+class MultiSource(AudioSource):
+    """Varias fuentes (p. ej. dispositivos) vistas como una sola fuente multicanal.
+
+    Los canales se concatenan en el orden de las fuentes. Cada dispositivo
+    tiene su propio reloj, así que en cada lectura solo se entregan las
+    tramas que ya llegaron de todas; lo que sobra de las más rápidas espera a
+    la siguiente lectura (y se descarta si supera la capacidad del buffer).
+    """
+
+    def __init__(self, sources, buffer_blocks=32):
+        rates = {source.rate for source in sources}
+        if len(rates) != 1:
+            raise ValueError(f"Las fuentes deben tener la misma frecuencia de muestreo: {sorted(rates)}")
+        channels = sum(source.channels for source in sources)
+        super().__init__(sources[0].rate, channels, sources[0].block_size, buffer_blocks,
+                         dtype=np.float64, mix=False)
+        self.sources = sources
+        self._pending = [np.empty((0, source.channels)) for source in sources]
+
+    def start(self):
+        for source in self.sources:
+            source.start()
+
+    def stop(self):
+        for source in self.sources:
+            source.stop()
+
+    def attach_probe(self, probe):
+        # Los clics entran por la primera fuente: una sola hora de referencia por clic
+        self.probe = probe
+        self.sources[0].attach_probe(probe)
+
+    @property
+    def input_latency(self):
+        return max(source.input_latency for source in self.sources)
+
+    @property
+    def dropped(self):
+        return self.ring.dropped + sum(source.dropped for source in self.sources)
+
+    def read(self):
+        for i, source in enumerate(self.sources):
+            new = source.read()
+            if len(new):
+                self._pending[i] = np.concatenate([self._pending[i], new])[-self.ring.capacity:]
+        n = min(len(pending) for pending in self._pending)
+        if n:
+            self.ring.write(np.hstack([pending[:n] for pending in self._pending]))
+            self._pending = [pending[n:] for pending in self._pending]
+            self.blocks += 1
+        self.overruns = sum(source.overruns for source in self.sources)
+        return self.ring.read()
+
+
+def parse_spec(spec):
+    """``'udp:host:puerto'`` -> ``('udp', 'host:puerto')``; sin prefijo se asume un archivo"""
+    kind, sep, arg = spec.partition(':')
+    if not sep and kind != 'device':
+        return 'file', spec
+    return kind, arg
+
+
+def uses_device(spec):
+    """True si ``spec`` (o alguna de una lista) abre un micrófono de PyAudio"""
+    specs = [spec] if isinstance(spec, str) else spec
+    return any(parse_spec(s)[0] == 'device' for s in specs)
+
+
+def open_source(spec, rate=44100, channels=1, block_size=1024, pyaudio_instance=None, device_index=None,
+                loop=False, speed=1.0, mix=True):
+    """Crea la fuente descrita por ``spec`` (ver el docstring del módulo).
+
+    Con una lista de especificaciones devuelve una MultiSource con los
+    canales de todas, sin mezclar.
+    """
+    if not isinstance(spec, str):
+        if len(spec) == 1:
+            return open_source(spec[0], rate, channels, block_size, pyaudio_instance, device_index,
+                               loop, speed, mix)
+        return MultiSource([open_source(s, rate, channels, block_size, pyaudio_instance, device_index,
+                                        loop, speed, mix=False) for s in spec])
+    kind, arg = parse_spec(spec)
+    if kind == 'device':
+        index = int(arg) if arg else device_index
+        if index is None:
+            raise ValueError("No hay dispositivo de entrada seleccionado")
+        if pyaudio_instance is None:
+            import pyaudio
+            pyaudio_instance = pyaudio.PyAudio()
+        return AudioCapture(pyaudio_instance, index, rate=rate, block_size=block_size, channels=channels,
+                            mix=mix)
+    if kind == 'file':
+        return FileSource(arg, rate, channels, block_size, loop=loop, speed=speed, mix=mix)
+    if kind == 'signal':
+        return SignalSource(arg or 'chirp', rate, block_size, channels=channels, speed=speed, mix=mix)
+    if kind == 'udp':
+        host, _, port = arg.rpartition(':')
+        return SocketSource((host or '127.0.0.1', int(port)), socket.AF_INET, rate, channels, block_size,
+                            mix=mix)
+    if kind == 'unix':
+        return SocketSource(arg, socket.AF_UNIX, rate, channels, block_size, mix=mix)
+    if kind == 'tcp':
+        from engine.stream import FeatureClient, parse_address
+        return FeatureClient(parse_address(arg))
+    raise ValueError(f"Fuente desconocida: {spec}")
+
+
+def add_source_arguments(parser):
+    """Opciones de línea de comandos comunes para elegir y configurar la fuente"""
+    parser.add_argument('--source', action='append',
+                        help="device[:N], file:RUTA, signal:{tone,chirp,noise,bursts,silence}, udp:HOST:PUERTO, unix:RUTA o tcp:HOST:PUERTO (frames de engine.stream); "
+                             "repetida, combina varias fuentes (p. ej. dispositivos) con un canal cada una")
+    parser.add_argument('--rate', type=int, default=44100, help="Frecuencia de muestreo (Hz)")
+    parser.add_argument('--channels', type=int, default=1, help="Canales de cada fuente")
+    parser.add_argument('--multichannel', action='store_true',
+                        help="Analizar cada canal por separado (cada uno con su región y su paleta) "
+                             "en lugar de mezclarlos a mono")
+    parser.add_argument('--block-size', type=int, default=None,
+                        help="Muestras por bloque de captura (1024; 256 con --low-latency)")
+    parser.add_argument('--loop', action='store_true', help="Repetir el archivo al llegar al final")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Velocidad de las fuentes de archivo y señal (>1 para pruebas de carga)")
+
+
+def source_options(args):
+    sources = args.source or ['device']
+    source = sources[0] if len(sources) == 1 else sources
+    return dict(source=source, rate=args.rate, channels=args.channels, block_size=args.block_size or 1024,
+                loop=args.loop, speed=args.speed, mix=not (args.multichannel or len(sources) > 1))
+
+
+def send_file(path, spec, block_size=512):
+    """Envía un WAV como datagramas a ``udp:``/``unix:`` a ritmo real (pruebas de la fuente de socket)"""
+    from scipy.io import wavfile
+
+    rate, data = wavfile.read(path, mmap=True)
+    kind, arg = parse_spec(spec)
+    if kind == 'udp':
+        host, _, port = arg.rpartition(':')
+        sock, address = socket.socket(socket.AF_INET, socket.SOCK_DGRAM), (host or '127.0.0.1', int(port))
+    else:
+        sock, address = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM), arg
+    channels = [data] if data.ndim == 1 else [data[:, c] for c in range(data.shape[1])]
+    pcm = np.column_stack([to_int16_scale(channel) for channel in channels])
+    pcm = np.clip(np.round(pcm), -32768, 32767).astype('<i2')
+    start = time.monotonic()
+    for i, pos in enumerate(range(0, len(pcm), block_size)):
+        # Plazo absoluto de cada bloque para no acumular deriva
+        delay = start + i * block_size / rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            sock.sendto(pcm[pos:pos + block_size].tobytes(), address)
+        except OSError:
+            pass  # Receptor aún no disponible o reiniciándose: se pierde el bloque
+    sock.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Envía un WAV a una fuente de socket del visualizador")
+    parser.add_argument('input', help="Archivo WAV")
+    parser.add_argument('target', help="udp:host:puerto o unix:/ruta.sock")
+    parser.add_argument('--block-size', type=int, default=512)
+    args = parser.parse_args()
+    send_file(args.input, args.target, args.block_size)
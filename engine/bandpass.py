@@ -0,0 +1,58 @@
+"""Filtro pasa banda con coeficientes cacheados (SOS) y estado persistente"""
+from functools import lru_cache
+
+import numpy as np
+
+
+def scipy_signal():
+    # scipy.signal tarda casi un segundo en importarse: se carga al diseñar el primer filtro
+    import scipy.signal
+    return scipy.signal
+
+
+@lru_cache(maxsize=32)
+def design_bandpass(lowcut, highcut, fs, order):
+    """Diseña (una sola vez por banda, orden y frecuencia) un Butterworth en SOS"""
+    signal = scipy_signal()
+    butter, sosfilt_zi = signal.butter, signal.sosfilt_zi
+    nyquist = 0.5 * fs
+    sos = butter(order, [lowcut / nyquist, highcut / nyquist], btype='band', output='sos')
+    # Los arrays se comparten entre todos los filtros con la misma clave: no modificarlos
+    return sos, sosfilt_zi(sos)
+
+
+class BandpassFilter:
+    """Filtro pasa banda por bloques que conserva el estado ``zi`` entre llamadas.
+
+    Procesar un flujo en bloques consecutivos da el mismo resultado que filtrar
+    la señal completa de una vez, sin transitorios en los bordes de bloque.
+    Con bloques de forma (muestras, canales) todos los canales se filtran en
+    una sola llamada, cada uno con su propio estado.
+    """
+
+    def __init__(self, lowcut, highcut, fs, order=5):
+        self.key = None
+        self.configure(lowcut, highcut, fs, order)
+
+    def configure(self, lowcut, highcut, fs, order):
+        key = (float(lowcut), float(highcut), float(fs), int(order))
+        if key == self.key:
+            return
+        # Solo cambia la entrada de caché usada; las demás se conservan
+        self.key = key
+        self.sos, self._zi_unit = design_bandpass(*key)
+        self._sosfilt = scipy_signal().sosfilt
+        self.reset()
+
+    def reset(self):
+        self.zi = None
+
+    def process(self, data):
+        x = np.asarray(data, dtype=np.float64)
+        if len(x) == 0:
+            return x
+        if self.zi is None:
+            # Arrancar en régimen estacionario para el primer valor del flujo (de cada canal)
+            self.zi = self._zi_unit.reshape(self._zi_unit.shape + (1,) * (x.ndim - 1)) * x[0]
+        y, self.zi = self._sosfilt(self.sos, x, axis=0, zi=self.zi)
+        return y
@@ -0,0 +1,91 @@
+"""Bancos de filtros perceptivos (mel, bark, octava) como matrices dispersas cacheadas.
+
+La energía por banda de un espectro de potencia es un solo producto
+``banco @ potencia``; la matriz se construye una vez por escala, número de
+bandas, frecuencia de muestreo, tamaño de frame y rango.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+SCALES = ('mel', 'bark', 'octave')
+
+
+def hz_to_mel(f):
+    return 2595.0 * np.log10(1.0 + np.asarray(f, dtype=np.float64) / 700.0)
+
+
+def mel_to_hz(m):
+    return 700.0 * (10.0 ** (np.asarray(m, dtype=np.float64) / 2595.0) - 1.0)
+
+
+def hz_to_bark(f):
+    """Escala bark según Traunmüller (1990)"""
+    f = np.asarray(f, dtype=np.float64)
+    return 26.81 * f / (1960.0 + f) - 0.53
+
+
+def bark_to_hz(z):
+    z = np.asarray(z, dtype=np.float64)
+    return 1960.0 * (z + 0.53) / (26.28 - z)
+
+
+def octave_edges(fmin, fmax):
+    """Bordes de bandas de una octava entre fmin y fmax"""
+    edges = [float(fmin)]
+    while edges[-1] * 2 < fmax:
+        edges.append(edges[-1] * 2)
+    edges.append(float(fmax))
+    return edges
+
+
+def band_edges(scale, bands, fmin, fmax):
+    """``bands + 2`` puntos equiespaciados en la escala: bordes y centros de filtros triangulares"""
+    if scale == 'mel':
+        return mel_to_hz(np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), bands + 2))
+    if scale == 'bark':
+        return bark_to_hz(np.linspace(hz_to_bark(fmin), hz_to_bark(fmax), bands + 2))
+    raise ValueError(f"Escala desconocida: {scale!r} (opciones: {', '.join(SCALES)})")
+
+
+def rectangular_bank(edges, freqs):
+    """Matriz (bandas, bins) que suma la potencia entre bordes consecutivos"""
+    from scipy import sparse
+
+    idx = np.unique(np.searchsorted(freqs, edges))
+    rows = np.repeat(np.arange(len(idx) - 1), np.diff(idx))
+    cols = np.arange(idx[0], idx[-1])
+    return sparse.csr_matrix((np.ones(len(cols)), (rows, cols)), shape=(len(idx) - 1, len(freqs)))
+
+
+def triangular_bank(points, freqs):
+    """Matriz (bandas, bins) de filtros triangulares normalizados a suma 1.
+
+    Cada fila da la potencia media de su banda, así que bandas anchas y
+    estrechas son comparables. Una banda más estrecha que un bin toma el bin
+    más cercano a su centro.
+    """
+    from scipy import sparse
+
+    lo, center, hi = points[:-2, None], points[1:-1, None], points[2:, None]
+    rising = (freqs - lo) / (center - lo)
+    falling = (hi - freqs) / (hi - center)
+    weights = np.maximum(0.0, np.minimum(rising, falling))
+    empty = weights.sum(axis=1) == 0
+    weights[empty, np.abs(freqs - points[1:-1][empty, None]).argmin(axis=1)] = 1.0
+    weights /= weights.sum(axis=1, keepdims=True)
+    return sparse.csr_matrix(weights)
+
+
+@lru_cache(maxsize=16)
+def filterbank(scale, bands, rate, frame_size, fmin, fmax):
+    """Banco de filtros para espectros de ``rfft`` de ``frame_size`` puntos.
+
+    ``octave`` ignora ``bands`` (una banda por octava, rectangular); ``mel`` y
+    ``bark`` dan ``bands`` filtros triangulares. La matriz se comparte entre
+    todos los analizadores con la misma clave: no modificarla.
+    """
+    freqs = np.fft.rfftfreq(frame_size, 1 / rate)
+    if scale == 'octave':
+        return rectangular_bank(octave_edges(fmin, fmax), freqs)
+    return triangular_bank(band_edges(scale, bands, fmin, fmax), freqs)
@@ -0,0 +1,234 @@
+"""Lógica de formas de Audio_Forms, independiente de Tk (interfaz y render offline)"""
+import math
+
+import numpy as np
+
+from engine.onsets import SpawnTrigger
+from engine.palette import hsv_palette
+from engine.particles import ParticleSystem
+from engine.renderers import CanvasRenderer, RasterRenderer
+from engine.shape_physics import ShapeBuffer
+
+
+class FormsScene:
+    """Crea formas al ritmo del audio y anima todas sobre un Renderer.
+
+    El tiempo (``now``) y el tamaño del lienzo se reciben en cada llamada, así
+    que la misma escena sirve para la ventana en vivo y para renderizar un
+    archivo más rápido que en tiempo real.
+    """
+
+    level_color = 'gray'  # Color inicial de la barra de nivel
+
+    def __init__(self, renderer, seed=None, low_freq=300, high_freq=3400, spawn_mode='onset',
+                 palette=None):
+        self.renderer = renderer
+        self.low_freq = low_freq
+        self.high_freq = high_freq
+
+        # Generador aleatorio único y sembrable (ejecuciones reproducibles)
+        self.rng = np.random.default_rng(seed)
+        self.particles = ParticleSystem(rng=self.rng)
+
+        # Estado de las formas en arrays de NumPy; la ranura es la clave en el renderer
+        self.shapes = ShapeBuffer(capacity=64, lifetime=1.5)
+
+        # Ajustar estos valores para mejor rendimiento
+        self.max_shapes = 15  # Limitar número máximo de formas
+        self.particle_density = 20  # Reducir densidad de partículas
+        self.glow_layers = 3  # Capas de resplandor por círculo
+
+        # Ruedas de tonos precalculadas: elegir un color es un índice
+        self.primary_palette = hsv_palette(0.8, 0.9)
+        self.secondary_palette = hsv_palette(0.7, 0.8)
+        if palette is not None:
+            # Con una paleta propia el complementario sale de la misma paleta
+            self.primary_palette = self.secondary_palette = palette
+
+        # Formas en cada ataque (o en cada tick) y más grandes en los pulsos
+        self.trigger = SpawnTrigger(spawn_mode)
+        self.beat_boost = 1.5
+
+    @staticmethod
+    def create_renderer(kind, canvas, width, height):
+        """Renderer adecuado para esta escena (``canvas`` es None fuera de Tk)"""
+        if kind == 'raster':
+            return RasterRenderer(width, height, canvas=canvas)
+        renderer = CanvasRenderer(canvas)
+        renderer.preallocate(ovals=64, polygons=256, lines=128)
+        return renderer
+
+    @property
+    def memory(self):
+        """Segundos que un tick sigue influyendo en lo que se ve (vida de las formas)"""
+        return self.shapes.lifetime
+
+    def configure_channels(self, channels):
+        """Con varios canales, más formas a la vez"""
+        self.max_shapes = max(15, 3 * channels) if channels else 15
+
+    def reseed(self, *key):
+        """Reinicia el generador a partir de una clave (p. ej. semilla e índice de frame)"""
+        self.rng = np.random.default_rng(list(key))
+        self.particles.rng = self.rng
+
+    def create_particle_effect(self, prims, x, y, size, color, noise_density=0.3):
+        """Versión optimizada del efecto de partículas"""
+        # Todas las partículas se generan en un lote vectorizado
+        particles = self.particles.burst(x, y, size, self.particle_density, noise_density)
+        if particles:
+            prims.append(('points', particles, color, 0.5))
+
+    def create_particle_clusters(self, prims, xs, ys, sizes, color, noise_density=0.3):
+        """Varias nubes de partículas generadas en un solo lote"""
+        for particles in self.particles.clusters(xs, ys, sizes, self.particle_density, noise_density):
+            prims.append(('points', particles, color, 0.5))
+
+    def create_glowing_circle(self, prims, x, y, size, palette, index):
+        """Versión optimizada del efecto de resplandor (color ``index`` de ``palette``)"""
+        # Reducir número de capas de resplandor. La opacidad se aplica una sola vez:
+        # el raster mezcla el color puro; el canvas solo puntea, así que recibe el tinte
+        blends = self.renderer.blends_alpha
+        for i in range(self.glow_layers):
+            expanded_size = size * (1 + i * 0.3)
+            alpha = 0.3 - (i * 0.1)
+            if blends:
+                prims.append(('oval', x, y, expanded_size, palette.hex[index], '', 1, alpha))
+            else:
+                prims.append(('oval', x, y, expanded_size, palette.tint(index, alpha), '', 1, 0.25))
+
+    def spawn_shape(self, level, dominant_freq, now, width, height, region=None, hue_shift=0.0):
+        """Crea una forma a partir del nivel y la frecuencia dominante; devuelve su color.
+
+        ``region`` (x0, y0, x1, y1) limita dónde nace la forma y ``hue_shift``
+        (fracción de vuelta) gira la paleta, para distinguir canales.
+        """
+        # Limitar número de formas activas
+        while self.shapes.count >= self.max_shapes:
+            oldest_slot = self.shapes.oldest()
+            self.shapes.kill(oldest_slot)
+            self.renderer.remove(oldest_slot)
+
+        # Crear colores más complejos: tono cuantizado a un grado
+        freq_normalized = (dominant_freq - self.low_freq) / (self.high_freq - self.low_freq)
+        primary = self.primary_palette.index(freq_normalized + hue_shift)
+        secondary = (primary + len(self.secondary_palette) // 2) % len(self.secondary_palette)  # Complementario
+
+        primary_color = self.primary_palette.hex[primary]
+        secondary_color = self.secondary_palette.hex[secondary]
+
+        # Calcular tamaños y parámetros basados en el audio
+        base_size = max(20, int(level / 10))
+
+        # Posición central aleatoria
+        x0, y0, x1, y1 = region if region is not None else (0, 0, width, height)
+        x_center = int(self.rng.integers(x0, max(x0 + 1, x1)))
+        y_center = int(self.rng.integers(y0, max(y0 + 1, y1)))
+
+        # Seleccionar tipo de forma aleatoria
+        shape_type = self.rng.choice([
+            'glow_circle',
+            'particle_cloud',
+            'striped_circle',
+            'noise_sphere'
+        ], p=[0.3, 0.3, 0.2, 0.2])
+
+        # Generar movimiento más complejo (mover esto ANTES de crear las formas)
+        angle = self.rng.uniform(0, 2*np.pi)
+        speed = self.rng.uniform(2, 5)
+        dx = speed * np.cos(angle)
+        dy = speed * np.sin(angle)
+
+        # Primitivas de la forma, relativas a su centro (principal primero)
+        prims = []
+
+        if shape_type == 'glow_circle':
+            # Crear el círculo principal
+            prims.append(('oval', 0, 0, base_size, primary_color, '', 1, 1.0))
+            self.create_glowing_circle(prims, 0, 0, base_size, self.primary_palette, primary)
+            self.create_particle_effect(prims, 0, 0, base_size/2, secondary_color)
+
+        elif shape_type == 'particle_cloud':
+            # Crear un círculo con un grupo de partículas alrededor
+            prims.append(('oval', 0, 0, base_size/2, primary_color, '', 1, 1.0))
+            offset_x, offset_y = self.particles.scatter(0, 0, 5, base_size/3)
+            self.create_particle_clusters(prims, offset_x, offset_y, np.full(5, base_size/3), primary_color)
+
+        elif shape_type == 'striped_circle':
+            # Crear el círculo principal con líneas
+            prims.append(('oval', 0, 0, base_size, '', primary_color, 2, 1.0))
+            for i in range(0, 360, 20):
+                angle = math.radians(i)
+                x1 = base_size * math.cos(angle)
+                y1 = base_size * math.sin(angle)
+                prims.append(('line', [0, 0, x1, y1], primary_color, 2, 0.5, False))
+            self.create_glowing_circle(prims, 0, 0, base_size/2, self.secondary_palette, secondary)
+
+        elif shape_type == 'noise_sphere':
+            # Crear la esfera principal
+            prims.append(('oval', 0, 0, base_size/2, primary_color, '', 1, 1.0))
+            # 50 nubes alrededor de la esfera, generadas en un solo lote
+            xs, ys, sizes = self.particles.sphere(0, 0, base_size/2, 50, (2, 6))
+            self.create_particle_clusters(prims, xs, ys, sizes, primary_color, noise_density=0.5)
+
+        # Verificar que la forma tiene primitivas antes de añadirla
+        if prims:
+            # Radio del círculo principal, usado para los rebotes sin consultar bbox
+            shape_radius = base_size if shape_type in ('glow_circle', 'striped_circle') else base_size / 2
+            slot = self.shapes.spawn(
+                x_center, y_center, dx, dy, shape_radius, now,
+                rotation=self.rng.uniform(-5, 5),
+                scale_dir=self.rng.choice([-1, 1])
+            )
+            self.renderer.add(slot, x_center, y_center, prims)
+
+        return primary_color
+
+    def react(self, level, dominant_freq, rhythm, now, width, height, layout=None):
+        """Crea formas según ``rhythm`` (``AudioAnalysis.rhythm``); devuelve el color o None.
+
+        Con ``layout`` los niveles, frecuencias y ataques son por canal.
+        """
+        if layout is not None:
+            return self.spawn_channels(layout, self.trigger.active(level, rhythm.onsets), dominant_freq,
+                                       now, width, height)
+        if not self.trigger(level, rhythm.onsets, now):
+            return None
+        if rhythm.beats and self.trigger.mode == 'onset':
+            level = level * self.beat_boost
+        return self.spawn_shape(level, dominant_freq, now, width, height)
+
+    def spawn_channels(self, layout, levels, dominant_freqs, now, width, height):
+        """Una forma por cada canal elegido por ``layout``, en su región y con su paleta.
+
+        Devuelve el color del canal más fuerte, o None si ninguno supera el umbral.
+        """
+        color = None
+        loudest = int(np.argmax(levels))
+        for channel in layout.pick(levels):
+            c = self.spawn_shape(levels[channel], dominant_freqs[channel], now, width, height,
+                                 region=layout.region(channel, width, height),
+                                 hue_shift=layout.hue_shift(channel))
+            if channel == loudest or color is None:
+                color = c
+        return color
+
+    def move_shapes(self, now, width, height, dt=1.0):
+        """Avanza todas las formas ``dt`` ticks y envía el resultado al renderer"""
+        # Movimiento, rebotes, escala y caducidad en un solo paso vectorizado
+        slots, dx, dy, ratio, expired = self.shapes.step(now, width, height, dt)
+
+        # Retirar del renderer las formas caducadas
+        for slot in expired.tolist():
+            self.renderer.remove(slot)
+
+        # Enviar al renderer solo el resultado: posición y escala de cada forma
+        self.renderer.update(slots.tolist(), self.shapes.x[slots].tolist(),
+                             self.shapes.y[slots].tolist(), self.shapes.scale[slots].tolist())
+
+    def update(self, level, dominant_freq, now, width, height, dt=1.0):
+        """Un tick completo: crea una forma, mueve todas y presenta el frame"""
+        primary_color = self.spawn_shape(level, dominant_freq, now, width, height)
+        self.move_shapes(now, width, height, dt)
+        self.renderer.present()
+        return primary_color
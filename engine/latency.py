@@ -0,0 +1,112 @@
+"""Medida de la latencia de extremo a extremo con clics sintéticos en la entrada"""
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+
+class LatencyProbe:
+    """Suma clics a la entrada y mide cuánto tardan en convertirse en píxeles.
+
+    La fuente llama a ``inject`` con cada bloque recién capturado y la hora
+    (reloj monótono) de su primera muestra; cada ``interval`` segundos se suma
+    un clic breve y se anota la hora de su primera muestra. La ventana llama a
+    ``detected`` en el tick cuyo análisis ve un ataque y a ``presented`` cuando
+    el frame con la forma resultante ya se ha dibujado. Cada clic se empareja
+    con el primer ataque que llega en menos de ``max_latency`` segundos; los
+    demás cuentan como perdidos.
+
+    Lo medido va de la muestra en la fuente (el ADC, si el driver lo informa)
+    a la entrega del frame a Tk; no incluye el compositor ni la pantalla.
+    """
+
+    def __init__(self, rate, interval=1.0, amplitude=16000, freq=1500.0, duration=0.01, max_latency=0.5,
+                 clock=time.monotonic):
+        self.rate = rate
+        self.interval = interval
+        self.max_latency = max_latency
+        self.clock = clock
+        n = max(1, int(duration * rate))
+        self.click = amplitude * np.hanning(n) * np.sin(2 * np.pi * freq * np.arange(n) / rate)
+        self.next_click = None
+        self._tail = self.click[:0]  # Resto de un clic que no cupo en el bloque anterior
+        self.pending = deque()  # Horas de los clics aún sin detectar
+        self.records = []  # (clic, detectado, presentado) en segundos del reloj monótono
+        self.missed = 0
+        self._detected = None
+
+    def inject(self, block, first_time):
+        """Suma los clics que caen en ``block`` ((muestras,) o (muestras, canales)); devuelve el bloque"""
+        n = len(block)
+        if n == 0:
+            return block
+        if self.next_click is None:
+            self.next_click = first_time + self.interval
+        end_time = first_time + n / self.rate
+        if not len(self._tail) and self.next_click >= end_time:
+            return block
+
+        out = block.astype(np.float64)
+        if len(self._tail):
+            self._add(out, 0, self._tail)
+        while self.next_click < end_time:
+            offset = max(0, int(np.ceil((self.next_click - first_time) * self.rate)))
+            self.pending.append(first_time + offset / self.rate)
+            self._add(out, offset, self.click)
+            self.next_click += self.interval
+        if np.issubdtype(block.dtype, np.integer):
+            info = np.iinfo(block.dtype)
+            return np.clip(np.round(out), info.min, info.max).astype(block.dtype)
+        return out
+
+    def _add(self, out, offset, click):
+        n = min(len(click), len(out) - offset)
+        segment = click[:n] if out.ndim == 1 else click[:n, None]
+        out[offset:offset + n] += segment
+        self._tail = click[n:]
+
+    def detected(self, now=None):
+        """El análisis de este tick ha visto un ataque"""
+        now = self.clock() if now is None else now
+        # Clics demasiado antiguos: su ataque no se detectó
+        while self.pending and now - self.pending[0] > self.max_latency:
+            self.pending.popleft()
+            self.missed += 1
+        if self.pending and self.pending[0] <= now and self._detected is None:
+            self._detected = (self.pending.popleft(), now)
+
+    def presented(self, now=None):
+        """El frame de este tick ya está dibujado"""
+        if self._detected is not None:
+            self.records.append(self._detected + (self.clock() if now is None else now,))
+            self._detected = None
+
+    def summary(self):
+        """Percentiles en ms de la latencia total y de sus dos tramos"""
+        result = {'clicks': len(self.records), 'missed': self.missed}
+        if not self.records:
+            return result
+        click, detect, present = np.array(self.records).T
+        for name, values in (('total', present - click), ('input_analysis', detect - click),
+                             ('render', present - detect)):
+            ms = values * 1e3
+            result[name] = {'p50': float(np.percentile(ms, 50)), 'p95': float(np.percentile(ms, 95)),
+                            'max': float(ms.max())}
+        return result
+
+    def status_text(self):
+        s = self.summary()
+        if 'total' not in s:
+            return f"Latencia: esperando clics ({s['missed']} perdidos)"
+        total = s['total']
+        return (f"Latencia {total['p50']:5.1f} ms p50  {total['p95']:5.1f} p95  "
+                f"(entrada+análisis {s['input_analysis']['p50']:.1f}, render {s['render']['p50']:.1f}; "
+                f"{s['clicks']} clics)")
+
+    def export(self, path, **settings):
+        """Guarda en JSON las marcas de tiempo de cada clic, el resumen y la configuración"""
+        with open(path, 'w') as f:
+            json.dump({'settings': settings, 'summary': self.summary(),
+                       'records': [dict(click=c, detected=d, presented=p) for c, d, p in self.records]},
+                      f, indent=2)
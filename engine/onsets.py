@@ -0,0 +1,192 @@
+"""Energía suavizada por banda, flujo espectral y detección de ataques y pulsos"""
+from collections import namedtuple
+
+import numpy as np
+
+Rhythm = namedtuple('Rhythm', 'bands flux onsets beats tempo')
+
+
+class OnsetDetector:
+    """Sigue las energías por banda de cada análisis (cada ``hop`` muestras).
+
+    - ``smoothed``: energía por banda con ataque rápido y caída lenta.
+    - ``flux``: subida media de la energía en escala logarítmica (flujo
+      espectral rectificado); no depende del volumen absoluto.
+    - Ataque: máximo local del flujo por encima de un umbral adaptativo
+      (media + ``sensitivity`` desviaciones del último ``window`` segundos),
+      con al menos ``min_interval`` segundos entre ataques.
+    - Tempo: pico de la autocorrelación del flujo de los últimos
+      ``tempo_window`` segundos, entre ``bpm_range``.
+    - Pulso: ataque que cae a un periodo (±``tolerance``) de otro ataque
+      reciente, es decir, que encaja con el tempo.
+
+    El estado se olvida en unos ``memory`` segundos: dos detectores que
+    arrancan en puntos distintos del mismo audio coinciden pasado ese tiempo.
+    Con ``channels`` las energías son (bandas, canales) y cada canal se sigue
+    por separado en un solo lote.
+    """
+
+    def __init__(self, frame_rate, bands, channels=None, attack=0.6, release=0.1, window=1.0,
+                 sensitivity=1.5, delta=0.07, min_interval=0.1, tempo_window=4.0, bpm_range=(60, 200),
+                 tolerance=0.15, floor=1e7):
+        self.frame_rate = frame_rate  # Análisis por segundo (rate / hop)
+        self.bands = bands
+        self.channels = channels
+        self._extra = () if channels is None else (channels,)
+        self.attack = attack
+        self.release = release
+        self.sensitivity = sensitivity
+        self.delta = delta  # Flujo mínimo para un ataque (log10), evita disparos en silencio
+        self.tolerance = tolerance
+        self.floor = floor  # Potencia bajo la que la escala log es plana (~10 en escala int16)
+
+        self.window = max(3, int(round(window * frame_rate)))
+        self.min_gap = max(1, int(round(min_interval * frame_rate)))
+        self.history = max(self.window, int(round(tempo_window * frame_rate)))
+        self.min_lag = int(round(frame_rate * 60 / bpm_range[1]))
+        self.max_lag = min(self.history // 2, int(round(frame_rate * 60 / bpm_range[0])))
+        self.memory = (self.history + self.max_lag) / frame_rate
+        self.reset()
+
+    def reset(self, position=0):
+        """Vacía el estado; ``position`` es el número de análisis ya hechos del flujo"""
+        self.position = position  # Absoluta: fija en qué análisis se reestima el tempo
+        shape = (self.bands,) + self._extra
+        self.smoothed = np.zeros(shape)
+        self._log = None
+        # Historia circular duplicada: los últimos ``n`` valores son siempre un corte contiguo
+        self._flux = np.zeros((2 * self.history,) + self._extra)
+        self._onset_at = np.zeros((self.history,) + self._extra, dtype=bool)
+        self.count = 0
+        self.flux = self._scalar()
+        self.period = self._scalar()  # Periodo del tempo en análisis; 0 si no hay tempo claro
+        self.onsets = np.zeros(self._extra, dtype=np.int64)
+        self.beats = np.zeros(self._extra, dtype=np.int64)
+        self._last_onset = np.full(self._extra, -self.history)
+
+    def _scalar(self):
+        return np.zeros(self._extra)
+
+    def _recent(self, n):
+        """Últimos ``n`` valores de flujo, del más antiguo al más reciente"""
+        end = self.count % self.history + self.history
+        return self._flux[end - n:end]
+
+    def update(self, energies):
+        """Añade las energías por banda de un análisis"""
+        rate = np.where(energies > self.smoothed, self.attack, self.release)
+        self.smoothed += rate * (energies - self.smoothed)
+
+        log = np.log10(energies + self.floor)
+        if self._log is None:
+            self._log = log
+        flux = np.maximum(log - self._log, 0.0).mean(axis=0)
+        self._log = log
+
+        i = self.count % self.history
+        self._flux[i] = self._flux[i + self.history] = flux
+        self._onset_at[i] = False
+        self.count += 1
+        self.position += 1
+        self.flux = flux
+        if self.count < self.window:
+            return
+
+        # El tempo cambia despacio: reestimarlo cada ``min_lag`` análisis basta
+        if self.count >= self.history and self.position % self.min_lag == 0:
+            self.estimate_tempo()
+
+        # Máximo local en el análisis anterior (un salto de latencia) sobre el umbral;
+        # el umbral solo se calcula si hay candidato, que es lo raro
+        recent = self._recent(self.window)
+        before, peak, after = recent[-3], recent[-2], recent[-1]
+        t = self.count - 2
+        candidate = (peak > self.delta) & (peak > before) & (peak >= after) & (t - self._last_onset >= self.min_gap)
+        if not np.any(candidate):
+            return
+        threshold = recent.mean(axis=0) + self.sensitivity * recent.std(axis=0) + self.delta
+        onset = candidate & (peak > threshold)
+        self._last_onset = np.where(onset, t, self._last_onset)
+        self._onset_at[t % self.history] = onset
+        self.onsets += onset
+        if np.any(onset):
+            self.beats += onset & self._on_grid(t)
+
+    def _on_grid(self, t):
+        # ¿Hubo otro ataque a un periodo (con tolerancia) de este?
+        if not np.any(self.period):
+            return np.zeros(self._extra, dtype=bool)
+        period = np.asarray(self.period)
+        width = np.maximum(1, np.round(period * self.tolerance)).astype(int)
+        hit = np.zeros(self._extra, dtype=bool)
+        for offset in range(-int(width.max()), int(width.max()) + 1):
+            lag = np.round(period).astype(int) + offset
+            ok = (period > 0) & (np.abs(offset) <= width) & (lag < self.history)
+            idx = (t - np.where(ok, lag, 0)) % self.history
+            if self.channels is None:
+                hit |= ok & self._onset_at[idx]
+            else:
+                hit |= ok & self._onset_at[idx, np.arange(self.channels)]
+        return hit
+
+    def estimate_tempo(self):
+        """Periodo dominante del flujo por autocorrelación (FFT) de la historia"""
+        x = self._recent(self.history)
+        x = x - x.mean(axis=0)
+        n = 2 * self.history
+        spectrum = np.fft.rfft(x, n=n, axis=0)
+        acf = np.fft.irfft(spectrum * spectrum.conj(), n=n, axis=0)[:self.max_lag + 1]
+        lags = acf[self.min_lag:]
+        best = self.min_lag + np.argmax(lags, axis=0)
+        strength = np.take_along_axis(lags, np.expand_dims(best - self.min_lag, 0), axis=0)[0]
+        # Sin periodicidad clara, o con un flujo casi plano (tono, silencio), no hay tempo
+        clear = (strength > 0.2 * acf[0]) & (acf[0] > self.history * (self.delta / 2) ** 2)
+        self.period = np.where(clear, best, 0.0)
+
+    @property
+    def tempo(self):
+        """Tempo estimado en BPM (0 si no hay)"""
+        period = np.asarray(self.period, dtype=np.float64)
+        return np.divide(60.0 * self.frame_rate, period, out=np.zeros_like(period), where=period > 0)
+
+    def take(self):
+        """Estado actual con los ataques y pulsos acumulados desde la llamada anterior"""
+        onsets, beats = self.onsets, self.beats
+        self.onsets = np.zeros_like(onsets)
+        self.beats = np.zeros_like(beats)
+        if self.channels is None:
+            return Rhythm(self.smoothed, float(self.flux), int(onsets), int(beats), float(self.tempo))
+        return Rhythm(self.smoothed, self.flux, onsets, beats, self.tempo)
+
+
+SPAWN_MODES = ('onset', 'tick')
+
+
+class SpawnTrigger:
+    """Decide cuándo crear una forma o un trazo a partir del ritmo.
+
+    En modo ``onset`` se crea uno por cada tick con ataques, y si suena algo
+    sin ataques (una nota sostenida, por encima de ``gate``) uno cada
+    ``idle_interval`` segundos para que la escena no se vacíe. En modo
+    ``tick`` se crea uno por tick, como antes del detector.
+    """
+
+    def __init__(self, mode='onset', idle_interval=0.5, gate=50.0):
+        if mode not in SPAWN_MODES:
+            raise ValueError(f"Modo desconocido: {mode!r} (opciones: {', '.join(SPAWN_MODES)})")
+        self.mode = mode
+        self.idle_interval = idle_interval
+        self.gate = gate
+        self.last = -np.inf
+
+    def __call__(self, level, onsets, now):
+        if self.mode == 'tick' or onsets or (level >= self.gate and now - self.last >= self.idle_interval):
+            self.last = now
+            return True
+        return False
+
+    def active(self, levels, onsets):
+        """Niveles por canal con cero en los canales sin ataque (para ``ChannelLayout.pick``)"""
+        if self.mode == 'tick':
+            return levels
+        return np.where(onsets > 0, levels, 0.0)
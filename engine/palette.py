@@ -0,0 +1,89 @@
+"""Paletas precalculadas: colores listos para Tk y arrays RGB, indexados por posición.
+
+Una paleta se construye una vez (y se cachea) y guarda por cada color su
+cadena ``'#rrggbb'``, su RGB y sus tintes, es decir, el color mezclado con el
+fondo a ``alpha_steps`` niveles de opacidad. Elegir o aclarar un color en
+cada frame es así un acceso a una lista, sin ``colorsys`` ni formateo de
+cadenas.
+"""
+import argparse
+import colorsys
+import re
+from functools import lru_cache
+
+import numpy as np
+
+HUE_STEPS = 360  # Un color por grado de tono
+ALPHA_STEPS = 20  # Tintes en pasos de 0.05 de opacidad
+HEX_COLOR = re.compile(r'#[0-9a-fA-F]{6}')
+
+
+def to_hex(rgb):
+    return '#{:02x}{:02x}{:02x}'.format(int(rgb[0]), int(rgb[1]), int(rgb[2]))
+
+
+@lru_cache(maxsize=4096)
+def rgb_array(color):
+    """``'#rrggbb'`` -> array RGB float32 de solo lectura (None para ``''``), cacheado"""
+    if not color:
+        return None
+    rgb = np.array([int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)], dtype=np.float32)
+    rgb.flags.writeable = False
+    return rgb
+
+
+class Palette:
+    """Lista fija de colores con sus cadenas de Tk, RGB y tintes precalculados.
+
+    ``hex[i]`` es la cadena del color ``i`` y ``rgb[i]`` su RGB (uint8).
+    ``tint(i, alpha)`` da el color mezclado con ``background`` a la opacidad
+    ``alpha``, redondeada a ``1 / alpha_steps``.
+    """
+
+    def __init__(self, colors, background=(255, 255, 255), alpha_steps=ALPHA_STEPS):
+        self.rgb = np.array([rgb_array(c) if isinstance(c, str) else c for c in colors], dtype=np.uint8)
+        self.rgb.flags.writeable = False
+        self.hex = [to_hex(c) for c in self.rgb]
+        self.alpha_steps = alpha_steps
+
+        # tints[k][i]: color i con opacidad k / alpha_steps sobre el fondo
+        levels = np.arange(alpha_steps + 1)[:, None, None] / alpha_steps
+        mixed = self.rgb[None] * levels + np.asarray(background, dtype=np.float64) * (1 - levels)
+        self.tints = [[to_hex(c) for c in row] for row in mixed.astype(np.int64)]
+
+    def __len__(self):
+        return len(self.hex)
+
+    def tint(self, index, alpha):
+        return self.tints[int(round(alpha * self.alpha_steps))][index]
+
+    def index(self, fraction):
+        """Índice del color en la posición ``fraction`` (0 a 1, da la vuelta) de la paleta"""
+        return int(round(fraction * len(self.hex))) % len(self.hex)
+
+
+@lru_cache(maxsize=16)
+def hsv_palette(saturation, value, steps=HUE_STEPS):
+    """Rueda de tonos con saturación y brillo fijos, de ``steps`` colores"""
+    colors = []
+    for i in range(steps):
+        r, g, b = colorsys.hsv_to_rgb(i / steps, saturation, value)
+        colors.append((int(r * 255), int(g * 255), int(b * 255)))
+    return Palette(colors)
+
+
+@lru_cache(maxsize=16)
+def custom_palette(colors):
+    """Paleta de colores a medida: tupla de ``(r, g, b)`` o de cadenas ``'#rrggbb'``"""
+    return Palette(colors)
+
+
+def parse_palette(text):
+    """``'#ff6347,#1e90ff'`` -> paleta cacheada (para opciones de línea de comandos)"""
+    colors = tuple(c.strip() for c in text.split(',') if c.strip())
+    if not colors:
+        raise argparse.ArgumentTypeError("La paleta necesita al menos un color (formato #rrggbb)")
+    for c in colors:
+        if not HEX_COLOR.fullmatch(c):
+            raise argparse.ArgumentTypeError(f"Color no válido: {c!r} (formato #rrggbb)")
+    return custom_palette(colors)
@@ -0,0 +1,69 @@
+"""Sistema de partículas por lotes con un generador aleatorio sembrable"""
+import numpy as np
+
+
+class ParticleSystem:
+    """Genera nubes de partículas completas con una llamada a ``Generator`` por atributo.
+
+    Cada partícula es un par de vértices ``(x-1, y-1, x+1, y+1)`` del polígono
+    de su nube, igual que en el efecto original. Con la misma semilla las
+    nubes generadas son idénticas entre ejecuciones.
+    """
+
+    def __init__(self, seed=None, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+
+    def clusters(self, xs, ys, sizes, max_particles, density):
+        """Genera varias nubes a la vez.
+
+        Devuelve una lista de coordenadas planas, una por nube que conserve al
+        menos una partícula tras aplicar la máscara de densidad.
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        sizes = np.asarray(sizes, dtype=np.float64)
+        counts = np.clip((sizes * 5).astype(np.int64), 0, max_particles)
+        owner = np.repeat(np.arange(len(xs)), counts)
+        total = len(owner)
+        if total == 0:
+            return []
+
+        size = sizes[owner]
+        angle = self.rng.uniform(0, 2 * np.pi, total)
+        distance = self.rng.normal(size / 2, size / 4)
+        keep = self.rng.random(total) < density
+
+        owner = owner[keep]
+        distance = distance[keep]
+        angle = angle[keep]
+        px = xs[owner] + distance * np.cos(angle)
+        py = ys[owner] + distance * np.sin(angle)
+
+        coords = np.empty((len(owner), 4))
+        coords[:, 0] = px - 1
+        coords[:, 1] = py - 1
+        coords[:, 2] = px + 1
+        coords[:, 3] = py + 1
+
+        # Separar por nube (las partículas ya están agrupadas por owner)
+        kept = np.bincount(owner, minlength=len(xs))
+        bounds = np.cumsum(kept)
+        return [coords[end - n:end].ravel().tolist()
+                for n, end in zip(kept.tolist(), bounds.tolist()) if n]
+
+    def burst(self, x, y, size, max_particles, density):
+        """Una sola nube; devuelve sus coordenadas planas o None si queda vacía"""
+        clouds = self.clusters([x], [y], [size], max_particles, density)
+        return clouds[0] if clouds else None
+
+    def scatter(self, x, y, count, spread):
+        """Centros con desplazamiento normal alrededor de (x, y)"""
+        offsets = self.rng.normal(0, spread, (2, count))
+        return x + offsets[0], y + offsets[1]
+
+    def sphere(self, x, y, radius, count, size_range):
+        """Centros y tamaños de ``count`` nubes repartidas sobre una esfera de ruido"""
+        angle = self.rng.uniform(0, 2 * np.pi, count)
+        distance = self.rng.normal(radius, radius / 3, count)
+        sizes = self.rng.uniform(size_range[0], size_range[1], count)
+        return x + distance * np.cos(angle), y + distance * np.sin(angle), sizes
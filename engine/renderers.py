@@ -0,0 +1,478 @@
+"""Backends de dibujo intercambiables: items del canvas de Tk o framebuffer RGBA de NumPy.
+
+Una forma (sprite) se describe como una lista de primitivas con coordenadas
+relativas a su centro:
+
+    ('oval', ox, oy, r, fill, outline, width, alpha)
+    ('line', coords, color, width, alpha, smooth)
+    ('points', coords, color, alpha)
+
+``coords`` es una lista plana ``[x0, y0, x1, y1, ...]``; en ``points`` cada
+partícula ocupa dos vértices ``(x-1, y-1, x+1, y+1)``. Los colores son
+cadenas ``'#rrggbb'`` o ``''`` (sin relleno / sin borde) y ``alpha`` es la
+opacidad entre 0 y 1.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from engine.palette import rgb_array
+from engine.scene import CommandBuffer, ItemGroup, ItemPool, SceneManager
+
+
+def stipple_for(alpha):
+    """Aproxima la opacidad con los patrones de punteado de Tk"""
+    if alpha >= 0.75:
+        return ''
+    if alpha >= 0.375:
+        return 'gray50'
+    return 'gray25'
+
+
+def offset_coords(coords, x, y, scale=1.0):
+    points = np.asarray(coords, dtype=np.float64).reshape(-1, 2) * scale
+    points += (x, y)
+    return points.ravel().tolist()
+
+
+# Radio máximo (en píxeles) de las máscaras cacheadas: acota la memoria del caché
+MAX_CACHED_RADIUS = 128
+
+
+def disc_extent(radius_q, ring_q):
+    """Semilado en píxeles de la máscara de un círculo o anillo"""
+    outer = radius_q / 4 + (ring_q / 8 if ring_q else 0)
+    return int(np.ceil(outer))
+
+
+def disc_mask(radius_q, ring_q, alpha, xs, ys):
+    """Pesos del círculo o anillo sobre la rejilla ``ys × xs`` (offsets respecto al centro)"""
+    r = radius_q / 4
+    ring = ring_q / 4 if ring_q else None
+    outer = r if ring is None else r + ring / 2
+    d2 = xs[None, :] ** 2 + ys[:, None] ** 2
+    mask = d2 <= outer * outer
+    if ring is not None:
+        mask &= d2 >= max(r - ring / 2, 0) ** 2
+    return mask.astype(np.float32) * np.float32(alpha)
+
+
+@lru_cache(maxsize=1024)
+def disc_weights(radius_q, ring_q, alpha):
+    """Pesos (opacidad por píxel) de un círculo o anillo centrado en un píxel.
+
+    Radio y grosor van cuantizados a 1/4 de píxel para que las formas, que
+    cambian poco de tamaño entre frames, reutilicen la misma máscara.
+    """
+    n = disc_extent(radius_q, ring_q)
+    d = np.arange(-n, n + 1, dtype=np.float32)
+    return n, disc_mask(radius_q, ring_q, alpha, d, d)
+
+
+class Renderer:
+    """Interfaz común de los backends.
+
+    ``add``/``remove``/``update`` manejan formas móviles identificadas por una
+    clave; ``stamp`` dibuja primitivas fijas que el backend conserva hasta que
+    caducan; ``present`` termina el frame. ``blends_alpha`` indica si el
+    backend mezcla con la opacidad real; si no, los colores translúcidos deben
+    llegar ya teñidos hacia el fondo.
+    """
+
+    blends_alpha = False
+
+    def add(self, key, x, y, primitives):
+        raise NotImplementedError
+
+    def remove(self, key):
+        raise NotImplementedError
+
+    def update(self, keys, xs, ys, scales):
+        raise NotImplementedError
+
+    def stamp(self, x, y, primitives):
+        raise NotImplementedError
+
+    def present(self):
+        pass
+
+
+class CanvasRenderer(Renderer):
+    """Backend original: cada primitiva es un item del canvas de Tk.
+
+    Las formas son grupos de items con un tag común, reciclados desde un
+    ItemPool; los trazos fijos pasan por un SceneManager con presupuesto y
+    caducidad. Con ``batch`` todo pasa por un ``CommandBuffer`` y cada frame
+    llega a Tcl en una sola llamada en ``present``.
+    """
+
+    def __init__(self, canvas, stamp_budget=3000, stamp_lifetime=None, batch=True):
+        self.commands = CommandBuffer(canvas) if batch else None
+        if batch:
+            canvas = self.commands
+        self.canvas = canvas
+        self.pool = ItemPool(canvas)
+        self.scene = SceneManager(canvas, budget=stamp_budget, max_age=stamp_lifetime)
+        self.sprites = {}  # clave -> [grupo, x, y, escala]
+
+    def preallocate(self, ovals=0, polygons=0, lines=0):
+        self.pool.preallocate('oval', ovals)
+        self.pool.preallocate('polygon', polygons)
+        self.pool.preallocate('line', lines)
+
+    def add(self, key, x, y, primitives):
+        group = ItemGroup(self.pool, f'sprite{key}')
+        for kind, coords, options in self._items(x, y, primitives):
+            group.add(kind, coords, **options)
+        self.sprites[key] = [group, x, y, 1.0]
+
+    def remove(self, key):
+        self.sprites.pop(key)[0].release()
+
+    def update(self, keys, xs, ys, scales):
+        for key, x, y, scale in zip(keys, xs, ys, scales):
+            sprite = self.sprites[key]
+            group, old_x, old_y, old_scale = sprite
+            group.move(x - old_x, y - old_y)
+            if scale != old_scale:
+                ratio = scale / old_scale
+                self.canvas.scale(group.tag, x, y, ratio, ratio)
+            sprite[1:] = (x, y, scale)
+
+    def stamp(self, x, y, primitives):
+        for kind, coords, options in self._items(x, y, primitives):
+            self.scene.add(kind, coords, **options)
+
+    def _items(self, x, y, primitives):
+        """Traduce primitivas a (tipo de item, coordenadas absolutas, opciones completas)"""
+        for prim in primitives:
+            kind = prim[0]
+            if kind == 'oval':
+                _, ox, oy, r, fill, outline, width, alpha = prim
+                cx, cy = x + ox, y + oy
+                yield 'oval', (cx - r, cy - r, cx + r, cy + r), dict(
+                    fill=fill, outline=outline, width=width, stipple=stipple_for(alpha))
+            elif kind == 'line':
+                _, coords, color, width, alpha, smooth = prim
+                yield 'line', offset_coords(coords, x, y), dict(
+                    fill=color, width=width, stipple=stipple_for(alpha), smooth=smooth)
+            elif kind == 'points':
+                _, coords, color, alpha = prim
+                yield 'polygon', offset_coords(coords, x, y), dict(
+                    fill=color, outline='', stipple=stipple_for(alpha))
+
+    def present(self):
+        if self.commands is not None:
+            self.commands.end_frame()
+
+
+class RasterRenderer(Renderer):
+    """Compone todo en un framebuffer de NumPy con mezcla alfa real y estelas.
+
+    Cada frame el contenido anterior decae hacia el fondo (``trail``) y se
+    dibujan encima las formas vivas; los ``stamp`` se pintan una sola vez y se
+    desvanecen con la estela. Sin ``canvas`` funciona sin pantalla (benchmarks,
+    render offline).
+
+    El coste no está acotado por los píxeles del frame: crece con el área que
+    cubren los círculos y con el número de partículas, así que con formas que
+    se solapan es lineal en el número de formas.
+
+    El framebuffer guarda valores enteros y la estela trunca hacia el fondo, de
+    modo que un píxel vuelve exactamente al fondo tras un número finito de frames.
+    Va por planos (3, alto, ancho): las máscaras y opacidades por píxel se
+    aplican a los tres canales sin difundir sobre un eje de tamaño 3, que en
+    NumPy es varias veces más lento.
+    """
+
+    blends_alpha = True
+
+    def __init__(self, width, height, background='#ffffff', trail=0.85, canvas=None):
+        self.background = self.parse_color(background)
+        self.trail = trail
+        self.canvas = canvas
+        self.sprites = {}  # clave -> [x, y, escala, primitivas]
+        self._points = []  # Partículas pendientes del frame actual
+        self._photo = None
+        self._image_item = None
+        self.resize(width, height)
+
+    @staticmethod
+    def parse_color(color):
+        # Cacheado en palette.py: cada color se convierte una sola vez; columna (3, 1, 1) por planos
+        rgb = rgb_array(color)
+        return None if rgb is None else rgb[:, None, None]
+
+    def resize(self, width, height):
+        self.width = max(1, int(width))
+        self.height = max(1, int(height))
+        self.fb = np.empty((3, self.height, self.width), dtype=np.float32)
+        self.fb[:] = self.background
+        self._diff = np.empty_like(self.fb)
+        self._rgb = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+    def add(self, key, x, y, primitives):
+        self.sprites[key] = [x, y, 1.0, self._prepare(primitives)]
+
+    def remove(self, key):
+        del self.sprites[key]
+
+    def update(self, keys, xs, ys, scales):
+        for key, x, y, scale in zip(keys, xs, ys, scales):
+            self.sprites[key][:3] = (x, y, scale)
+
+    def stamp(self, x, y, primitives):
+        self._draw(x, y, 1.0, self._prepare(primitives))
+        self._flush_points()
+
+    def _prepare(self, primitives):
+        """Convierte colores y coordenadas a arrays una sola vez por forma.
+
+        Todas las partículas de la forma se fusionan en un único bloque de
+        centros, colores y opacidades.
+        """
+        prepared = []
+        centers, colors, alphas = [], [], []
+        for prim in primitives:
+            kind = prim[0]
+            if kind == 'oval':
+                _, ox, oy, r, fill, outline, width, alpha = prim
+                layers = []
+                if fill:
+                    layers.append((r, None, self.parse_color(fill), alpha))
+                if outline:
+                    layers.append((r, width, self.parse_color(outline), alpha))
+                last = prepared[-1] if prepared else None
+                if last is not None and last[0] == 'discs' and last[1:3] == (ox, oy):
+                    # Óvalos concéntricos seguidos (círculo y resplandores): una sola pila
+                    last[3].extend(layers)
+                elif layers:
+                    prepared.append(('discs', ox, oy, layers))
+            elif kind == 'line':
+                _, coords, color, width, alpha, smooth = prim
+                points = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+                if smooth and len(points) == 3:
+                    points = self._quadratic(points)
+                prepared.append((kind, points, self.parse_color(color), width, alpha))
+            elif kind == 'points':
+                _, coords, color, alpha = prim
+                quads = np.asarray(coords, dtype=np.float64).reshape(-1, 4)
+                centers.append(np.column_stack(((quads[:, 0] + quads[:, 2]) / 2,
+                                                (quads[:, 1] + quads[:, 3]) / 2)))
+                colors.append(np.broadcast_to(rgb_array(color), (len(quads), 3)))
+                alphas.append(np.full(len(quads), alpha, dtype=np.float32))
+        if centers:
+            prepared.append(('points', np.concatenate(centers), np.concatenate(colors),
+                             np.concatenate(alphas)[:, None]))
+        return prepared
+
+    @staticmethod
+    def _quadratic(points, steps=12):
+        # Curva suavizada de Tk con tres puntos: Bézier cuadrática entre los extremos
+        t = np.linspace(0, 1, steps)[:, None]
+        return (1 - t) ** 2 * points[0] + 2 * (1 - t) * t * points[1] + t ** 2 * points[2]
+
+    def fade_frames(self):
+        """Frames tras los que cualquier píxel ha vuelto exactamente al fondo (``trail`` < 1).
+
+        La estela trunca una diferencia entera con el fondo, que baja al menos
+        1 por frame: como mucho 255 frames, menos cuanto menor es ``trail``.
+        Se simula con la misma aritmética que ``render``.
+        """
+        diff = np.full(1, 255, dtype=np.float32)
+        for frames in range(1, 256):
+            diff *= self.trail
+            np.trunc(diff, out=diff)
+            if diff[0] == 0:
+                return frames
+        return 255
+
+    def render(self):
+        """Aplica la estela y compone las formas vivas sobre el framebuffer"""
+        np.subtract(self.fb, self.background, out=self._diff)
+        self._diff *= self.trail
+        np.trunc(self._diff, out=self._diff)
+        np.add(self._diff, self.background, out=self.fb)
+
+        for x, y, scale, prepared in self.sprites.values():
+            self._draw(x, y, scale, prepared)
+        self._flush_points()
+        np.rint(self.fb, out=self.fb)
+
+    def frame(self):
+        """Frame actual como array RGB uint8 (alto, ancho, 3)"""
+        for channel in range(3):
+            np.copyto(self._rgb[:, :, channel], self.fb[channel], casting='unsafe')
+        return self._rgb
+
+    def present(self):
+        if self.canvas is not None:
+            width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+            if (width, height) != (self.width, self.height) and width > 1 and height > 1:
+                self.resize(width, height)
+        self.render()
+        if self.canvas is not None:
+            self._blit()
+
+    def _blit(self):
+        # El frame completo viaja a Tk como una sola imagen PPM
+        import tkinter as tk
+
+        data = b'P6 %d %d 255\n' % (self.width, self.height) + self.frame().tobytes()
+        if self._photo is None:
+            self._photo = tk.PhotoImage(master=self.canvas, data=data, format='PPM')
+            self._image_item = self.canvas.create_image(0, 0, image=self._photo, anchor='nw')
+            self.canvas.tag_lower(self._image_item)
+        else:
+            self._photo.configure(data=data, format='PPM')
+
+    def _draw(self, x, y, scale, prepared):
+        for prim in prepared:
+            kind = prim[0]
+            if kind == 'discs':
+                _, ox, oy, layers = prim
+                cx, cy = x + ox * scale, y + oy * scale
+                if len(layers) == 1:
+                    r, width, color, alpha = layers[0]
+                    self._disc(cx, cy, r * scale, width, color, alpha)
+                else:
+                    self._disc_stack(cx, cy, [(r * scale, width, color, alpha)
+                                              for r, width, color, alpha in layers])
+            elif kind == 'line':
+                _, points, color, width, alpha = prim
+                points = points * scale + (x, y)
+                for a, b in zip(points[:-1], points[1:]):
+                    self._segment(a, b, width, color, alpha)
+            elif kind == 'points':
+                # Las partículas de todas las formas se mezclan juntas en _flush_points
+                _, centers, colors, alphas = prim
+                self._points.append((centers * scale + (x, y), colors, alphas))
+
+    def _region(self, x0, y0, x1, y1):
+        x0 = max(int(np.floor(x0)), 0)
+        y0 = max(int(np.floor(y0)), 0)
+        x1 = min(int(np.ceil(x1)) + 1, self.width)
+        y1 = min(int(np.ceil(y1)) + 1, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return x0, y0, x1, y1
+
+    def _blend(self, bounds, mask, color, alpha):
+        x0, y0, x1, y1 = bounds
+        region = self.fb[:, y0:y1, x0:x1]
+        if alpha >= 1:
+            region[:, mask] = color[:, 0]
+            return
+        # Peso por píxel (0 fuera de la máscara): evita la indexación booleana
+        weight = mask.astype(np.float32)
+        weight *= alpha
+        diff = np.subtract(color, region)
+        diff *= weight
+        region += diff
+
+    def _disc(self, cx, cy, r, ring_width, color, alpha):
+        """Círculo relleno, o anillo de grosor ``ring_width``"""
+        ring_q = int(round(ring_width * 4)) if ring_width is not None else 0
+        radius_q = int(round(r * 4))
+        n = disc_extent(radius_q, ring_q)
+        cx, cy = int(round(cx)), int(round(cy))
+        x0, y0 = max(cx - n, 0), max(cy - n, 0)
+        x1, y1 = min(cx + n + 1, self.width), min(cy + n + 1, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if n > MAX_CACHED_RADIUS:
+            # Círculos grandes: por distancias, sin construir una máscara por dibujo
+            self._disc_stack(cx, cy, [(r, ring_width, color, alpha)])
+            return
+        weights = disc_weights(radius_q, ring_q, alpha)[1]
+        weights = weights[y0 - (cy - n):y1 - (cy - n), x0 - (cx - n):x1 - (cx - n)]
+        region = self.fb[:, y0:y1, x0:x1]
+        diff = np.subtract(color, region)
+        diff *= weights
+        region += diff
+
+    def _disc_stack(self, cx, cy, layers):
+        """Círculos y anillos concéntricos ``(r, grosor o None, color, alpha)`` en una pasada.
+
+        Con la distancia al centro entera (d²), cada capa cubre un intervalo
+        exacto de d², igual que ``disc_mask``. Los bordes de todas las capas
+        parten la región en pocas clases; cada clase compone sus capas en orden
+        en un factor ``A`` y un color ``B``, y el framebuffer se mezcla una vez
+        con ``fb * A + B`` en vez de una vez por capa.
+        """
+        spans, n = [], 0
+        for r, ring_width, color, alpha in layers:
+            ring_q = int(round(ring_width * 4)) if ring_width is not None else 0
+            radius_q = int(round(r * 4))
+            r = radius_q / 4
+            ring = ring_q / 4 if ring_q else None
+            outer = r if ring is None else r + ring / 2
+            inner = 0 if ring is None else max(r - ring / 2, 0)
+            spans.append((int(np.ceil(inner * inner)), int(np.floor(outer * outer)), color, alpha))
+            n = max(n, disc_extent(radius_q, ring_q))
+        cx, cy = int(round(cx)), int(round(cy))
+        x0, y0 = max(cx - n, 0), max(cy - n, 0)
+        x1, y1 = min(cx + n + 1, self.width), min(cy + n + 1, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        dx = np.arange(x0 - cx, x1 - cx, dtype=np.int32)
+        dy = np.arange(y0 - cy, y1 - cy, dtype=np.int32)
+        d2 = np.add((dy * dy)[:, None], dx * dx)
+        # Clase de cada píxel: número de bordes de capa que su d² alcanza
+        edges = sorted({e for lo, hi, _, _ in spans for e in (lo, hi + 1) if e > 0})
+        index = np.zeros(d2.shape, dtype=np.uint8)
+        reached = np.empty(d2.shape, dtype=bool)
+        for edge in edges:
+            np.greater_equal(d2, edge, out=reached)
+            index += reached
+        # Por clase: factor A y color B (por planos) de todas sus capas compuestas en orden
+        factors = np.ones(len(edges) + 1, dtype=np.float32)
+        colors = np.zeros((3, len(edges) + 1), dtype=np.float32)
+        for k, start in enumerate([0] + edges):
+            for lo, hi, color, alpha in spans:
+                if lo <= start <= hi:
+                    factors[k] *= 1 - alpha
+                    colors[:, k] = colors[:, k] * (1 - alpha) + color[:, 0, 0] * alpha
+        region = self.fb[:, y0:y1, x0:x1]
+        region *= np.take(factors, index)
+        region += np.take(colors, index, axis=1)
+
+    def _segment(self, a, b, width, color, alpha):
+        half = max(width / 2, 0.75)
+        bounds = self._region(min(a[0], b[0]) - half, min(a[1], b[1]) - half,
+                              max(a[0], b[0]) + half, max(a[1], b[1]) + half)
+        if bounds is None:
+            return
+        x0, y0, x1, y1 = bounds
+        px = np.arange(x0, x1, dtype=np.float32) + np.float32(0.5 - a[0])
+        py = np.arange(y0, y1, dtype=np.float32) + np.float32(0.5 - a[1])
+        vx, vy = b[0] - a[0], b[1] - a[1]
+        length2 = vx * vx + vy * vy
+        if length2 == 0:
+            t = np.zeros((len(py), len(px)))
+        else:
+            t = np.clip((px[None, :] * vx + py[:, None] * vy) / length2, 0, 1)
+        ex = px[None, :] - t * vx
+        ey = py[:, None] - t * vy
+        self._blend(bounds, ex * ex + ey * ey <= half * half, color, alpha)
+
+    def _flush_points(self):
+        """Mezcla de una vez todas las partículas pendientes (puntos de 2x2 píxeles)"""
+        if not self._points:
+            return
+        centers = np.concatenate([p[0] for p in self._points])
+        colors = np.tile(np.concatenate([p[1] for p in self._points]), (4, 1))
+        alphas = np.tile(np.concatenate([p[2] for p in self._points]), (4, 1))
+        self._points = []
+
+        px = np.floor(centers[:, 0]).astype(np.int64)
+        py = np.floor(centers[:, 1]).astype(np.int64)
+        px = np.concatenate((px - 1, px, px - 1, px))
+        py = np.concatenate((py - 1, py - 1, py, py))
+        inside = (px >= 0) & (px < self.width) & (py >= 0) & (py < self.height)
+        # Índices lineales sobre cada plano: mucho más baratos que el índice doble
+        pixels = py[inside] * self.width + px[inside]
+        planes = self.fb.reshape(3, -1)
+        selected = np.take(planes, pixels, axis=1)
+        selected += (colors[inside].T - selected) * alphas[inside].T
+        planes[:, pixels] = selected
@@ -0,0 +1,350 @@
+"""Escena retenida sobre el canvas: reutiliza IDs de items en lugar de crearlos"""
+import time
+from collections import deque
+
+# Procedimientos de Tcl que aplican un lote: compilados una vez, sin analizar texto en cada frame
+BATCH_PROCS = """
+namespace eval ::audio_forms {
+    proc apply {w commands} {
+        foreach command $commands { $w {*}$command }
+    }
+    proc create {w count args} {
+        set items {}
+        for {set i 0} {$i < $count} {incr i} { lappend items [$w create {*}$args] }
+        return $items
+    }
+}
+"""
+
+# Qué cambia cada orden en los items a los que llega; con ``tags`` itemconfigure cambia
+# además qué items alcanza cada tag ('members')
+ASPECTS = {
+    'coords': ('geometry',),
+    'move': ('geometry',),
+    'scale': ('geometry',),
+    'itemconfigure': ('style',),
+    'raise': ('stacking',),
+    'lower': ('stacking',),
+    'delete': ('geometry', 'style', 'stacking', 'members'),
+}
+MERGEABLE = frozenset(('coords', 'move', 'itemconfigure', 'raise', 'lower'))
+MERGE_WINDOW = 64  # Órdenes intermedias revisadas como mucho al fusionar
+
+
+def aspects_of(command):
+    op = command[0]
+    if op == 'itemconfigure' and '-tags' in command[2::2]:
+        return ASPECTS[op] + ('members',)
+    return ASPECTS[op]
+
+
+def is_item(target):
+    """Si ``target`` es el ID de un item (no un tag): dos IDs distintos nunca coinciden"""
+    return isinstance(target, int) or target.isdigit()
+
+
+class CommandBuffer:
+    """Canvas que acumula las modificaciones de un frame y las envía a Tcl de una vez.
+
+    ``coords`` (con coordenadas), ``itemconfig``, ``move``, ``scale``,
+    ``tag_raise``, ``tag_lower`` y ``delete`` se encolan; una orden con la
+    misma ``(orden, item o tag)`` que otra ya encolada se fusiona con ella
+    (movimientos sumados, opciones combinadas, coordenadas sustituidas)
+    aunque haya otras en medio, salvo si alguna de esas cambia lo mismo
+    (``ASPECTS``) en items que puedan coincidir: adelantarla cambiaría el
+    resultado. ``scale`` y ``delete`` nunca se fusionan. ``flush`` pasa la
+    cola entera a ``::audio_forms::apply`` en una sola llamada: tkinter
+    convierte las tuplas a listas de Tcl en C y los números no pasan por texto.
+    Cada orden se guarda ya como la tupla que recibe Tcl, así que ``flush``
+    no construye nada: solo una fusión rehace la orden afectada. Crear items
+    y las consultas necesitan respuesta: vacían antes la cola para respetar
+    el orden. ``round_trips`` cuenta las
+    llamadas a Tcl hechas a través del buffer.
+    """
+
+    def __init__(self, canvas, frames=60):
+        self.canvas = canvas
+        self.path = str(canvas)
+        self.tk = canvas.tk
+        self.tk.eval(BATCH_PROCS)
+        self.pending = []  # (orden del canvas, item o tag, argumentos...), tal como las recibe Tcl
+        self._open = {}  # (orden, item o tag) -> posición en pending de la última orden fusionable
+        self.round_trips = 0
+        self.commands = 0  # Órdenes enviadas, ya fusionadas
+        self.coalesced = 0  # Órdenes ahorradas al fusionar
+        self._frame_start = (0, 0)
+        self.recent = deque(maxlen=frames)  # (llamadas a Tcl, órdenes) de los últimos frames
+
+    def _queue(self, command):
+        key = command[:2]
+        position = self._open.get(key)
+        if position is not None and self._can_merge(position, command):
+            self.coalesced += 1
+            self.pending[position] = self._merge(self.pending[position], command)
+            return
+        if command[0] in MERGEABLE:
+            self._open[key] = len(self.pending)
+        self.pending.append(command)
+
+    @staticmethod
+    def _merge(queued, command):
+        op = command[0]
+        if op == 'move':
+            return op, command[1], queued[2] + command[2], queued[3] + command[3]
+        if op == 'itemconfigure':
+            # Opciones combinadas: las nuevas sustituyen a las ya encoladas
+            options = dict(zip(queued[2::2], queued[3::2]))
+            options.update(zip(command[2::2], command[3::2]))
+            return (op, command[1]) + tuple(word for pair in options.items() for word in pair)
+        return command
+
+    def _can_merge(self, position, command):
+        """Si ``command`` puede adelantarse hasta la orden igual encolada en ``position``.
+
+        Solo se revisan las órdenes de en medio, y como mucho ``MERGE_WINDOW``:
+        las repeticiones son raras y la cola normal no paga nada por ellas.
+        """
+        later = self.pending[position + 1:]
+        if len(later) > MERGE_WINDOW:
+            return False
+        op, target = command[:2]
+        aspects = aspects_of(command)
+        item = is_item(target)
+        for other in later:
+            other_aspects = aspects_of(other)
+            other_item = is_item(other[1])
+            if 'stacking' in aspects and 'stacking' in other_aspects:
+                return False  # El apilamiento es relativo entre todos los items
+            if ('members' in aspects and not other_item) or ('members' in other_aspects and not item):
+                return False  # Cambia qué items alcanza un tag
+            if item and other_item and other[1] != target:
+                continue
+            if op == 'move' and other[0] == 'move':
+                continue  # Los desplazamientos conmutan
+            if any(aspect in other_aspects for aspect in aspects):
+                return False
+        return True
+
+    @staticmethod
+    def _options(options):
+        # Como ``Misc._options`` de tkinter: las opciones a None no se envían
+        words = ()
+        for key, value in options.items():
+            if value is not None:
+                words += ('-' + key, value)
+        return words
+
+    def coords(self, item, *coords):
+        if not coords:
+            self.flush()
+            self.round_trips += 1
+            return self.canvas.coords(item)
+        if len(coords) == 1 and isinstance(coords[0], (list, tuple)):
+            coords = coords[0]
+        self._queue(('coords', item, *coords))
+
+    def itemconfig(self, tag_or_id, **options):
+        self._queue(('itemconfigure', tag_or_id) + self._options(options))
+
+    def move(self, tag_or_id, dx, dy):
+        self._queue(('move', tag_or_id, dx, dy))
+
+    def scale(self, tag_or_id, x, y, sx, sy):
+        self._queue(('scale', tag_or_id, x, y, sx, sy))
+
+    def tag_raise(self, tag_or_id, above=None):
+        self._queue(('raise', tag_or_id) if above is None else ('raise', tag_or_id, above))
+
+    def tag_lower(self, tag_or_id, below=None):
+        self._queue(('lower', tag_or_id) if below is None else ('lower', tag_or_id, below))
+
+    def delete(self, tag_or_id):
+        self._queue(('delete', tag_or_id))
+
+    def _create(self, kind, coords, options):
+        self.flush()
+        self.round_trips += 1
+        return getattr(self.canvas, 'create_' + kind)(*coords, **options)
+
+    def create_oval(self, *coords, **options):
+        return self._create('oval', coords, options)
+
+    def create_polygon(self, *coords, **options):
+        return self._create('polygon', coords, options)
+
+    def create_line(self, *coords, **options):
+        return self._create('line', coords, options)
+
+    def create_rectangle(self, *coords, **options):
+        return self._create('rectangle', coords, options)
+
+    def create_many(self, kind, count, coords, **options):
+        """Crea ``count`` items iguales en una sola llamada y devuelve sus IDs"""
+        self.flush()
+        self.round_trips += 1
+        items = self.tk.call('::audio_forms::create', self.path, count, kind, *coords, *self._options(options))
+        return [int(item) for item in self.tk.splitlist(items)]
+
+    def find_all(self):
+        self.flush()
+        self.round_trips += 1
+        return self.canvas.find_all()
+
+    def __getattr__(self, name):
+        # Cualquier otra llamada va directa al canvas, después de lo encolado
+        if name.startswith('_') or name in ('canvas', 'pending'):
+            raise AttributeError(name)
+        self.flush()
+        return getattr(self.canvas, name)
+
+    def flush(self):
+        if not self.pending:
+            return
+        commands = self.pending
+        self.commands += len(commands)
+        self.pending = []
+        self._open.clear()
+        self.round_trips += 1
+        self.tk.call('::audio_forms::apply', self.path, commands)
+
+    def end_frame(self):
+        """Vacía la cola y anota las llamadas a Tcl y órdenes de este frame"""
+        self.flush()
+        start_trips, start_commands = self._frame_start
+        self.recent.append((self.round_trips - start_trips, self.commands - start_commands))
+        self._frame_start = (self.round_trips, self.commands)
+
+    def status_text(self):
+        if not self.recent:
+            return "Tcl: sin frames"
+        trips = sum(r[0] for r in self.recent) / len(self.recent)
+        commands = sum(r[1] for r in self.recent) / len(self.recent)
+        return f"Tcl {trips:.1f} llamadas/frame ({commands:.0f} órdenes por lote)"
+
+
+class ItemPool:
+    """Conjunto de items del canvas reutilizables, separados por tipo.
+
+    Un item liberado se oculta y vuelve a usarse con ``coords``/``itemconfig``.
+    Quien adquiere un item debe pasar todas las opciones que le importan, ya
+    que el item conserva las de su uso anterior. Sobre un ``CommandBuffer``
+    los items que faltan se crean ocultos de ``grow`` en ``grow`` en una sola
+    llamada a Tcl, en lugar de uno por llamada.
+    """
+
+    def __init__(self, canvas, grow=32):
+        self.canvas = canvas
+        self.free = {}
+        self.grow = grow
+        self.batched = isinstance(canvas, CommandBuffer)
+        self.created = 0  # Items creados en total (debería estabilizarse)
+
+    def acquire(self, kind, coords, **options):
+        free = self.free.get(kind)
+        if not free and self.batched:
+            self.preallocate(kind, self.grow)
+            free = self.free[kind]
+        if free:
+            item = free.pop()
+            self.canvas.coords(item, *coords)
+            self.canvas.itemconfig(item, state='normal', **options)
+            self.canvas.tag_raise(item)
+            return item
+        self.created += 1
+        return getattr(self.canvas, 'create_' + kind)(*coords, **options)
+
+    def release(self, item, kind):
+        self.canvas.itemconfig(item, state='hidden')
+        self.free.setdefault(kind, []).append(item)
+
+    def release_group(self, tag, items):
+        # Un solo comando oculta todos los items del grupo y les quita el tag
+        self.canvas.itemconfig(tag, state='hidden', tags=())
+        for kind, item in items:
+            self.free.setdefault(kind, []).append(item)
+
+    def preallocate(self, kind, count):
+        """Crea ``count`` items ocultos para no tener que crearlos en caliente"""
+        coords = (0, 0, 0, 0, 0, 0) if kind == 'polygon' else (0, 0, 0, 0)
+        free = self.free.setdefault(kind, [])
+        if self.batched:
+            free.extend(self.canvas.create_many(kind, count, coords, state='hidden'))
+        else:
+            create = getattr(self.canvas, 'create_' + kind)
+            for _ in range(count):
+                free.append(create(*coords, state='hidden'))
+        self.created += count
+
+
+class ItemGroup:
+    """Items del pool que comparten un tag y se mueven, caducan y liberan juntos"""
+
+    def __init__(self, pool, tag):
+        self.pool = pool
+        self.tag = tag
+        self.items = []  # (tipo, id)
+
+    def add(self, kind, coords, **options):
+        item = self.pool.acquire(kind, coords, tags=(self.tag,), **options)
+        self.items.append((kind, item))
+        return item
+
+    def move(self, dx, dy):
+        self.pool.canvas.move(self.tag, dx, dy)
+
+    def release(self):
+        if self.items:
+            self.pool.release_group(self.tag, self.items)
+            self.items = []
+
+
+class SceneManager:
+    """Escena con presupuesto de items y caducidad por edad.
+
+    Al superar ``budget`` se recicla el item más antiguo; los items con más de
+    ``max_age`` segundos se ocultan y vuelven al pool. El número de items del
+    canvas queda acotado por ``budget``.
+    """
+
+    def __init__(self, canvas, budget=3000, max_age=None):
+        self.canvas = canvas
+        self.pool = ItemPool(canvas)
+        self.budget = budget
+        self.max_age = max_age
+        self.live = deque()  # (nacimiento, tipo, id), del más antiguo al más nuevo
+
+    def add(self, kind, coords, **options):
+        now = time.monotonic()
+        self.expire(now)
+
+        if len(self.live) >= self.budget:
+            _, old_kind, item = self.live.popleft()
+            if old_kind == kind:
+                # Reutilizar directamente el más antiguo, sin pasar por el pool
+                self.canvas.coords(item, *coords)
+                self.canvas.itemconfig(item, **options)
+                self.canvas.tag_raise(item)
+                self.live.append((now, kind, item))
+                return item
+            self.pool.release(item, old_kind)
+
+        item = self.pool.acquire(kind, coords, **options)
+        self.live.append((now, kind, item))
+        return item
+
+    def expire(self, now=None):
+        if self.max_age is None:
+            return
+        if now is None:
+            now = time.monotonic()
+        while self.live and now - self.live[0][0] > self.max_age:
+            _, kind, item = self.live.popleft()
+            self.pool.release(item, kind)
+
+    def clear(self):
+        while self.live:
+            _, kind, item = self.live.popleft()
+            self.pool.release(item, kind)
+
+    def __len__(self):
+        return len(self.live)
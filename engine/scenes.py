@@ -0,0 +1,60 @@
+"""Estilos visuales intercambiables y lo que comparten (reparto del lienzo por canal).
+
+Cada escena recibe el análisis de un tick (``react``), anima lo que tenga
+(``move_shapes``) y dibuja sobre un Renderer; no sabe nada de Tk ni de la
+fuente de audio. ``load_scene`` importa el módulo de la escena solo cuando
+se elige.
+"""
+import importlib
+import math
+
+import numpy as np
+
+# Nombre -> (módulo, clase); se importan bajo demanda
+SCENES = {
+    'forms': ('engine.forms_scene', 'FormsScene'),
+    'strokes': ('engine.strokes_scene', 'StrokesScene'),
+}
+
+
+def load_scene(name):
+    """Clase de la escena ``name`` (ver ``SCENES``)"""
+    try:
+        module, cls = SCENES[name]
+    except KeyError:
+        raise ValueError(f"escena desconocida: {name!r} (disponibles: {', '.join(SCENES)})") from None
+    return getattr(importlib.import_module(module), cls)
+
+
+class ChannelLayout:
+    """Reparto del canvas y de la paleta entre varios canales de entrada.
+
+    Cada canal tiene una celda de una rejilla casi cuadrada y un giro de tono
+    propio. ``pick`` elige por turnos qué canales activos generan forma en
+    cada tick, para que el coste no crezca con el número de canales.
+    """
+
+    def __init__(self, channels, per_tick=4, gate=50.0):
+        self.channels = channels
+        self.per_tick = per_tick
+        self.gate = gate  # Nivel mínimo para que un canal genere formas
+        self.cols = int(math.ceil(math.sqrt(channels)))
+        self.rows = int(math.ceil(channels / self.cols))
+        self._cursor = 0
+
+    def region(self, channel, width, height):
+        col, row = channel % self.cols, channel // self.cols
+        return (col * width // self.cols, row * height // self.rows,
+                (col + 1) * width // self.cols, (row + 1) * height // self.rows)
+
+    def hue_shift(self, channel):
+        return channel / self.channels
+
+    def pick(self, levels):
+        active = np.flatnonzero(np.asarray(levels) >= self.gate)
+        if len(active) <= self.per_tick:
+            return active.tolist()
+        start = np.searchsorted(active, self._cursor)
+        chosen = np.roll(active, -start)[:self.per_tick]
+        self._cursor = int(chosen[-1]) + 1
+        return chosen.tolist()
@@ -0,0 +1,104 @@
+"""Planificación de ticks con plazos monótonos y ajuste automático de la calidad"""
+import time
+
+
+class FrameScheduler:
+    """Programa los ticks de ``after`` para mantener un FPS objetivo.
+
+    Los plazos se calculan sobre una rejilla fija del reloj monótono, así que
+    el tiempo de trabajo de cada tick se descuenta de la espera en lugar de
+    sumarse a ella. Si un tick se retrasa más de un período entero, la rejilla
+    se reinicia en vez de encadenar ticks atrasados.
+    """
+
+    def __init__(self, fps=20, clock=time.monotonic):
+        self.clock = clock
+        self.period = 1.0 / fps
+        self.deadline = None
+        self.tick_start = None
+        self.last_tick = None
+        self.missed = 0  # Plazos saltados por ir tarde
+
+    def set_fps(self, fps):
+        self.period = 1.0 / fps
+
+    def begin(self):
+        """Marca el inicio de un tick; devuelve el tiempo desde el tick anterior"""
+        now = self.clock()
+        if self.deadline is None:
+            self.deadline = now
+        elapsed = self.period if self.last_tick is None else now - self.last_tick
+        self.last_tick = self.tick_start = now
+        return elapsed
+
+    def end(self):
+        """Marca el final del tick; devuelve ``(trabajo en s, espera en ms hasta el siguiente)``"""
+        now = self.clock()
+        work = now - self.tick_start
+        self.deadline += self.period
+        if now - self.deadline > self.period:
+            self.missed += int((now - self.deadline) / self.period)
+            self.deadline = now
+        delay_ms = max(0, int(round((self.deadline - now) * 1000)))
+        return work, delay_ms
+
+    def reset(self):
+        self.deadline = None
+        self.last_tick = None
+
+
+class QualityGovernor:
+    """Reduce la calidad de la escena cuando los ticks no caben en el presupuesto.
+
+    Sigue una media móvil exponencial del tiempo de trabajo por tick: por
+    encima de ``high`` × presupuesto baja un nivel, y solo tras ``recover``
+    ticks seguidos por debajo de ``low`` × presupuesto sube uno (histéresis
+    para no oscilar). Cada nivel escala los atributos base de la escena;
+    las escenas sin ninguno de ``MINIMUMS`` no tienen nada que ajustar.
+    """
+
+    STEPS = (1.0, 0.75, 0.5, 0.3)
+    MINIMUMS = {'particle_density': 2, 'glow_layers': 0, 'max_shapes': 3}
+
+    def __init__(self, scene, budget, high=0.8, low=0.4, recover=20, smoothing=0.2):
+        self.scene = scene
+        self.budget = budget
+        self.high = high
+        self.low = low
+        self.recover = recover
+        self.smoothing = smoothing
+        self.base = {name: getattr(scene, name) for name in self.MINIMUMS if hasattr(scene, name)}
+        self.level = 0
+        self.average = 0.0
+        self._calm = 0
+
+    @classmethod
+    def applies_to(cls, scene):
+        return any(hasattr(scene, name) for name in cls.MINIMUMS)
+
+    def observe(self, work):
+        """Registra el trabajo de un tick; devuelve True si cambió el nivel"""
+        self.average += self.smoothing * (work - self.average)
+        if self.average > self.high * self.budget and self.level < len(self.STEPS) - 1:
+            self.set_level(self.level + 1)
+            # Empezar de nuevo la media con el coste esperado del nivel nuevo
+            self.average *= self.STEPS[self.level] / self.STEPS[self.level - 1]
+            return True
+        if self.average < self.low * self.budget and self.level > 0:
+            self._calm += 1
+            if self._calm >= self.recover:
+                self.set_level(self.level - 1)
+                return True
+        else:
+            self._calm = 0
+        return False
+
+    def set_level(self, level):
+        self.level = level
+        self._calm = 0
+        factor = self.STEPS[level]
+        for name, value in self.base.items():
+            setattr(self.scene, name, max(self.MINIMUMS[name], int(round(value * factor))))
+
+    def status_text(self):
+        return f"Calidad {len(self.STEPS) - self.level}/{len(self.STEPS)}"
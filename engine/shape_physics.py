@@ -0,0 +1,108 @@
+"""Física de formas vectorizada: estado en arrays (struct-of-arrays) de NumPy"""
+import numpy as np
+
+
+class ShapeBuffer:
+    """Posición, velocidad, radio, nacimiento y escala de todas las formas.
+
+    Cada forma ocupa una ranura; las ranuras libres se reutilizan y la
+    capacidad se duplica si hace falta. ``step`` calcula rebotes, escala y
+    caducidad de todas las formas a la vez a partir de la geometría conocida,
+    sin consultar al canvas.
+    """
+
+    FIELDS = ('x', 'y', 'dx', 'dy', 'radius', 'birth', 'scale', 'scale_dir', 'rotation')
+
+    def __init__(self, capacity=64, lifetime=1.5, scale_step=0.01, scale_range=(0.9, 1.1)):
+        self.capacity = 0
+        self.lifetime = lifetime
+        self.scale_step = scale_step
+        self.scale_min, self.scale_max = scale_range
+        for name in self.FIELDS:
+            setattr(self, name, np.zeros(0))
+        self.alive = np.zeros(0, dtype=bool)
+        self.free = []
+        self.count = 0
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        old = self.capacity
+        for name in self.FIELDS:
+            array = np.zeros(capacity)
+            array[:old] = getattr(self, name)
+            setattr(self, name, array)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:old] = self.alive
+        self.alive = alive
+        # Las ranuras más bajas se entregan primero
+        self.free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def spawn(self, x, y, dx, dy, radius, birth, rotation=0.0, scale_dir=1.0):
+        if not self.free:
+            self._grow(self.capacity * 2)
+        slot = self.free.pop()
+        self.x[slot] = x
+        self.y[slot] = y
+        self.dx[slot] = dx
+        self.dy[slot] = dy
+        self.radius[slot] = radius
+        self.birth[slot] = birth
+        self.scale[slot] = 1.0
+        self.scale_dir[slot] = scale_dir
+        self.rotation[slot] = rotation
+        self.alive[slot] = True
+        self.count += 1
+        return slot
+
+    def kill(self, slot):
+        if self.alive[slot]:
+            self.alive[slot] = False
+            self.free.append(slot)
+            self.count -= 1
+
+    def oldest(self):
+        """Ranura de la forma viva más antigua, o None"""
+        if self.count == 0:
+            return None
+        births = np.where(self.alive, self.birth, np.inf)
+        return int(np.argmin(births))
+
+    def step(self, now, width, height, dt=1.0):
+        """Avanza ``dt`` ticks todas las formas vivas (las velocidades son por tick).
+
+        Devuelve ``(slots, dx, dy, ratio, expired)``: las ranuras que siguen
+        vivas, el desplazamiento aplicado a cada una, su factor de escala
+        relativo al frame anterior y las ranuras que caducaron (ya liberadas).
+        """
+        slots = np.flatnonzero(self.alive)
+        dx = self.dx[slots] * dt
+        dy = self.dy[slots] * dt
+
+        x = self.x[slots] + dx
+        y = self.y[slots] + dy
+        self.x[slots] = x
+        self.y[slots] = y
+
+        # Escala pulsante entre scale_min y scale_max
+        old_scale = self.scale[slots]
+        scale = old_scale + self.scale_dir[slots] * (self.scale_step * dt)
+        flip = (scale <= self.scale_min) | (scale >= self.scale_max)
+        self.scale_dir[slots[flip]] *= -1
+        np.clip(scale, self.scale_min, self.scale_max, out=scale)
+        self.scale[slots] = scale
+        ratio = scale / old_scale
+
+        # Rebote contra los bordes solo si la forma se mueve hacia fuera
+        r = self.radius[slots] * scale
+        hit_x = ((x - r <= 0) & (dx < 0)) | ((x + r >= width) & (dx > 0))
+        hit_y = ((y - r <= 0) & (dy < 0)) | ((y + r >= height) & (dy > 0))
+        self.dx[slots[hit_x]] *= -1
+        self.dy[slots[hit_y]] *= -1
+
+        old = now - self.birth[slots] > self.lifetime
+        expired = slots[old]
+        for slot in expired.tolist():
+            self.kill(slot)
+        keep = ~old
+        return slots[keep], dx[keep], dy[keep], ratio[keep], expired
@@ -0,0 +1,140 @@
+"""Análisis espectral por FFT real con ventana, solapamiento y buffers reutilizables"""
+from collections import namedtuple
+
+import numpy as np
+
+from engine.filterbank import filterbank, rectangular_bank
+
+SpectralResult = namedtuple('SpectralResult', 'magnitude band_energies dominant_freq')
+
+
+class SpectralAnalyzer:
+    """Analiza frames de ``frame_size`` muestras cada ``hop`` muestras nuevas.
+
+    La ventana, la tabla de frecuencias por bin y todos los arrays de salida se
+    reservan una sola vez; ``magnitude`` y ``band_energies`` se sobrescriben en
+    cada análisis. Con ``channels`` las muestras llegan como (muestras,
+    canales) y todos los canales se analizan en un solo lote: los resultados
+    ganan un último eje de canales y ``dominant_freq`` es un array.
+
+    Las energías por banda salen de un banco de filtros ``scale`` (``octave``,
+    ``mel`` o ``bark``, ver ``filterbank.py``) aplicado como una matriz
+    dispersa; ``band_edges`` da en su lugar bandas rectangulares a medida. Un
+    ``detector`` (p. ej. ``OnsetDetector``) recibe las energías de cada análisis.
+    """
+
+    def __init__(self, rate=44100, frame_size=2048, hop=512, fmin=300, fmax=3400, band_edges=None,
+                 channels=None, scale='octave', bands=24, detector=None):
+        self.rate = rate
+        self.frame_size = frame_size
+        self.hop = hop
+        self.channels = channels
+        self._extra = () if channels is None else (channels,)
+
+        self.window = np.hanning(frame_size)
+        self._window = self.window if channels is None else self.window[:, None]
+        self.freqs = np.fft.rfftfreq(frame_size, 1 / rate)
+
+        # Buffers preasignados
+        self.frame = np.zeros((frame_size,) + self._extra)
+        self._windowed = np.empty((frame_size,) + self._extra)
+        self.magnitude = np.zeros((len(self.freqs),) + self._extra)
+        self._power = np.empty((len(self.freqs),) + self._extra)
+        self.pending = 0  # Muestras nuevas desde el último análisis
+
+        self.dominant_freq = self._no_frequency()
+        self.range = None
+        self.set_range(fmin, fmax)
+        if band_edges is not None:
+            self.set_bands(band_edges)
+        else:
+            self.set_filterbank(scale, bands, fmin, fmax)
+        self.detector = detector
+
+    def reset(self, phase=0):
+        """Vacía el frame deslizante; ``phase`` son las muestras ya acumuladas del salto actual"""
+        self.frame[:] = 0
+        self.magnitude[:] = 0
+        self.band_energies[:] = 0
+        self.pending = phase
+        self.dominant_freq = self._no_frequency()
+        if self.detector is not None:
+            self.detector.reset()
+
+    def _no_frequency(self):
+        return 0.0 if self.channels is None else np.zeros(self.channels)
+
+    def set_range(self, fmin, fmax):
+        """Rango de búsqueda de la frecuencia dominante"""
+        if self.range == (fmin, fmax):
+            return
+        self.range = (fmin, fmax)
+        self._lo = max(1, int(np.searchsorted(self.freqs, fmin)))
+        self._hi = min(len(self.freqs) - 1, int(np.searchsorted(self.freqs, fmax, side='right')))
+
+    def set_bands(self, edges):
+        """Bandas rectangulares entre bordes consecutivos (suma de potencia)"""
+        self._use_bank(rectangular_bank(edges, self.freqs))
+
+    def set_filterbank(self, scale, bands, fmin, fmax):
+        """Banco de filtros perceptivo cacheado (se comparte entre analizadores)"""
+        self._use_bank(filterbank(scale, bands, self.rate, self.frame_size, float(fmin), float(fmax)))
+
+    def _use_bank(self, bank):
+        self._bank = bank
+        self.band_energies = np.zeros((bank.shape[0],) + self._extra)
+
+    def push(self, samples):
+        """Añade muestras al frame deslizante y analiza cada ``hop`` muestras.
+
+        Devuelve el resultado más reciente, o None si no se completó ningún salto.
+        """
+        analyzed = False
+        n = len(samples)
+        pos = 0
+        while pos < n:
+            k = min(self.hop - self.pending, n - pos)
+            self.frame[:-k] = self.frame[k:]
+            self.frame[-k:] = samples[pos:pos + k]
+            pos += k
+            self.pending += k
+            if self.pending == self.hop:
+                self.pending = 0
+                self.analyze()
+                analyzed = True
+        return self.result() if analyzed else None
+
+    def analyze(self):
+        np.multiply(self.frame, self._window, out=self._windowed)
+        np.abs(np.fft.rfft(self._windowed, axis=0), out=self.magnitude)
+        np.square(self.magnitude, out=self._power)
+
+        # Energía por banda: un producto por la matriz dispersa del banco de filtros
+        self.band_energies[:] = self._bank @ self._power
+
+        self.dominant_freq = self.peak_frequency()
+        if self.detector is not None:
+            self.detector.update(self.band_energies)
+        return self.result()
+
+    def peak_frequency(self):
+        """Frecuencia dominante con interpolación parabólica sobre el log de la magnitud"""
+        if self.channels is not None:
+            return self._peak_frequencies()
+        k = self._lo + int(np.argmax(self.magnitude[self._lo:self._hi]))
+        alpha, beta, gamma = np.log(self.magnitude[k - 1:k + 2] + 1e-12)
+        denom = alpha - 2 * beta + gamma
+        offset = 0.5 * (alpha - gamma) / denom if denom != 0 else 0.0
+        return (k + offset) * self.rate / self.frame_size
+
+    def _peak_frequencies(self):
+        # Lo mismo para todos los canales a la vez: un pico y tres bins por columna
+        k = self._lo + np.argmax(self.magnitude[self._lo:self._hi], axis=0)
+        cols = np.arange(self.channels)
+        alpha, beta, gamma = np.log(self.magnitude[[k - 1, k, k + 1], cols] + 1e-12)
+        denom = alpha - 2 * beta + gamma
+        offset = np.divide(0.5 * (alpha - gamma), denom, out=np.zeros(self.channels), where=denom != 0)
+        return (k + offset) * self.rate / self.frame_size
+
+    def result(self):
+        return SpectralResult(self.magnitude, self.band_energies, self.dominant_freq)
@@ -0,0 +1,440 @@
+"""Difusión por TCP de las características de cada frame a varios clientes de render.
+
+Un solo proceso captura y analiza (``python -m engine.stream`` o la ventana
+con ``--serve``); cada pantalla ejecuta su propia escena como cliente con
+``--source tcp:HOST:PUERTO``. El análisis corre una vez y cada cliente
+descarta frames por su cuenta sin frenar la captura:
+
+- El servidor nunca bloquea: envía a cada cliente sin esperar y, si su
+  socket está lleno, descarta el frame solo para ese cliente (como mucho
+  guarda el resto de un mensaje a medio enviar).
+- Los ataques y pulsos viajan como contadores acumulados, así que un
+  cliente que se salta frames sigue viendo todos los ataques.
+- Con la misma ``--seed`` los clientes reinician su generador con el índice
+  de cada frame y generan las mismas formas a partir de las mismas
+  características, sin enviar las primitivas por la red.
+
+Cada mensaje va precedido de su longitud (``<I``). ``H`` es el saludo (JSON
+con la configuración del análisis) y ``F`` un frame binario: cabecera
+``FRAME_HEADER`` y después, por canal, nivel, frecuencia dominante, flujo y
+tempo (``<f4``), ataques y pulsos acumulados (``<u4``) y, si ``flags`` lo
+indica, las energías por banda (``<f4``). Un frame mono ocupa 136 bytes.
+"""
+import json
+import socket
+import struct
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from engine.audio_capture import AudioSource
+from engine.onsets import Rhythm
+
+PROTOCOL = 1
+LENGTH = struct.Struct('<I')
+# Tipo, flags, canales (0 = mono), bandas, índice del frame, segundos desde el inicio
+FRAME_HEADER = struct.Struct('<cBBBId')
+HAS_FEATURES = 1
+HAS_BANDS = 2
+
+FeatureFrame = namedtuple('FeatureFrame', 'index time level dominant_freq flux tempo onsets beats bands')
+
+
+def parse_address(text, default_host='127.0.0.1'):
+    """``'HOST:PUERTO'`` o ``'PUERTO'`` -> ``(host, puerto)``"""
+    host, _, port = text.rpartition(':')
+    return host or default_host, int(port)
+
+
+def pack(payload):
+    return LENGTH.pack(len(payload)) + payload
+
+
+def encode_hello(info):
+    return pack(b'H' + json.dumps(dict(info, protocol=PROTOCOL)).encode())
+
+
+def encode_frame(frame, channels, bands=True):
+    """Mensaje binario de un ``FeatureFrame`` (valores escalares en mono, arrays por canal si no)"""
+    flags = (HAS_FEATURES if frame.level is not None else 0) | (HAS_BANDS if bands else 0)
+    n = np.asarray(frame.bands).shape[0] if bands else 0
+    parts = [FRAME_HEADER.pack(b'F', flags, channels or 0, n, frame.index, frame.time)]
+    if frame.level is not None:
+        parts.append(np.array([frame.level, frame.dominant_freq, frame.flux, frame.tempo], dtype='<f4').tobytes())
+    else:
+        parts.append(np.array([np.zeros_like(frame.flux), np.zeros_like(frame.flux), frame.flux, frame.tempo],
+                              dtype='<f4').tobytes())
+    parts.append(np.array([frame.onsets, frame.beats], dtype='<u4').tobytes())
+    if bands:
+        parts.append(np.asarray(frame.bands, dtype='<f4').tobytes())
+    return pack(b''.join(parts))
+
+
+def decode_frame(payload):
+    _, flags, channels, n, index, t = FRAME_HEADER.unpack_from(payload)
+    width = max(1, channels)
+    offset = FRAME_HEADER.size
+    values = np.frombuffer(payload, '<f4', 4 * width, offset).reshape(4, width).astype(np.float64)
+    offset += 16 * width
+    counts = np.frombuffer(payload, '<u4', 2 * width, offset).reshape(2, width).astype(np.int64)
+    offset += 8 * width
+    bands = None
+    if flags & HAS_BANDS:
+        bands = np.frombuffer(payload, '<f4', n * width, offset).astype(np.float64)
+        bands = bands if channels == 0 else bands.reshape(n, width)
+    if channels == 0:
+        values, counts = values[:, 0], counts[:, 0]
+    level, dominant_freq = (values[0], values[1]) if flags & HAS_FEATURES else (None, None)
+    return FeatureFrame(index, t, level, dominant_freq, values[2], values[3], counts[0], counts[1], bands)
+
+
+class _Client:
+    def __init__(self, sock, address, hello):
+        self.sock = sock
+        self.address = address
+        self.pending = memoryview(hello)  # Resto del mensaje a medio enviar
+        self.sent = 0
+        self.dropped = 0
+
+
+class FeatureServer:
+    """Publica un frame por tick a todos los clientes conectados, sin bloquear nunca.
+
+    ``publish`` se llama desde el bucle del análisis con lo que devuelven
+    ``features`` y ``rhythm``; un hilo aparte acepta conexiones y envía el
+    saludo en cuanto llega cada cliente, aunque no se esté publicando. El
+    buffer de envío de cada cliente se limita a ``send_buffer`` bytes (unos
+    cien frames) para que uno lento descarte frames en vez de ir segundos
+    por detrás con frames viejos encolados en el sistema.
+    """
+
+    def __init__(self, address, info, bands=True, send_buffer=16384):
+        self.address = address
+        self.info = info
+        self.bands = bands
+        self.send_buffer = send_buffer
+        self.clients = []
+        self.index = 0
+        self.onsets = 0
+        self.beats = 0
+        self._lock = threading.Lock()
+        self._t0 = None
+        self.sock = None
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        self.sock = socket.create_server(self.address)
+        self.sock.settimeout(0.2)
+        self.running = True
+        self._t0 = time.monotonic()
+        self.thread = threading.Thread(target=self._accept, name='FeatureServer', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        with self._lock:
+            for client in self.clients:
+                client.sock.close()
+            self.clients = []
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def _accept(self):
+        while self.running:
+            try:
+                sock, address = self.sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer)
+            client = _Client(sock, address, encode_hello(self.info))
+            with self._lock:
+                try:
+                    # El saludo sale ya; lo que no quepa se completa en el siguiente publish
+                    client.pending = client.pending[self._send(sock, client.pending):]
+                except OSError:
+                    sock.close()
+                    continue
+                self.clients.append(client)
+
+    def publish(self, features, rhythm):
+        """Envía el frame actual; devuelve a cuántos clientes salió entero o en parte"""
+        self.onsets = (self.onsets + rhythm.onsets) % (1 << 32)
+        self.beats = (self.beats + rhythm.beats) % (1 << 32)
+        level, dominant_freq = features if features is not None else (None, None)
+        frame = FeatureFrame(self.index, time.monotonic() - self._t0, level, dominant_freq, rhythm.flux,
+                             rhythm.tempo, self.onsets, self.beats, rhythm.bands)
+        message = encode_frame(frame, self.info.get('channels'), self.bands)
+        self.index += 1
+        delivered = 0
+        with self._lock:
+            for client in list(self.clients):
+                try:
+                    if len(client.pending):
+                        client.pending = client.pending[self._send(client.sock, client.pending):]
+                    if len(client.pending):
+                        # El cliente no da abasto: este frame se descarta solo para él
+                        client.dropped += 1
+                        continue
+                    sent = self._send(client.sock, message)
+                    if sent == 0:
+                        client.dropped += 1
+                        continue
+                    client.pending = memoryview(message)[sent:]
+                    client.sent += 1
+                    delivered += 1
+                except OSError:
+                    # Cliente desconectado
+                    client.sock.close()
+                    self.clients.remove(client)
+        return delivered
+
+    @staticmethod
+    def _send(sock, data):
+        try:
+            return sock.send(data)
+        except BlockingIOError:
+            return 0
+
+    def status_text(self):
+        with self._lock:
+            dropped = sum(client.dropped for client in self.clients)
+            return f"Clientes {len(self.clients)}  frames descartados {dropped}"
+
+
+class FeatureClient(AudioSource):
+    """Fuente ``tcp:HOST:PUERTO``: recibe frames de un ``FeatureServer`` en lugar de muestras.
+
+    Un hilo lee todo lo que llega y guarda solo el frame más reciente; si
+    la conexión se pierde, vuelve a conectar. ``read`` no devuelve muestras:
+    el análisis lo sustituye ``RemoteAnalysis``. ``dropped`` cuenta los
+    frames del servidor que este cliente se saltó. ``start`` espera el
+    saludo como mucho ``timeout`` segundos en total, conexión incluida.
+    """
+
+    def __init__(self, address, timeout=2.0):
+        self.address = address
+        self.timeout = timeout
+        self.info = None
+        self.latest = None
+        self.received = 0
+        self.skipped = 0
+        self.connected = False
+        self.sock = None
+        self.thread = None
+        self.running = False
+        super().__init__(rate=44100, channels=1, block_size=512)
+
+    def start(self):
+        # El saludo fija frecuencia, canales y bandas antes de crear la escena; un
+        # plazo total acota cuánto puede bloquear al hilo de Tk un servidor que no responde
+        deadline = time.monotonic() + self.timeout
+        self.sock = socket.create_connection(self.address, timeout=self.timeout)
+        buffer = bytearray()
+        try:
+            while self.info is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout
+                self.sock.settimeout(remaining)
+                data = self.sock.recv(65536)
+                if not data:
+                    raise ConnectionError(f"{self.address[0]}:{self.address[1]} cerró la conexión")
+                buffer += data
+                buffer = self._consume(buffer)
+        except socket.timeout:
+            self.sock.close()
+            raise TimeoutError(f"{self.address[0]}:{self.address[1]} no envió el saludo en "
+                               f"{self.timeout:g} s") from None
+        except OSError:
+            self.sock.close()
+            raise
+        self.rate = self.info['rate']
+        self.block_size = self.info['hop']
+        channels = self.info.get('channels')
+        self.channels = channels or 1
+        self.mix = channels is None
+        self.running = True
+        self.thread = threading.Thread(target=self._receive, args=(buffer,), name='FeatureClient', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def read(self):
+        return self.ring.read()  # Siempre vacío: no llegan muestras
+
+    @property
+    def dropped(self):
+        return self.skipped
+
+    def stats_text(self):
+        state = "conectado" if self.connected else "reconectando"
+        return f"{self.address[0]}:{self.address[1]} {state}  Frames saltados: {self.skipped}"
+
+    def _receive(self, buffer):
+        sock = self.sock
+        while self.running:
+            if sock is None:
+                try:
+                    sock = socket.create_connection(self.address, timeout=self.timeout)
+                except OSError:
+                    time.sleep(0.5)
+                    continue
+                buffer = bytearray()
+            sock.settimeout(0.2)
+            self.connected = True
+            while self.running:
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                if not data:
+                    break
+                buffer += data
+                buffer = self._consume(buffer)
+            self.connected = False
+            sock.close()
+            sock = None
+        self.sock = None
+
+    def _consume(self, buffer):
+        """Procesa los mensajes completos de ``buffer``; devuelve lo que sobra"""
+        offset = 0
+        while len(buffer) - offset >= LENGTH.size:
+            n = LENGTH.unpack_from(buffer, offset)[0]
+            end = offset + LENGTH.size + n
+            if len(buffer) < end:
+                break
+            payload = bytes(buffer[offset + LENGTH.size:end])
+            offset = end
+            if payload[:1] == b'H':
+                self.info = json.loads(payload[1:])
+            elif payload[:1] == b'F':
+                self.latest = decode_frame(payload)
+                self.received += 1
+        return buffer[offset:]
+
+
+class RemoteAnalysis:
+    """El último frame de un ``FeatureClient`` con la interfaz de ``AudioAnalysis``"""
+
+    memory = 0.0
+
+    def __init__(self, client):
+        self.client = client
+        self.rate = client.rate
+        self.channels = client.info.get('channels')
+        self.bands = client.info.get('bands', 24)
+        self.index = None  # Índice del último frame consumido
+        self._onsets = self._beats = 0
+
+    def reset(self):
+        self.index = None
+
+    def params(self):
+        return self.client.info
+
+    def process(self, samples):
+        pass
+
+    def features(self):
+        frame = self.client.latest
+        if frame is None or frame.level is None:
+            return None
+        if self.channels is None:
+            return float(frame.level), float(frame.dominant_freq)
+        return frame.level, frame.dominant_freq
+
+    def rhythm(self):
+        """Ataques y pulsos acumulados desde la llamada anterior, aunque se saltaran frames"""
+        frame = self.client.latest
+        extra = () if self.channels is None else (self.channels,)
+        if frame is None:
+            zero = np.zeros(extra, dtype=int)
+            return self._rhythm(np.zeros((self.bands,) + extra), np.zeros(extra), zero, zero, np.zeros(extra))
+        if self.index is None or frame.index < self.index:
+            # Primer frame o servidor reiniciado: nada acumulado todavía
+            onsets = beats = np.zeros(extra, dtype=int)
+        else:
+            self.client.skipped += max(0, frame.index - self.index - 1)
+            onsets = (frame.onsets - self._onsets) % (1 << 32)
+            beats = (frame.beats - self._beats) % (1 << 32)
+        self.index, self._onsets, self._beats = frame.index, frame.onsets, frame.beats
+        bands = frame.bands if frame.bands is not None else np.zeros((self.bands,) + extra)
+        return self._rhythm(bands, frame.flux, onsets, beats, frame.tempo)
+
+    def _rhythm(self, bands, flux, onsets, beats, tempo):
+        if self.channels is None:
+            return Rhythm(bands, float(flux), int(onsets), int(beats), float(tempo))
+        return Rhythm(bands, np.asarray(flux), np.asarray(onsets), np.asarray(beats), np.asarray(tempo))
+
+
+def serve(args):
+    """Bucle sin ventana: captura, analiza y publica cada tick"""
+    from engine.analysis import AudioAnalysis
+    from engine.audio_sources import open_source, source_options
+    from engine.scheduler import FrameScheduler
+
+    options = source_options(args)
+    capture = open_source(options.pop('source'), **options)
+    hop = 256 if args.low_latency else 512
+    analysis = AudioAnalysis(capture.rate, max(capture.block_size, 1024), hop=hop,
+                             channels=capture.analysis_channels)
+    server = FeatureServer(parse_address(args.listen, '0.0.0.0'), dict(analysis.params(), fps=args.fps),
+                           bands=not args.no_bands)
+    scheduler = FrameScheduler(args.fps)
+    server.start()
+    capture.start()
+    print(f"Publicando en {args.listen} a {args.fps:g} frames/s", flush=True)
+    try:
+        last_status = time.monotonic()
+        while True:
+            scheduler.begin()
+            analysis.process(capture.read())
+            server.publish(analysis.features(), analysis.rhythm())
+            if time.monotonic() - last_status > 5:
+                last_status = time.monotonic()
+                print(f"{server.status_text()}  {capture.stats_text()}", flush=True)
+            _, delay = scheduler.end()
+            time.sleep(delay / 1000)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        capture.stop()
+        server.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from engine.audio_sources import add_source_arguments
+
+    parser = argparse.ArgumentParser(description="Captura y analiza una vez y publica los frames por TCP")
+    parser.add_argument('--listen', default='9100', metavar='[HOST:]PUERTO',
+                        help="Dirección en la que escuchar (por defecto todas las interfaces, puerto 9100)")
+    parser.add_argument('--fps', type=float, default=None, help="Frames publicados por segundo (20; 60 con --low-latency)")
+    parser.add_argument('--low-latency', action='store_true', help="Bloques de 256 muestras y FFT cada 256")
+    parser.add_argument('--no-bands', action='store_true', help="No enviar las energías por banda (frames más pequeños)")
+    add_source_arguments(parser)
+    args = parser.parse_args()
+    if args.low_latency and args.block_size is None:
+        args.block_size = 256
+    if args.fps is None:
+        args.fps = 60 if args.low_latency else 20
+    serve(args)
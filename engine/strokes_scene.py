@@ -0,0 +1,119 @@
+"""Lógica de trazos de clean.py, independiente de Tk (interfaz y render offline)"""
+import numpy as np
+
+from engine.onsets import SpawnTrigger
+from engine.palette import custom_palette
+from engine.renderers import CanvasRenderer, RasterRenderer
+
+# Colores por defecto de los trazos (6 colores)
+COLORES = (
+    (255, 99, 71),    # Tomato
+    (30, 144, 255),   # DodgerBlue
+    (34, 139, 34),    # ForestGreen
+    (255, 215, 0),    # Gold
+    (138, 43, 226),   # BlueViolet
+    (220, 20, 60),    # Crimson
+)
+
+ORIENTATIONS = ("horizontal", "vertical", "diagonal", "curvo")
+
+
+class StrokesScene:
+    """Pinta trazos que se acumulan en el lienzo al ritmo del audio.
+
+    Los trazos no se mueven: se estampan en el renderer, que los hace caducar
+    (canvas) o desvanecerse (framebuffer). La orientación cambia en cada pulso
+    y, sin pulsos, cada ``orientation_period`` segundos contados desde el
+    origen de ``now`` (no desde el último cambio), para que un segmento del
+    render offline llegue al mismo estado que el render en serie.
+    """
+
+    level_color = 'green'  # Color fijo de la barra de nivel
+
+    def __init__(self, renderer, seed=None, low_freq=300, high_freq=3400, spawn_mode='onset',
+                 palette=None):
+        self.renderer = renderer
+        self.low_freq = low_freq
+        self.high_freq = high_freq
+
+        # Generador aleatorio único y sembrable (ejecuciones reproducibles)
+        self.rng = np.random.default_rng(seed)
+
+        # Paleta precalculada (cadenas de Tk listas); se puede sustituir con --palette
+        self.palette = palette if palette is not None else custom_palette(COLORES)
+
+        # Trazos en los ataques del audio; los pulsos cambian la orientación
+        self.trigger = SpawnTrigger(spawn_mode)
+        self.orientation_period = 5.0
+        self.current_orientation = "horizontal"
+        self._period_index = None
+
+    @staticmethod
+    def create_renderer(kind, canvas, width, height):
+        """Renderer adecuado para esta escena (``canvas`` es None fuera de Tk)"""
+        if kind == 'raster':
+            # En el framebuffer los trazos se desvanecen lentamente en lugar de caducar
+            return RasterRenderer(width, height, trail=0.995, canvas=canvas)
+        # Escena retenida: número de trazos acotado y reciclaje de items del canvas
+        return CanvasRenderer(canvas, stamp_budget=3000, stamp_lifetime=300)
+
+    @property
+    def memory(self):
+        """Segundos que un tick sigue influyendo en lo que se ve (aparte del renderer)"""
+        return self.orientation_period
+
+    def configure_channels(self, channels):
+        pass
+
+    def reseed(self, *key):
+        """Reinicia el generador a partir de una clave (p. ej. semilla e índice de frame)"""
+        self.rng = np.random.default_rng(list(key))
+
+    def react(self, level, dominant_freq, rhythm, now, width, height, layout=None):
+        """Pinta según ``rhythm`` (``AudioAnalysis.rhythm``); la barra de nivel no cambia de color"""
+        period_index = int(now // self.orientation_period)
+        if np.any(rhythm.beats) or period_index != self._period_index:
+            # Cambiar la orientación y tipo de trazo en cada pulso, o cada 5 segundos
+            self.current_orientation = ORIENTATIONS[self.rng.integers(len(ORIENTATIONS))]
+            self._period_index = period_index
+
+        if layout is None:
+            if self.trigger(level, rhythm.onsets, now):
+                self.draw_stroke(level, (0, 0, width, height))
+            return None
+        # Cada canal con ataque pinta en su celda y con su color fijo
+        for channel in layout.pick(self.trigger.active(level, rhythm.onsets)):
+            self.draw_stroke(level[channel], layout.region(channel, width, height),
+                             channel % len(self.palette))
+        return None
+
+    def draw_stroke(self, level, region, color=None):
+        # Elegir un color aleatorio de la paleta (``color`` es un índice)
+        if color is None:
+            color = int(self.rng.integers(len(self.palette)))
+        color_hex = self.palette.hex[color]
+
+        # Ajustar el tamaño del trazo según el nivel de amplitud
+        size = max(10, int(level / 20))  # Ajustar tamaño según amplitud, mínimo 10
+
+        # Dibujar trazos según la orientación actual
+        x0 = int(self.rng.integers(region[0], max(region[0] + 1, region[2])))
+        y0 = int(self.rng.integers(region[1], max(region[1] + 1, region[3])))
+        width = int(self.rng.integers(8, 16))
+
+        # Los trazos se estampan en el renderer (coordenadas relativas a x0, y0)
+        if self.current_orientation == "horizontal":
+            self.renderer.stamp(x0, y0, [('line', [0, 0, size, 0], color_hex, width, 1.0, False)])
+        elif self.current_orientation == "vertical":
+            self.renderer.stamp(x0, y0, [('line', [0, 0, 0, size], color_hex, width, 1.0, False)])
+        elif self.current_orientation == "diagonal":
+            self.renderer.stamp(x0, y0, [('line', [0, 0, size, size], color_hex, width, 1.0, False)])
+        elif self.current_orientation == "curvo":
+            control_x = int(self.rng.integers(-size, size + 1))
+            control_y = int(self.rng.integers(-size, size + 1))
+            self.renderer.stamp(x0, y0, [('line', [0, 0, control_x, control_y, size, size], color_hex,
+                                          width, 1.0, True)])
+
+    def move_shapes(self, now, width, height, dt=1.0):
+        """Los trazos no se mueven: el renderer se encarga de caducarlos"""
+        pass
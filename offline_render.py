@@ -0,0 +1,295 @@
+"""Render offline sin pantalla: archivo WAV de entrada, secuencia de frames de salida.
+
+Ejemplos:
+    python offline_render.py show.wav -o frames/ --fps 30
+    python offline_render.py show.wav -o frames/ --jobs 8
+    python offline_render.py show.wav -o frames/ --scene strokes
+    python offline_render.py show.wav -o frames/ --cache
+    python offline_render.py show.wav --raw --fps 30 | \\
+        ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x600 -r 30 -i - show.mp4
+"""
+import argparse
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from engine.analysis import AudioAnalysis
+from engine.analysis_cache import CachedAnalysis, add_cache_arguments, cache_from_args
+from engine.audio_capture import to_int16_scale
+from engine.onsets import SPAWN_MODES
+from engine.scenes import SCENES, load_scene
+
+# Ritmo de la ventana en vivo (update_interval de 50 ms): las velocidades son por tick
+LIVE_TICK_RATE = 20
+
+# Un segmento en paralelo dura al menos este múltiplo de su calentamiento
+MIN_SEGMENT_WARMUPS = 4
+
+
+def open_wav(path):
+    """Abre el WAV mapeado en memoria; las muestras se leen por bloques bajo demanda"""
+    from scipy.io import wavfile
+
+    rate, data = wavfile.read(path, mmap=True)
+    return rate, data
+
+
+def encode_png(rgb, level=1):
+    """Codifica un frame RGB uint8 como PNG (solo zlib de la biblioteca estándar)"""
+    height, width, _ = rgb.shape
+    raw = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 0] = 0  # Filtro "None" en cada fila
+    raw[:, 1:] = rgb.reshape(height, -1)
+
+    def chunk(tag, payload):
+        return (struct.pack('>I', len(payload)) + tag + payload +
+                struct.pack('>I', zlib.crc32(tag + payload) & 0xffffffff))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), level)) + chunk(b'IEND', b''))
+
+
+class FrameWriter:
+    """Escribe PNG numerados en un directorio o frames RGB crudos a un flujo"""
+
+    def __init__(self, output_dir=None, stream=None):
+        self.output_dir = output_dir
+        self.stream = stream
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+    def write(self, index, rgb):
+        if self.stream is not None:
+            self.stream.write(rgb.tobytes())
+        else:
+            with open(os.path.join(self.output_dir, f'frame_{index:06d}.png'), 'wb') as f:
+                f.write(encode_png(rgb))
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.flush()
+
+
+class OfflineRenderer:
+    """Ejecuta el análisis y una escena (``SCENES``) sobre un archivo, frame a frame.
+
+    Cada frame consume ``rate / fps`` muestras y avanza la escena con el tiempo
+    del archivo, no con el reloj, así que el resultado no depende de la
+    velocidad de la máquina. Con ``seed`` el generador aleatorio se reinicia en
+    cada frame a partir de ``(seed, índice)``: la aleatoriedad de un frame no
+    depende de los anteriores y se puede renderizar por segmentos.
+    """
+
+    def __init__(self, rate, fps=30, width=800, height=600, seed=None, spawn='onset', scene='forms'):
+        self.rate = rate
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.analysis = AudioAnalysis(rate, 1024)
+        scene_class = load_scene(scene)
+        self.renderer = scene_class.create_renderer('raster', None, width, height)
+        self.scene = scene_class(self.renderer, seed=seed, spawn_mode=spawn)
+        self.dt = LIVE_TICK_RATE / fps
+
+    def warmup_frames(self):
+        """Frames a simular antes de un segmento para llegar al mismo estado que en serie.
+
+        Un píxel depende de las formas vivas hasta hace ``fade_frames`` frames
+        (la estela entera vuelve al fondo en como mucho 255), y esas formas de
+        los ataques de hasta una vida antes. Se suman la memoria del detector
+        de ataques y tempo y un segundo para el filtro y la FFT.
+        """
+        lifetime = int(np.ceil(self.scene.memory * self.fps))
+        rhythm = int(np.ceil(self.analysis.memory * self.fps))
+        return lifetime + self.renderer.fade_frames() + rhythm + int(np.ceil(self.fps))
+
+    def use_cache(self, cache, path, data):
+        """Reproduce el análisis desde ``cache`` (la primera vez se calcula entero y se guarda)"""
+        self.analysis = CachedAnalysis(cache.features(path, data, self.analysis, self.fps))
+
+    def frame_count(self, samples):
+        return int(samples * self.fps / self.rate)
+
+    def frame_bounds(self, index):
+        start = int(round(index * self.rate / self.fps))
+        end = int(round((index + 1) * self.rate / self.fps))
+        return start, end
+
+    def step(self, index, block):
+        """Procesa el bloque de audio del frame ``index`` y compone el frame"""
+        if self.seed is not None:
+            self.scene.reseed(self.seed, index)
+        self.analysis.process(to_int16_scale(block))
+        now = index / self.fps
+        features = self.analysis.features()
+        rhythm = self.analysis.rhythm()
+        if features is not None:
+            level, dominant_freq = features
+            self.scene.react(level, dominant_freq, rhythm, now, self.width, self.height)
+        self.scene.move_shapes(now, self.width, self.height, self.dt)
+        self.renderer.render()
+
+    def run(self, data, writer, start_frame=0, end_frame=None, warmup=0):
+        """Renderiza ``[start_frame, end_frame)``; antes simula ``warmup`` frames sin escribirlos"""
+        total = self.frame_count(len(data))
+        end_frame = total if end_frame is None else min(end_frame, total)
+        first = max(0, start_frame - warmup)
+        self.analysis.seek(self.frame_bounds(first)[0])
+        for index in range(first, end_frame):
+            start, end = self.frame_bounds(index)
+            self.step(index, data[start:end])
+            if index >= start_frame:
+                writer.write(index, self.renderer.frame())
+        return max(0, end_frame - start_frame)
+
+
+def split_segments(total, jobs, segment=None, min_segment=1):
+    """Divide ``[0, total)`` en segmentos contiguos ``(inicio, fin)``.
+
+    Por defecto dos segmentos por proceso, para repartir mejor la carga cuando
+    unas partes del audio generan frames más costosos que otras. Ningún
+    segmento baja de ``min_segment`` frames (salvo el último, que se une al
+    anterior si quedaría más corto): cada uno repite su calentamiento.
+    """
+    if segment is None:
+        segment = -(-total // (jobs * 2))
+    segment = max(segment, min_segment, 1)
+    starts = list(range(0, total, segment))
+    if len(starts) > 1 and total - starts[-1] < min_segment:
+        starts.pop()
+    return [(start, end) for start, end in zip(starts, starts[1:] + [total])]
+
+
+def render_segment(path, fps, size, seed, start_frame, end_frame, output_dir=None, raw_path=None,
+                   spawn='onset', scene='forms', cache=None):
+    """Renderiza un segmento en un proceso aparte; devuelve el número de frames escritos.
+
+    Cada proceso abre el WAV por su cuenta (mapeado en memoria) y simula los
+    frames previos al segmento sin escribirlos, para que su salida sea idéntica
+    a la de un render en serie.
+    """
+    rate, data = open_wav(path)
+    renderer = OfflineRenderer(rate, fps, size[0], size[1], seed=seed, spawn=spawn, scene=scene)
+    if cache is not None:
+        renderer.use_cache(cache, path, data)
+    if raw_path is not None:
+        with open(raw_path, 'wb') as stream:
+            writer = FrameWriter(stream=stream)
+            frames = renderer.run(data, writer, start_frame, end_frame, renderer.warmup_frames())
+            writer.close()
+        return frames
+    writer = FrameWriter(output_dir=output_dir)
+    return renderer.run(data, writer, start_frame, end_frame, renderer.warmup_frames())
+
+
+def render_parallel(path, fps, size, seed, jobs, output_dir=None, stream=None, segment=None, spawn='onset',
+                    scene='forms', cache=None):
+    """Reparte el render por segmentos de tiempo entre ``jobs`` procesos.
+
+    Los PNG se escriben directamente en ``output_dir``; en modo crudo cada
+    segmento va a un archivo temporal que se copia a ``stream`` en orden. Con
+    ``cache`` el análisis se calcula (o se encuentra) aquí una sola vez y los
+    procesos lo leen de la caché sin simular el calentamiento del detector.
+
+    Si el archivo no da para dos segmentos de ``MIN_SEGMENT_WARMUPS`` veces el
+    calentamiento, este sería casi todo el trabajo y se renderiza en serie.
+    """
+    rate, data = open_wav(path)
+    probe = OfflineRenderer(rate, fps, size[0], size[1], seed=seed, spawn=spawn, scene=scene)
+    if cache is not None:
+        probe.use_cache(cache, path, data)
+    total = probe.frame_count(len(data))
+    segments = split_segments(total, jobs, segment, MIN_SEGMENT_WARMUPS * probe.warmup_frames())
+    if len(segments) < 2:
+        writer = FrameWriter(output_dir=output_dir, stream=stream)
+        frames = probe.run(data, writer)
+        writer.close()
+        return frames
+    tmp_dir = tempfile.mkdtemp(prefix='offline_render_') if stream is not None else None
+    try:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(segments))) as pool:
+            futures = []
+            for i, (start, end) in enumerate(segments):
+                raw_path = os.path.join(tmp_dir, f'{i:05d}.rgb') if tmp_dir else None
+                futures.append((raw_path, pool.submit(render_segment, path, fps, size, seed,
+                                                      start, end, output_dir, raw_path, spawn, scene,
+                                                      cache)))
+            frames = 0
+            for raw_path, future in futures:
+                frames += future.result()
+                if raw_path is not None:
+                    with open(raw_path, 'rb') as f:
+                        shutil.copyfileobj(f, stream)
+                    os.remove(raw_path)
+        return frames
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render offline del visualizador a partir de un WAV")
+    parser.add_argument('input', help="Archivo WAV de entrada")
+    parser.add_argument('-o', '--output', default='frames', help="Directorio de los PNG numerados")
+    parser.add_argument('--raw', action='store_true',
+                        help="Escribir frames RGB24 crudos en stdout (para un codificador) en lugar de PNG")
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--size', type=parse_size, default=(800, 600), help="Tamaño ANCHOxALTO")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="Procesos para renderizar por segmentos en paralelo (0 = todos los núcleos)")
+    parser.add_argument('--segment', type=float, default=None,
+                        help="Duración de cada segmento en segundos (por defecto, 2 por proceso; "
+                             f"como mínimo {MIN_SEGMENT_WARMUPS} veces el calentamiento)")
+    parser.add_argument('--spawn', choices=SPAWN_MODES, default='onset',
+                        help="Crear formas en cada ataque detectado o en cada frame")
+    parser.add_argument('--scene', choices=list(SCENES), default='forms',
+                        help="Estilo visual: formas animadas (Audio_Forms) o trazos (clean)")
+    add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+
+    rate, data = open_wav(args.input)
+    width, height = args.size
+    cache = cache_from_args(args)
+    jobs = args.jobs or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if jobs > 1:
+        segment = max(1, int(args.segment * args.fps)) if args.segment else None
+        frames = render_parallel(args.input, args.fps, args.size, args.seed, jobs,
+                                 output_dir=None if args.raw else args.output,
+                                 stream=sys.stdout.buffer if args.raw else None, segment=segment,
+                                 spawn=args.spawn, scene=args.scene, cache=cache)
+        if args.raw:
+            sys.stdout.buffer.flush()
+    else:
+        renderer = OfflineRenderer(rate, args.fps, width, height, seed=args.seed, spawn=args.spawn,
+                                   scene=args.scene)
+        if cache is not None:
+            renderer.use_cache(cache, args.input, data)
+        writer = FrameWriter(stream=sys.stdout.buffer) if args.raw else FrameWriter(output_dir=args.output)
+        frames = renderer.run(data, writer)
+        writer.close()
+    elapsed = time.perf_counter() - start
+
+    duration = len(data) / rate
+    print(f"{frames} frames en {elapsed:.1f} s ({duration / elapsed:.1f}x tiempo real)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()